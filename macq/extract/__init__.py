@@ -7,11 +7,14 @@ from .model import Model, LearnedAction
 from .extract import Extract, modes
 from .exceptions import IncompatibleObservationToken
 from .model import Model
+from .pddl_writer import write_models
+from .evaluation import Evaluation, ModelEvaluator
+from .model_archive import ModelArchive, ModelWriter, load_models, save_models
 from .amdn import AMDN
 from .arms import ARMS
 from .locm import LOCM
 from .slaf import SLAF
-from .observer import Observer
+from .observer import Observer, OnlineObserver
 
 __all__ = [
     "LearnedAction",
@@ -19,6 +22,13 @@ __all__ = [
     "LearnedFluent",
     "LearnedLiftedFluent",
     "Model",
+    "write_models",
+    "Evaluation",
+    "ModelEvaluator",
+    "ModelArchive",
+    "ModelWriter",
+    "load_models",
+    "save_models",
     "Extract",
     "modes",
     "IncompatibleObservationToken",
@@ -27,4 +37,5 @@ __all__ = [
     "LOCM",
     "SLAF",
     "Observer",
+    "OnlineObserver",
 ]
@@ -5,6 +5,7 @@ from macq.extract.learned_action import LearnedAction
 from nnf.operators import implies
 
 import macq.extract as extract
+from time import time
 from typing import Dict, List, Optional, Union, Hashable
 from nnf import Aux, Var, And, Or
 from bauhaus import Encoding  # only used for pretty printing in debug mode
@@ -12,9 +13,9 @@ from .exceptions import (
     IncompatibleObservationToken,
 )
 from .model import Model
-from ..trace import ActionPair
 from ..observation import NoisyPartialDisorderedParallelObservation, ObservedTraceList
-from ..utils.pysat import to_wcnf, extract_raw_model
+from ..utils.pysat import WCNFBuilder, nnf_literals, solve_wcnf
+from ..utils.solvers import MaxSATEngine
 
 e = Encoding
 
@@ -70,6 +71,9 @@ class AMDN:
         obs_tracelist: ObservedTraceList,
         debug: bool = False,
         occ_threshold: int = 1,
+        solver: Union[str, MaxSATEngine, None] = None,
+        time_limit: Optional[float] = None,
+        workers: Optional[int] = None,
     ):
         """Creates a new Model object.
 
@@ -80,6 +84,17 @@ class AMDN:
                 Optional debugging mode.
             occ_threshold (int):
                 Threshold to be used for noise constraints.
+            solver (Union[str, MaxSATEngine, None]):
+                Optional; The MaxSAT engine used to solve the constraints (see
+                `macq.utils.solvers`). Defaults to RC2.
+            time_limit (Optional[float]):
+                Optional; The wall-clock budget of the extraction, in seconds. When
+                reached, the best model found so far is returned, with its `cost`
+                and whether it is `optimal`.
+            workers (Optional[int]):
+                Optional; If given, the constraints are split into independent
+                subproblems (e.g. those of unrelated actions), which are solved in
+                this many processes.
 
         Raises:
             IncompatibleObservationToken:
@@ -88,10 +103,20 @@ class AMDN:
         if obs_tracelist.type is not NoisyPartialDisorderedParallelObservation:
             raise IncompatibleObservationToken(obs_tracelist.type, AMDN)
 
-        return AMDN._amdn(obs_tracelist, debug, occ_threshold)
+        deadline = None if time_limit is None else time() + time_limit
+        return AMDN._amdn(
+            obs_tracelist, debug, occ_threshold, solver, deadline, workers
+        )
 
     @staticmethod
-    def _amdn(obs_tracelist: ObservedTraceList, debug: bool, occ_threshold: int):
+    def _amdn(
+        obs_tracelist: ObservedTraceList,
+        debug: bool,
+        occ_threshold: int,
+        solver: Union[str, MaxSATEngine, None] = None,
+        deadline: Optional[float] = None,
+        workers: Optional[int] = None,
+    ):
         """Main driver for the entire AMDN algorithm.
         The first line contains steps 1-4.
         The second line contains step 5.
@@ -104,13 +129,25 @@ class AMDN:
                 Optional debugging mode.
             occ_threshold (int):
                 Threshold to be used for noise constraints.
+            solver (Union[str, MaxSATEngine, None]):
+                Optional; The MaxSAT engine used to solve the constraints.
+            deadline (Optional[float]):
+                Optional; The time (from `time.time`) by which the constraints must
+                be solved.
+            workers (Optional[int]):
+                Optional; The number of processes to solve independent subproblems
+                in.
 
         Returns:
             The extracted `Model`.
         """
         wcnf, decode = AMDN._solve_constraints(obs_tracelist, occ_threshold, debug)
-        raw_model = extract_raw_model(wcnf, decode)
-        return AMDN._extract_model(obs_tracelist, raw_model)
+        time_limit = None if deadline is None else max(deadline - time(), 0)
+        raw_model, result = solve_wcnf(wcnf, decode, solver, time_limit, workers)
+        model = AMDN._extract_model(obs_tracelist, raw_model)
+        model.cost = result.cost
+        model.optimal = result.optimal
+        return model
 
     @staticmethod
     def _or_refactor(maybe_lit: Union[Or, Var]):
@@ -290,7 +327,7 @@ class AMDN:
                     for act_x in par_act_sets[j]:
                         if act_x != act_y:
                             # calculate the probability of the actions being disordered (p)
-                            p = obs_tracelist.probabilities[ActionPair({act_x, act_y})]
+                            p = obs_tracelist.probability(act_x, act_y)
                             # each constraint only needs to hold for one proposition to be true
                             constraint_1 = []
                             constraint_2 = []
@@ -383,9 +420,7 @@ class AMDN:
                 # each action to every other action in the set; setting constraints assuming actions are not disordered
                 for act_x in par_act_sets[j]:
                     for act_x_prime in par_act_sets[j] - {act_x}:
-                        p = obs_tracelist.probabilities[
-                            ActionPair({act_x, act_x_prime})
-                        ]
+                        p = obs_tracelist.probability(act_x, act_x_prime)
                         # iterate through all propositions
                         for r in obs_tracelist.propositions:
                             soft_constraints[
@@ -400,9 +435,7 @@ class AMDN:
                 # for each pair, compare every action in act_y to every action in act_x_prime; setting constraints assuming actions are disordered
                 for act_y in par_act_sets[j + 1]:
                     for act_x_prime in par_act_sets[j] - {act_y}:
-                        p = obs_tracelist.probabilities[
-                            ActionPair({act_y, act_x_prime})
-                        ]
+                        p = obs_tracelist.probability(act_y, act_x_prime)
                         # iterate through all propositions and similarly set the constraint
                         for r in obs_tracelist.propositions:
                             soft_constraints[
@@ -693,19 +726,13 @@ class AMDN:
             The WCNF and corresponding decode dictionary.
         """
         constraints = AMDN._set_all_constraints(obs_tracelist, occ_threshold, debug)
-        # extract hard constraints
-        hard_constraints = []
+        builder = WCNFBuilder()
         for c, weight in constraints.items():
             if weight == "HARD":
-                hard_constraints.append(c)
-        for c in hard_constraints:
-            del constraints[c]
-
-        wcnf, decode = to_wcnf(
-            soft_clauses=And(constraints.keys()),
-            hard_clauses=And(hard_constraints),
-            weights=list(constraints.values()),
-        )
+                builder.add_hard(nnf_literals(c))
+            else:
+                builder.add_soft(nnf_literals(c), weight)
+        wcnf, decode = builder.close()
         return wcnf, decode
 
     @staticmethod
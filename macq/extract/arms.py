@@ -2,7 +2,8 @@
 
 from collections import Counter, defaultdict
 from dataclasses import dataclass
-from typing import Dict, Hashable, List, Set, Tuple
+from time import time
+from typing import Dict, Hashable, List, Optional, Set, Tuple, Union
 from warnings import warn
 
 from nnf import And, Or, Var
@@ -10,9 +11,10 @@ from nnf import false as nnffalse
 
 from ..observation import Observation, ObservedTraceList, PartialObservation
 from ..trace import Action, Fluent
-from ..utils.pysat import RC2, WCNF, to_wcnf
+from ..utils.pysat import WCNF, WCNFBuilder, nnf_literals, solve_wcnf
+from ..utils.solvers import MaxSATEngine, SolverResult
 from . import LearnedAction, LearnedFluent, Model
-from .exceptions import IncompatibleObservationToken, InvalidMaxSATModel
+from .exceptions import IncompatibleObservationToken
 
 
 @dataclass
@@ -74,6 +76,9 @@ class ARMS:
         threshold: float = 0.6,
         info3_default: int = 30,
         plan_default: int = 30,
+        solver: Union[str, MaxSATEngine, None] = None,
+        time_limit: Optional[float] = None,
+        workers: Optional[int] = None,
     ):
         """
         Arguments:
@@ -97,6 +102,18 @@ class ARMS:
                 The default weight for I3 constraints with probability below the threshold.
             plan_default (int):
                 The default weight for plan constraints with probability below the threshold.
+            solver (Union[str, MaxSATEngine, None]):
+                Optional; The MaxSAT engine used to solve the constraints (see
+                `macq.utils.solvers`). Defaults to RC2.
+            time_limit (Optional[float]):
+                Optional; The wall-clock budget of the extraction, in seconds. Once
+                reached, the remaining MAX-SAT problems are not solved to optimality
+                and the best models found so far are used. The model's `cost` and
+                whether it is `optimal` are set from the solutions.
+            workers (Optional[int]):
+                Optional; If given, each MAX-SAT problem is split into independent
+                subproblems (e.g. those of unrelated actions), which are solved in
+                this many processes.
         """
         if obs_tracelist.type is not PartialObservation:
             raise IncompatibleObservationToken(obs_tracelist.type, ARMS)
@@ -104,10 +121,11 @@ class ARMS:
         if not (threshold >= 0 and threshold <= 1):
             raise ARMS.InvalidThreshold(threshold)
 
+        deadline = None if time_limit is None else time() + time_limit
         fluents = obs_tracelist.get_fluents()
         # get fluents from initial state
         # call algorithm to get actions
-        actions = ARMS._arms(
+        actions, results = ARMS._arms(
             obs_tracelist,
             upper_bound,
             fluents,
@@ -118,6 +136,9 @@ class ARMS:
             info3_default,
             plan_default,
             debug,
+            solver,
+            deadline,
+            workers,
         )
 
         # learned_fluents = set(map(lambda f: LearnedFluent(f.name, f.objects), fluents))
@@ -130,7 +151,12 @@ class ARMS:
             learned_fluents.update(act.precond)
             learned_fluents.update(act.add)
             learned_fluents.update(act.delete)
-        return Model(learned_fluents, actions)
+        return Model(
+            learned_fluents,
+            actions,
+            cost=sum(r.cost for r in results if r.cost is not None),
+            optimal=all(r.optimal for r in results),
+        )
 
     @staticmethod
     def _arms(
@@ -144,9 +170,13 @@ class ARMS:
         info3_default: int,
         plan_default: int,
         debug: bool,
-    ) -> Set[LearnedAction]:
+        solver: Union[str, MaxSATEngine, None] = None,
+        deadline: Optional[float] = None,
+        workers: Optional[int] = None,
+    ) -> Tuple[Set[LearnedAction], List[SolverResult]]:
         """The main driver for the ARMS algorithm."""
         learned_actions = set()  # The set of learned action models Θ
+        results = []  # The results of solving each MAX-SAT problem
         # pointers to the earliest unlearned action for each observation list
         early_actions = [0] * len(obs_tracelist)
 
@@ -194,7 +224,9 @@ class ARMS:
             if debug3:
                 input("Press enter to continue...")
 
-            model = ARMS.step4(max_sat, decode)
+            time_limit = None if deadline is None else max(deadline - time(), 0)
+            model, result = ARMS.step4(max_sat, decode, solver, time_limit, workers)
+            results.append(result)
 
             debug5 = ARMS.debug_menu("Debug step 5?") if debug else False
             # Mutates the LearnedAction (keys) of action_map_rev
@@ -271,12 +303,10 @@ class ARMS:
             if debug5:
                 input("Press enter to continue...")
 
-        return learned_actions
+        return learned_actions, results
 
     @staticmethod
-    def step1(
-        obs_tracelist: ObservedTraceList, debug: bool
-    ) -> Tuple[
+    def step1(obs_tracelist: ObservedTraceList, debug: bool) -> Tuple[
         Dict[LearnedAction, Dict[LearnedAction, Set[str]]],
         Dict[Action, LearnedAction],
     ]:
@@ -740,11 +770,10 @@ class ARMS:
                     weight, constraints_w_weights[constraint]
                 )
 
-        problem: And[Or[Var]] = And(list(constraints_w_weights.keys()))
-        weights = list(constraints_w_weights.values())
-
-        wcnf, decode = to_wcnf(problem, weights)
-        return wcnf, decode
+        builder = WCNFBuilder()
+        for constraint, weight in constraints_w_weights.items():
+            builder.add_soft(nnf_literals(constraint), weight)
+        return builder.close()
 
     @staticmethod
     def _calculate_support_rates(
@@ -766,22 +795,15 @@ class ARMS:
         return list(map(get_support_rate, support_counts))
 
     @staticmethod
-    def step4(max_sat: WCNF, decode: Dict[int, Hashable]) -> Dict[Hashable, bool]:
+    def step4(
+        max_sat: WCNF,
+        decode: Dict[int, Hashable],
+        solver: Union[str, MaxSATEngine, None] = None,
+        time_limit: Optional[float] = None,
+        workers: Optional[int] = None,
+    ) -> Tuple[Dict[Hashable, bool], SolverResult]:
         """(Step 4) Solve the MAX-SAT problem built in Step 3."""
-        solver = RC2(max_sat)
-
-        encoded_model = solver.compute()
-
-        if not isinstance(encoded_model, list):
-            # should never be reached
-            raise InvalidMaxSATModel(encoded_model)
-
-        # decode the model (back to nnf vars)
-        model: Dict[Hashable, bool] = {
-            decode[abs(clause)]: clause > 0 for clause in encoded_model
-        }
-
-        return model
+        return solve_wcnf(max_sat, decode, solver, time_limit, workers)
 
     @staticmethod
     def step5(
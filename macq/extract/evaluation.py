@@ -0,0 +1,251 @@
+"""Scores learned models against traces and reference models.
+
+The traces are compiled once into a boolean state matrix (one row per step, one
+column per fluent), and each model into precondition, add and delete masks (one
+row per action), so a model is evaluated over every step of the traces in a few
+vectorised operations. This makes it cheap to rank many candidate models on the
+same traces.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..trace import TraceList
+from .learned_action import LearnedAction
+from .model import Model
+
+ATTRIBUTES = ("precond", "add", "delete")
+
+
+@dataclass
+class Evaluation:
+    """The scores of a model.
+
+    Attributes:
+        coverage (float):
+            The fraction of the steps whose action is in the model. The other
+            scores are computed over these steps.
+        applicability (float):
+            The fraction of the steps in which the preconditions of the action
+            hold.
+        accuracy (float):
+            The fraction of fluents of the next states correctly predicted by
+            applying the effects of the actions.
+        exact (float):
+            The fraction of next states predicted exactly.
+        precond_precision (Optional[float]):
+            The fraction of the learned preconditions that are in the reference
+            model (None without a reference model, or if there are none).
+        precond_recall (Optional[float]):
+            The fraction of the reference preconditions that were learned.
+        add_precision (Optional[float]):
+            As above, for the add effects.
+        add_recall (Optional[float]):
+            As above, for the add effects.
+        delete_precision (Optional[float]):
+            As above, for the delete effects.
+        delete_recall (Optional[float]):
+            As above, for the delete effects.
+    """
+
+    coverage: float
+    applicability: float
+    accuracy: float
+    exact: float
+    precond_precision: Optional[float] = None
+    precond_recall: Optional[float] = None
+    add_precision: Optional[float] = None
+    add_recall: Optional[float] = None
+    delete_precision: Optional[float] = None
+    delete_recall: Optional[float] = None
+
+
+def _ratio(num: int, den: int) -> Optional[float]:
+    return num / den if den else None
+
+
+class ModelEvaluator:
+    """Evaluates models on a set of traces.
+
+    Example:
+        ```python
+        evaluator = ModelEvaluator(traces, reference=ground_truth)
+        best = evaluator.rank(candidates, key="accuracy")[0]
+        ```
+    """
+
+    def __init__(self, traces: TraceList, reference: Optional[Model] = None):
+        """Compiles the traces.
+
+        Args:
+            traces (TraceList):
+                The (held-out) traces to evaluate models on.
+            reference (Optional[Model]):
+                Optional; The ground truth model, to compute the precision and
+                recall of the learned preconditions and effects.
+        """
+        self.reference = reference
+        self.fluents: Dict[str, int] = {}
+        states: List[List[Tuple[int, bool]]] = []
+        actions: List[str] = []
+        has_next: List[bool] = []
+        for trace in traces:
+            for i, step in enumerate(trace):
+                states.append(
+                    [(self._fluent(str(f)), bool(v)) for f, v in step.state.items()]
+                )
+                has_next.append(i + 1 < len(trace))
+                actions.append(
+                    "" if step.action is None else f"({step.action.details()})"
+                )
+
+        self.states = np.zeros((len(states), len(self.fluents)), dtype=bool)
+        for row, state in enumerate(states):
+            columns = [c for c, v in state if v]
+            self.states[row, columns] = True
+        self.known = len(self.fluents)
+
+        # steps (with a next state) and their actions
+        self.action_names = sorted({a for a, n in zip(actions, has_next) if n and a})
+        index = {a: i for i, a in enumerate(self.action_names)}
+        self.steps = np.array(
+            [i for i, (a, n) in enumerate(zip(actions, has_next)) if n and a],
+            dtype=np.int64,
+        )
+        self.step_actions = np.array(
+            [index[actions[i]] for i in self.steps], dtype=np.int64
+        )
+
+    def _fluent(self, fluent: str) -> int:
+        """Returns the column of a fluent, adding it if it is new."""
+        column = self.fluents.get(fluent)
+        if column is None:
+            column = self.fluents[fluent] = len(self.fluents)
+        return column
+
+    def compile(self, model: Model) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Compiles a model into masks over the fluents of the traces.
+
+        Args:
+            model (Model):
+                The (grounded) model to compile.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]:
+                The precondition, add and delete masks of the actions of the
+                traces (in the order of `action_names`), with a row of False for
+                the actions not in the model. Fluents that are not in the traces
+                are in extra columns, and never hold.
+        """
+        rows = {name: i for i, name in enumerate(self.action_names)}
+        actions = [a for a in model.actions if a.details() in rows]
+        cells = [self._cells(actions, rows, attr) for attr in ATTRIBUTES]
+        shape = (len(rows), len(self.fluents))
+        precond, add, delete = (self._mask(c, shape) for c in cells)
+        return precond, add, delete
+
+    def evaluate(self, model: Model) -> Evaluation:
+        """Evaluates a model on the traces (and against the reference model).
+
+        Args:
+            model (Model):
+                The (grounded) model to evaluate.
+
+        Returns:
+            The `Evaluation` of the model.
+        """
+        precond, add, delete = self.compile(model)
+        modelled_actions = {a.details() for a in model.actions}
+        modelled = np.array(
+            [name in modelled_actions for name in self.action_names], dtype=bool
+        )
+        steps_modelled = modelled[self.step_actions]
+        steps = self.steps[steps_modelled]
+        acts = self.step_actions[steps_modelled]
+
+        states = self._pad(self.states[steps])
+        next_states = self.states[steps + 1]
+        applicable = ~(precond[acts] & ~states).any(axis=1)
+        predicted = (states & ~delete[acts]) | add[acts]
+        correct = predicted[:, : self.known] == next_states
+
+        evaluation = Evaluation(
+            coverage=_ratio(len(steps), len(self.steps)) or 0.0,
+            applicability=float(applicable.mean()) if len(steps) else 0.0,
+            accuracy=float(correct.mean()) if correct.size else 0.0,
+            exact=float(correct.all(axis=1).mean()) if len(steps) else 0.0,
+        )
+        if self.reference is not None:
+            self._compare(model, evaluation)
+        return evaluation
+
+    def _pad(self, states: np.ndarray) -> np.ndarray:
+        """Adds columns (which never hold) for the fluents added by models."""
+        missing = len(self.fluents) - states.shape[1]
+        if not missing:
+            return states
+        return np.pad(states, ((0, 0), (0, missing)))
+
+    def _compare(self, model: Model, evaluation: Evaluation):
+        """Sets the precision and recall of the model against the reference."""
+        names = {a.details() for a in model.actions}
+        names.update(a.details() for a in self.reference.actions)
+        rows = {name: i for i, name in enumerate(sorted(names))}
+        for attr in ATTRIBUTES:
+            cells = [
+                self._cells(m.actions, rows, attr) for m in (model, self.reference)
+            ]
+            learned, reference = (
+                self._mask(c, (len(rows), len(self.fluents))) for c in cells
+            )
+            true_positives = int((learned & reference).sum())
+            setattr(
+                evaluation,
+                f"{attr}_precision",
+                _ratio(true_positives, int(learned.sum())),
+            )
+            setattr(
+                evaluation,
+                f"{attr}_recall",
+                _ratio(true_positives, int(reference.sum())),
+            )
+
+    def _cells(
+        self, actions: Iterable[LearnedAction], rows: Dict[str, int], attr: str
+    ) -> np.ndarray:
+        """Returns the (action row, fluent column) cells of an attribute (e.g. the
+        preconditions) of the actions."""
+        cells = [
+            (rows[a.details()], self._fluent(str(f)))
+            for a in actions
+            for f in getattr(a, attr)
+        ]
+        return np.array(cells, dtype=np.int64).reshape(-1, 2)
+
+    @staticmethod
+    def _mask(cells: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+        mask = np.zeros(shape, dtype=bool)
+        mask[cells[:, 0], cells[:, 1]] = True
+        return mask
+
+    def rank(
+        self, models: Iterable[Model], key: str = "accuracy"
+    ) -> List[Tuple[Model, Evaluation]]:
+        """Evaluates models, and sorts them from best to worst.
+
+        Args:
+            models (Iterable[Model]):
+                The models to rank.
+            key (str):
+                Optional; The `Evaluation` attribute to rank the models by.
+                Defaults to the next state prediction accuracy.
+
+        Returns:
+            List[Tuple[Model, Evaluation]]:
+                The models and their evaluations, best first.
+        """
+        evaluated = [(model, self.evaluate(model)) for model in models]
+        evaluated.sort(key=lambda e: getattr(e[1], key) or 0.0, reverse=True)
+        return evaluated
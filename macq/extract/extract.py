@@ -2,7 +2,7 @@
 
 from dataclasses import dataclass
 from enum import Enum, auto
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 
 from ..observation import ObservedTraceList
 from ..trace import Action, State
@@ -46,6 +46,7 @@ class Extract:
         obs_tracelist: ObservedTraceList,
         mode: modes,
         debug: Union[bool, Dict[str, bool], List[str]] = False,
+        time_limit: Optional[float] = None,
         **kwargs
     ) -> Model:
         """Extracts a Model object.
@@ -60,6 +61,10 @@ class Extract:
                 The extraction technique to use.
             debug (bool, dict, list):
                 Model specific debugging options. Either a boolean, or a list/dict indicating the functions to debug.
+            time_limit (float):
+                Optional; A wall-clock budget in seconds, for the techniques that solve MAX-SAT problems (ARMS
+                and AMDN). When reached, the best model found so far is returned, with its `cost` and whether
+                it is `optimal`.
             **kwargs: (keyword arguments)
                 Any extra arguments to supply to the extraction technique.
 
@@ -78,4 +83,10 @@ class Extract:
             modes.ARMS: ARMS,
             modes.LOCM: LOCM,
         }
+        if time_limit is not None:
+            if mode not in (modes.AMDN, modes.ARMS):
+                raise ValueError(
+                    f"{mode.name} does not support time limits; only ARMS and AMDN do."
+                )
+            kwargs["time_limit"] = time_limit
         return techniques[mode](obs_tracelist, debug=debug, **kwargs)
@@ -1,9 +1,8 @@
 from json import dumps, loads
-from typing import Set, Union
+from typing import Optional, Set, Union
 
 import tarski
 import tarski.fstrips as fs
-from tarski.fol import FirstOrderLanguage
 from tarski.io import fstrips as iofs
 from tarski.syntax import land
 from tarski.syntax.formulas import CompoundFormula, Connective, top
@@ -12,6 +11,7 @@ from ..trace import Fluent
 from ..utils import ComplexEncoder
 from .learned_action import LearnedAction, LearnedLiftedAction
 from .learned_fluent import LearnedFluent, LearnedLiftedFluent
+from .pddl_writer import pddl_name, write_pddl
 
 
 class Model:
@@ -27,12 +27,20 @@ class Model:
             The set of actions in the domain. Actions include their
             preconditions, add effects, and delete effects. The nature of the
             action attributes characterize the model.
+        cost (Optional[int]):
+            For models extracted by solving MAX-SAT problems, the cost of the
+            solution (the total weight of the constraints it violates).
+        optimal (Optional[bool]):
+            For models extracted by solving MAX-SAT problems, whether the solution
+            is known to be optimal. False if the solver's time limit was reached.
     """
 
     def __init__(
         self,
         fluents: Union[Set[LearnedFluent], Set[LearnedLiftedFluent]],
         actions: Union[Set[LearnedAction], Set[LearnedLiftedAction]],
+        cost: Optional[int] = None,
+        optimal: Optional[bool] = None,
     ):
         """Initializes a Model with a set of fluents and a set of actions.
 
@@ -41,9 +49,16 @@ class Model:
                 The set of fluents in the model.
             actions (Set[LearnedAction]):
                 The set of actions in the model.
+            cost (Optional[int]):
+                Optional; The cost of the MAX-SAT solution the model was
+                extracted from.
+            optimal (Optional[bool]):
+                Optional; Whether the MAX-SAT solution is known to be optimal.
         """
         self.fluents = fluents
         self.actions = actions
+        self.cost = cost
+        self.optimal = optimal
 
     def __eq__(self, other):
         if not isinstance(other, Model):
@@ -108,15 +123,15 @@ class Model:
                 fp.write(serial)
         return serial
 
-    def __to_tarski_formula(self, attribute: Set[str], lang: FirstOrderLanguage):
+    def __to_tarski_formula(self, attribute: Set[str], predicates: dict):
         """Converts a set of strings (referencing an attribute of a LearnedAction, i.e. its preconditions)
         to an Atom or CompoundFormula, in order to set up a tarski action.
 
         Args:
             attribute (Set[str]):
                 The attribute to be converted to an Atom or CompoundFormula.
-            lang (FirstOrderLanguage):
-                The relevant language.
+            predicates (dict):
+                The tarski predicate of each fluent string.
 
         Returns:
             The attribute of the LearnedAction, converted to an Atom or CompoundFormula.
@@ -126,12 +141,26 @@ class Model:
             return top
         # creates Atom
         elif len(attribute) == 1:
-            return lang.get(list(attribute)[0].replace(" ", "_"))()  # type: ignore
+            return predicates[next(iter(attribute))]()
         # creates CompoundFormula
         else:
-            return CompoundFormula(
-                Connective.And, [lang.get(a.replace(" ", "_"))() for a in attribute]  # type: ignore
-            )
+            return CompoundFormula(Connective.And, [predicates[a]() for a in attribute])
+
+    def is_lifted(self) -> bool:
+        """Returns whether the model's actions are lifted (as opposed to grounded).
+
+        Raises:
+            ValueError:
+                Raised if the type of the actions is not recognized.
+        """
+        action = next(iter(self.actions), None)
+        if isinstance(action, LearnedLiftedAction):
+            return True
+        if action is None or isinstance(action, LearnedAction):
+            return False
+        raise ValueError(
+            f"Could not determine whether the model is grounded or lifted. Fluents are of type {type(next(iter(self.fluents), None))} while actions are of type {type(action)}"
+        )
 
     def to_pddl(
         self,
@@ -139,7 +168,27 @@ class Model:
         problem_name: str = "",
         domain_filename: str = "",
         problem_filename: str = "",
+        use_tarski: bool = True,
     ):
+        """Dumps the model to PDDL domain and problem files.
+
+        Args:
+            domain_name (str):
+                The name of the domain to be generated.
+            problem_name (str):
+                Optional; The name of the problem to be generated. Defaults to
+                "<domain_name>_problem".
+            domain_filename (str):
+                Optional; The name of the domain file to be generated. Defaults to
+                "<domain_name>.pddl".
+            problem_filename (str):
+                Optional; The name of the problem file to be generated. Defaults to
+                "<problem_name>.pddl".
+            use_tarski (bool):
+                Optional; Whether to build the files with tarski. If False, the
+                files are written directly as text (see `pddl_writer`), which is
+                much faster.
+        """
         if not problem_name:
             problem_name = domain_name + "_problem"
         if not domain_filename:
@@ -147,18 +196,18 @@ class Model:
         if not problem_filename:
             problem_filename = problem_name + ".pddl"
 
-        if isinstance(list(self.actions)[0], LearnedLiftedAction):
+        if not use_tarski:
+            write_pddl(
+                self, domain_name, problem_name, domain_filename, problem_filename
+            )
+        elif self.is_lifted():
             self.to_pddl_lifted(
                 domain_name, problem_name, domain_filename, problem_filename
             )
-        elif isinstance(list(self.actions)[0], LearnedAction):
+        else:
             self.to_pddl_grounded(
                 domain_name, problem_name, domain_filename, problem_filename
             )
-        else:
-            raise ValueError(
-                f"Could not determine whether the model is grounded or lifted. Fluents are of type {type(list(self.fluents)[0])} while actions are of type {type(list(self.actions)[0])}"
-            )
 
     def to_pddl_lifted(
         self,
@@ -252,31 +301,32 @@ class Model:
         problem = tarski.fstrips.create_fstrips_problem(
             domain_name=domain_name, problem_name=problem_name, language=lang
         )
-        if self.fluents:
-            # create 0-arity predicates
-            for f in self.fluents:
-                # NOTE: want there to be no brackets in any fluents referenced as tarski adds these later.
-                # fluents (their string conversion) must be in the following format: (on object a object b)
-                test = str(f)
-                lang.predicate(str(f)[1:-1].replace(" ", "_"))
-        if self.actions:
-            for a in self.actions:
-                # fetch all the relevant 0-arity predicates and create formulas to set up the ground actions
-                preconds = self.__to_tarski_formula({a[1:-1] for a in a.precond}, lang)
-                adds = [lang.get(f"{e.replace(' ', '_')[1:-1]}")() for e in a.add]
-                dels = [lang.get(f"{e.replace(' ', '_')[1:-1]}")() for e in a.delete]
-                effects = [fs.AddEffect(e) for e in adds]
-                effects.extend([fs.DelEffect(e) for e in dels])
-                # set up action
-                problem.action(
-                    name=a.details()
-                    .replace("(", "")
-                    .replace(")", "")
-                    .replace(" ", "_"),
-                    parameters=[],
-                    precondition=preconds,
-                    effects=effects,
-                )
+        predicates = {}
+
+        def predicate(f: str):
+            # NOTE: want there to be no brackets in any fluents referenced as tarski adds these later.
+            # fluents (their string conversion) must be in the following format: (on object a object b)
+            if f not in predicates:
+                predicates[f] = lang.predicate(pddl_name(f))
+            return predicates[f]
+
+        # create 0-arity predicates
+        for f in self.fluents:
+            predicate(str(f))
+        for a in self.actions:
+            # fetch all the relevant 0-arity predicates and create formulas to set up the ground actions
+            for f in a.precond | a.add | a.delete:
+                predicate(f)
+            preconds = self.__to_tarski_formula(a.precond, predicates)
+            effects = [fs.AddEffect(predicates[e]()) for e in a.add]
+            effects.extend([fs.DelEffect(predicates[e]()) for e in a.delete])
+            # set up action
+            problem.action(
+                name=pddl_name(a.details()),
+                parameters=[],
+                precondition=preconds,
+                effects=effects,
+            )
         # create empty init and goal
         problem.init = tarski.model.create(lang)
         problem.goal = land()
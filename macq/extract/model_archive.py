@@ -0,0 +1,295 @@
+"""A compact binary format for storing many (grounded) models.
+
+The fluent strings of all the models in an archive are stored once, in a shared
+table, and each fluent set (the fluents of a model, and the preconditions, add
+and delete effects of its actions) is stored as a run of int32 indices into the
+table. The runs are streamed to the file as models are written, followed by a
+footer holding the run offsets, the table and the action names::
+
+    MAGIC | int32 runs ... | int64 offsets | JSON header | uint64 counts
+
+Archives are memory-mapped when read, and the fluent sets of each action are
+only decoded when they are first accessed. The JSON format of
+`Model.serialize` remains the interchange format.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+from json import dumps, loads
+from typing import IO, Dict, Hashable, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+
+from ..utils import ComplexEncoder
+from .learned_action import LearnedAction
+from .model import Model
+
+MAGIC = b"MACQMDL1"
+_FOOTER = np.dtype("<u8")
+
+
+class InvalidModelArchive(Exception):
+    """Raised when a file is not a model archive."""
+
+    def __init__(self, path, message=None):
+        if message is None:
+            message = f"{path} is not a model archive."
+        super().__init__(message)
+
+
+class ModelWriter:
+    """Streams models to a binary model archive.
+
+    Example:
+        ```python
+        with ModelWriter("models.mqm") as writer:
+            for model in models:
+                writer.write(model)
+        ```
+    """
+
+    def __init__(self, path: str):
+        """Opens a new archive for writing.
+
+        Args:
+            path (str):
+                The path of the archive.
+        """
+        self.path = path
+        self._file: IO[bytes] = open(path, "wb")
+        self._file.write(MAGIC)
+        self._ids: Dict[Hashable, int] = {}
+        self._table: List[str] = []
+        self._offsets: List[int] = [0]
+        self._models: List[dict] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self, fluents: Iterable):
+        """Writes the table indices of a set of fluents, interning new ones."""
+        ids = self._ids
+        run = []
+        for f in fluents:
+            key = str(f)
+            i = ids.get(key)
+            if i is None:
+                i = ids[key] = len(self._table)
+                self._table.append(key)
+            run.append(i)
+        self._file.write(np.asarray(run, dtype="<i4").tobytes())
+        self._offsets.append(self._offsets[-1] + len(run))
+
+    def write(self, model: Model):
+        """Appends a model to the archive.
+
+        Args:
+            model (Model):
+                The model to write. Its actions must be `LearnedAction`s.
+        """
+        if model.is_lifted():
+            raise ValueError("Only grounded models can be stored in an archive.")
+        run = len(self._offsets) - 1
+        self._run(model.fluents)
+        actions = []
+        for a in model.actions:
+            self._run(a.precond)
+            self._run(a.add)
+            self._run(a.delete)
+            actions.append([a.name, a.obj_params, getattr(a, "cost", None)])
+        self._models.append(
+            dict(run=run, actions=actions, cost=model.cost, optimal=model.optimal)
+        )
+
+    def close(self):
+        """Writes the footer and closes the archive."""
+        if self._file.closed:
+            return
+        if self._offsets[-1] % 2:
+            # pad the runs so that the offsets are 8-byte aligned
+            self._file.write(b"\0" * 4)
+        self._file.write(np.asarray(self._offsets, dtype="<i8").tobytes())
+        header = dumps(
+            dict(table=self._table, models=self._models), cls=ComplexEncoder
+        ).encode()
+        self._file.write(header)
+        self._file.write(
+            np.asarray([len(self._offsets), len(header)], dtype=_FOOTER).tobytes()
+        )
+        self._file.close()
+
+
+class ArchivedAction(LearnedAction):
+    """A `LearnedAction` read from a model archive, whose preconditions and
+    effects are decoded when they are first accessed."""
+
+    def __init__(self, name, obj_params, archive: ModelArchive, run: int, cost=None):
+        self.name = name
+        self.obj_params = obj_params
+        self.cost = cost
+        self._archive = archive
+        self._run = run
+        self._sets: Optional[List[Set[str]]] = None
+
+    def _decoded(self) -> List[Set[str]]:
+        if self._sets is None:
+            self._sets = [self._archive._decode(self._run + i) for i in range(3)]
+        return self._sets
+
+    def _setter(i):
+        def set_(self, value):
+            self._decoded()[i] = value
+
+        return set_
+
+    precond = property(lambda self: self._decoded()[0], _setter(0))
+    add = property(lambda self: self._decoded()[1], _setter(1))
+    delete = property(lambda self: self._decoded()[2], _setter(2))
+    del _setter
+
+
+class ModelArchive:
+    """A memory-mapped binary model archive.
+
+    Models are decoded when indexed; their fluents are `str`s, as with
+    `Model.deserialize`.
+
+    Attributes:
+        path (str):
+            The path of the archive.
+        table (List[str]):
+            The fluent strings shared by the models.
+    """
+
+    def __init__(self, path: str):
+        """Opens an archive for reading.
+
+        Args:
+            path (str):
+                The path of the archive.
+
+        Raises:
+            InvalidModelArchive:
+                Raised if the file is not a model archive, or is malformed.
+        """
+        self.path = path
+        self._mmap: Optional[mmap.mmap] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._runs: Optional[np.ndarray] = None
+        with open(path, "rb") as fp:
+            if os.fstat(fp.fileno()).st_size < len(MAGIC) + _FOOTER.itemsize * 2:
+                raise InvalidModelArchive(path)
+            self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read()
+        except InvalidModelArchive:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read(self):
+        """Reads and validates the footer, offsets and header of the archive."""
+        buf = self._mmap
+        if buf[: len(MAGIC)] != MAGIC:
+            raise InvalidModelArchive(self.path)
+        footer = len(buf) - _FOOTER.itemsize * 2
+        num_offsets, header_len = (
+            int(n) for n in np.frombuffer(buf[footer:], dtype=_FOOTER)
+        )
+        header_start = footer - header_len
+        offsets_start = header_start - num_offsets * 8
+        if num_offsets < 1 or offsets_start < len(MAGIC):
+            raise InvalidModelArchive(self.path, f"{self.path} is corrupt.")
+        # the offsets are copied (they are small), so that only the runs are views
+        # of the memory map
+        offsets = np.frombuffer(buf[offsets_start:header_start], dtype="<i8")
+        num_ids = (offsets_start - len(MAGIC)) // 4
+        if offsets[0] != 0 or (np.diff(offsets) < 0).any() or offsets[-1] > num_ids:
+            raise InvalidModelArchive(self.path, f"{self.path} is corrupt.")
+        try:
+            header = loads(buf[header_start:footer])
+            table = header["table"]
+            models = header["models"]
+            for info in models:
+                if not 0 <= info["run"] <= num_offsets - 2 - 3 * len(info["actions"]):
+                    raise ValueError()
+        except (ValueError, KeyError, TypeError):
+            raise InvalidModelArchive(self.path, f"{self.path} is corrupt.")
+        self._offsets = offsets
+        self._runs = np.frombuffer(
+            buf, dtype="<i4", count=int(offsets[-1]), offset=len(MAGIC)
+        )
+        if len(self._runs) and (self._runs.min() < 0 or self._runs.max() >= len(table)):
+            raise InvalidModelArchive(self.path, f"{self.path} is corrupt.")
+        self.table: List[str] = table
+        self._models: List[dict] = models
+
+    def close(self):
+        """Closes the archive. Models (and actions) decoded from it remain usable,
+        but their preconditions and effects must have been accessed first."""
+        # the views of the memory map must be released before it is closed
+        self._runs = None
+        self._offsets = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __len__(self):
+        return len(self._models)
+
+    def __getitem__(self, i: int) -> Model:
+        info = self._models[i]
+        run = info["run"]
+        actions = {
+            ArchivedAction(name, obj_params, self, run + 1 + 3 * j, cost)
+            for j, (name, obj_params, cost) in enumerate(info["actions"])
+        }
+        return Model(self._decode(run), actions, info["cost"], info["optimal"])
+
+    def __iter__(self) -> Iterator[Model]:
+        return (self[i] for i in range(len(self)))
+
+    def _decode(self, run: int) -> Set[str]:
+        """Decodes a run of table indices into a set of fluent strings."""
+        if self._runs is None:
+            raise ValueError(f"The archive {self.path} is closed.")
+        table = self.table
+        ids = self._runs[self._offsets[run] : self._offsets[run + 1]]
+        return {table[i] for i in ids.tolist()}
+
+
+def save_models(models: Iterable[Model], path: str):
+    """Writes models to a binary model archive.
+
+    Args:
+        models (Iterable[Model]):
+            The models to write.
+        path (str):
+            The path of the archive.
+    """
+    with ModelWriter(path) as writer:
+        for model in models:
+            writer.write(model)
+
+
+def load_models(path: str) -> ModelArchive:
+    """Opens a binary model archive.
+
+    Args:
+        path (str):
+            The path of the archive.
+
+    Returns:
+        The `ModelArchive`, from which models are decoded on demand.
+    """
+    return ModelArchive(path)
@@ -1,10 +1,11 @@
 """.. include:: ../../docs/extract/observer.md"""
 
-from collections import defaultdict
 from dataclasses import dataclass
-from typing import List, Set
+from typing import Dict, Iterable, List, Optional, Set
 
 from dataclasses import dataclass
+import numpy as np
+from ..trace import Action, Fluent
 from ..observation import IdentityObservation, ObservedTraceList
 from . import LearnedAction, Model
 from .exceptions import IncompatibleObservationToken
@@ -18,6 +19,270 @@ class DeltaObservation:
     deleted: Set[str]
 
 
+@dataclass
+class ActionSummary:
+    """The running summary of the transitions of an action, as bitmasks over the
+    fluent IDs of an `OnlineObserver`.
+
+    Attributes:
+        action (Action):
+            The action.
+        precond (int):
+            The intersection of the true fluents of all pre-states.
+        add (int):
+            The union of the fluents added by all transitions.
+        delete (int):
+            The union of the fluents deleted by all transitions.
+    """
+
+    action: Action
+    precond: int
+    add: int
+    delete: int
+
+
+def _to_mask(bits: np.ndarray) -> int:
+    """Packs a boolean array into an integer bitmask (bit i is `bits[i]`)."""
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+def _from_mask(mask: int, size: int) -> np.ndarray:
+    """Unpacks an integer bitmask into a boolean array of the given size."""
+    packed = np.frombuffer(mask.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(packed, count=size, bitorder="little").astype(bool)
+
+
+class OnlineObserver:
+    """Streaming Observer model extraction.
+
+    Consumes identity observations one step at a time, keeping only a running
+    summary of each action: the intersection of its (positive) pre-states and
+    the unions of its add and delete effects, stored as bitmasks over the
+    fluents seen. Memory is independent of the number of steps observed, and
+    observers built over separate shards of the observations can be merged.
+
+    Attributes:
+        fluents (List[Fluent]):
+            The fluents seen, indexed by their ID.
+        fluent_ids (Dict[Fluent, int]):
+            The ID of each fluent seen.
+        actions (Dict[str, ActionSummary]):
+            The summary of each action seen, keyed by its details.
+    """
+
+    def __init__(self, chunk_size: int = 4096):
+        """Initializes an empty OnlineObserver.
+
+        Args:
+            chunk_size (int):
+                Optional; The number of steps of a trace buffered and summarised
+                at once. Defaults to 4096.
+        """
+        self.chunk_size = chunk_size
+        self.fluents: List[Fluent] = []
+        self.fluent_ids: Dict[Fluent, int] = {}
+        self.actions: Dict[str, ActionSummary] = {}
+        # the fluent IDs of the keys of the last state read, in order
+        self._keys = []
+        self._key_ids = np.empty(0, dtype=np.intp)
+
+    def _fluent_id(self, fluent: Fluent) -> int:
+        """Returns the ID of a fluent, assigning a new one if it is unseen."""
+        fluent_id = self.fluent_ids.get(fluent)
+        if fluent_id is None:
+            fluent_id = self.fluent_ids[fluent] = len(self.fluents)
+            self.fluents.append(fluent)
+        return fluent_id
+
+    def _state_row(self, state) -> np.ndarray:
+        """Returns the values of a state's fluents, indexed by fluent ID."""
+        keys = list(state.keys())
+        # consecutive states almost always share the same fluents, in order
+        if keys != self._keys:
+            self._keys = keys
+            self._key_ids = np.array([self._fluent_id(f) for f in keys], dtype=np.intp)
+        row = np.zeros(len(self.fluents), dtype=bool)
+        row[self._key_ids] = np.fromiter(state.values(), dtype=bool, count=len(keys))
+        return row
+
+    def _update(self, action: Action, precond: int, add: int, delete: int):
+        """Updates the summary of an action."""
+        key = action.details()
+        summary = self.actions.get(key)
+        if summary is None:
+            self.actions[key] = ActionSummary(action, precond, add, delete)
+        else:
+            summary.precond &= precond
+            summary.add |= add
+            summary.delete |= delete
+
+    def observe_matrix(
+        self,
+        matrix: np.ndarray,
+        fluents: List[Fluent],
+        actions: List[Optional[Action]],
+    ):
+        """Observes a trace given as a step x fluent matrix (e.g. from
+        `Trace.to_matrix`).
+
+        All the transitions are bit-packed and reduced at once: the pre-states of
+        each action are ANDed together, and the deltas of its transitions are ORed
+        together.
+
+        Args:
+            matrix (np.ndarray):
+                The (boolean) value of each fluent at each step.
+            fluents (List[Fluent]):
+                The fluent of each column of the matrix.
+            actions (List[Optional[Action]]):
+                The action taken at each step (None if there is no action).
+        """
+        ids = [self._fluent_id(f) for f in fluents]
+        if ids != list(range(len(self.fluents))):
+            full = np.zeros((len(matrix), len(self.fluents)), dtype=bool)
+            full[:, ids] = matrix
+            matrix = full
+
+        # the steps with a transition (i.e. an action and a next step)
+        steps = np.array(
+            [i for i in range(len(matrix) - 1) if actions[i] is not None],
+            dtype=np.intp,
+        )
+        if not len(steps):
+            return self
+        packed = np.packbits(matrix, axis=1, bitorder="little")
+        keys = [actions[i].details() for i in steps]
+        _, first, groups = np.unique(keys, return_index=True, return_inverse=True)
+        # group the transitions of each action together
+        order = np.argsort(groups, kind="stable")
+        pre, post = packed[steps[order]], packed[steps[order] + 1]
+        added, deleted = Observer.get_deltas(pre, post)
+
+        starts = np.flatnonzero(np.r_[True, np.diff(groups[order]) != 0])
+        precond = np.bitwise_and.reduceat(pre, starts, axis=0)
+        add = np.bitwise_or.reduceat(added, starts, axis=0)
+        delete = np.bitwise_or.reduceat(deleted, starts, axis=0)
+        for g, step in enumerate(steps[first]):
+            self._update(
+                actions[step],
+                int.from_bytes(precond[g].tobytes(), "little"),
+                int.from_bytes(add[g].tobytes(), "little"),
+                int.from_bytes(delete[g].tobytes(), "little"),
+            )
+        return self
+
+    def _observe_rows(self, rows: List[np.ndarray], actions: List[Optional[Action]]):
+        """Observes the buffered steps of a trace."""
+        matrix = np.zeros((len(rows), len(self.fluents)), dtype=bool)
+        for i, row in enumerate(rows):
+            matrix[i, : len(row)] = row
+        self.observe_matrix(matrix, self.fluents, actions)
+
+    def observe_trace(self, obs_trace: Iterable[IdentityObservation]):
+        """Observes a trace, one step at a time.
+
+        Steps are buffered in chunks of `chunk_size`, which are summarised with
+        `observe_matrix`.
+
+        Args:
+            obs_trace (Iterable[IdentityObservation]):
+                The observations of the trace, in order. Can be a generator.
+
+        Raises:
+            IncompatibleObservationToken:
+                Raised if an observation is not an identity observation.
+        """
+        rows = []
+        actions = []
+        for obs in obs_trace:
+            if not isinstance(obs, IdentityObservation):
+                raise IncompatibleObservationToken(type(obs), Observer)
+            rows.append(self._state_row(obs.state))
+            actions.append(obs.action)
+            if len(rows) == self.chunk_size:
+                self._observe_rows(rows, actions)
+                # the last step is the pre-state of the next chunk's first transition
+                rows, actions = rows[-1:], actions[-1:]
+        if len(rows) > 1:
+            self._observe_rows(rows, actions)
+        return self
+
+    def observe_tracelist(self, obs_tracelist: Iterable[List[IdentityObservation]]):
+        """Observes every trace of a trace list.
+
+        Args:
+            obs_tracelist (Iterable[List[IdentityObservation]]):
+                The observed traces. Can be a generator.
+
+        Raises:
+            IncompatibleObservationToken:
+                Raised if the observations are not identity observations.
+        """
+        if (
+            isinstance(obs_tracelist, ObservedTraceList)
+            and obs_tracelist.type is not IdentityObservation
+        ):
+            raise IncompatibleObservationToken(obs_tracelist.type, Observer)
+        for obs_trace in obs_tracelist:
+            self.observe_trace(obs_trace)
+        return self
+
+    def _remap(self, mask: int, fluent_map: np.ndarray) -> int:
+        """Translates a bitmask of another observer's fluent IDs to this observer's."""
+        bits = np.zeros(len(self.fluents), dtype=bool)
+        bits[fluent_map[_from_mask(mask, len(fluent_map))]] = True
+        return _to_mask(bits)
+
+    def merge(self, other: "OnlineObserver"):
+        """Merges the summary of another observer into this one.
+
+        Args:
+            other (OnlineObserver):
+                The observer to merge, e.g. one built over another shard of the
+                observations. It is left unchanged.
+
+        Returns:
+            This observer.
+        """
+        fluent_map = np.array(
+            [self._fluent_id(f) for f in other.fluents], dtype=np.intp
+        )
+        for theirs in other.actions.values():
+            precond = self._remap(theirs.precond, fluent_map)
+            add = self._remap(theirs.add, fluent_map)
+            delete = self._remap(theirs.delete, fluent_map)
+            self._update(theirs.action, precond, add, delete)
+        return self
+
+    @staticmethod
+    def _fluent_names(mask: int, names: List[str]) -> Set[str]:
+        """Returns the names of the fluents in a bitmask."""
+        return {names[i] for i in np.flatnonzero(_from_mask(mask, len(names)))}
+
+    def to_model(self) -> Model:
+        """Creates the Model learned from the observations so far.
+
+        Returns:
+            The learned Model.
+        """
+        names = [str(f) for f in self.fluents]
+        fluents = {
+            LearnedFluent(f.name, [o.details() for o in f.objects])
+            for f in self.fluents
+        }
+        actions = set()
+        for summary in self.actions.values():
+            action = summary.action
+            model_action = LearnedAction(
+                action.name, action.obj_params, cost=action.cost
+            )
+            model_action.update_precond(self._fluent_names(summary.precond, names))
+            model_action.update_add(self._fluent_names(summary.add, names))
+            model_action.update_delete(self._fluent_names(summary.delete, names))
+            actions.add(model_action)
+        return Model(fluents, actions)
+
+
 class Observer:
     """Observer model extraction method.
 
@@ -45,59 +310,7 @@ class Observer:
         """
         if obs_tracelist.type is not IdentityObservation:
             raise IncompatibleObservationToken(obs_tracelist.type, Observer)
-        fluents = Observer._get_fluents(obs_tracelist)
-        actions = Observer._get_actions(obs_tracelist)
-        return Model(fluents, actions)
-
-    @staticmethod
-    def _get_fluents(obs_tracelist: ObservedTraceList):
-        """Retrieves the set of fluents in the observations."""
-        fluents = set()
-        obs_trace: List[IdentityObservation]
-        for obs_trace in obs_tracelist:
-            for obs in obs_trace:
-                # Update fluents with the fluents in this observation
-                fluents.update(
-                    LearnedFluent(f.name, [o.details() for o in f.objects])
-                    for f in obs.state.keys()
-                )
-        return fluents
-
-    @staticmethod
-    def _get_actions(obs_tracelist: ObservedTraceList):
-        """Retrieves and augments the set of actions in the observations."""
-        # Get the unique actions and the relevant traces
-        action_obs = defaultdict(list)
-        obs_trace: List[IdentityObservation]
-        for obs_trace in obs_tracelist:
-            for obs in obs_trace:
-                action = obs.action
-                if action:  # Final step has no action
-                    action_obs[action].append(obs_trace)
-
-        action_pre_states = defaultdict(set)
-        # Get transitions for each action
-        action_transitions = obs_tracelist.get_all_transitions()
-        for action, transitions in action_transitions.items():
-            # Create a LearnedAction for the current action
-            model_action = LearnedAction(
-                action.name, action.obj_params, cost=action.cost
-            )
-
-            for pre, post in transitions:
-                # Add all action pre-states to a set
-                action_pre_states[model_action].add(pre.state)
-                # Update the action's effects
-                delta = Observer.get_delta(pre.state, post.state)
-                model_action.update_add({str(f) for f in delta.added})
-                model_action.update_delete({str(f) for f in delta.deleted})
-
-        for action, pre_states in action_pre_states.items():
-            # Find the (positive) intersection of the pre-states
-            precond = set.intersection(*map(Observer._filter_positive, pre_states))
-            action.update_precond({str(f) for f in precond})
-
-        return {action for action in action_pre_states}
+        return OnlineObserver().observe_tracelist(obs_tracelist).to_model()
 
     @staticmethod
     def get_delta(pre: dict, post: dict):
@@ -115,20 +328,30 @@ class Observer:
             state and True in `other`. The deleted set contains the list of
             fluents that were True in this state and False in `other`.
         """
-        added = set()
-        deleted = set()
-        for f in pre:
-            if pre[f] and not post[f]:  # true pre, false post -> deleted
-                deleted.add(f)
-            elif not pre[f] and post[f]:  # false pre, true post -> added
-                added.add(f)
-        return DeltaObservation(added, deleted)
+        fluents = list(pre)
+        pre_bits = np.fromiter(pre.values(), dtype=bool, count=len(fluents))
+        post_bits = np.fromiter(
+            (post[f] for f in fluents), dtype=bool, count=len(fluents)
+        )
+        added, deleted = Observer.get_deltas(pre_bits, post_bits)
+        return DeltaObservation(
+            {fluents[i] for i in np.flatnonzero(added)},
+            {fluents[i] for i in np.flatnonzero(deleted)},
+        )
 
     @staticmethod
-    def _filter_positive(state):
-        """Returns the set of true fluents in a state."""
-        true_fluents = set()
-        for fluent, is_true in state.items():
-            if is_true:
-                true_fluents.add(fluent)
-        return true_fluents
+    def get_deltas(pre: np.ndarray, post: np.ndarray):
+        """Determines the delta-states between matching rows of two state matrices.
+
+        Args:
+            pre (np.ndarray):
+                The pre-states to compare, as a boolean or bit-packed matrix.
+            post (np.ndarray):
+                The post-states to compare, in the same format.
+
+        Returns:
+            The added and deleted matrices (in the same format). Added fluents
+            were False in the pre-state and True in the post-state, deleted
+            fluents were True in the pre-state and False in the post-state.
+        """
+        return post & ~pre, pre & ~post
@@ -0,0 +1,194 @@
+"""Writes models to PDDL directly as text, without building a tarski problem.
+
+The text follows the layout of tarski's FSTRIPS writer, so the files can be used
+interchangeably. Names are sanitised through a memoised table, which is shared by
+all the models written in the process, so exporting many variants of a model
+only sanitises each fluent and action once.
+"""
+
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Mapping, Tuple
+
+if TYPE_CHECKING:
+    from .model import Model
+
+
+DOMAIN_HEADER = ";;; Domain file automatically generated by macq\n\n"
+PROBLEM_HEADER = ";;; Instance file automatically generated by macq\n\n"
+
+
+@lru_cache(maxsize=2**16)
+def pddl_name(string: str) -> str:
+    """Sanitises a fluent or action string into a PDDL name.
+
+    Args:
+        string (str):
+            The string, e.g. "(on object a object b)".
+
+    Returns:
+        The PDDL name, e.g. "on_object_a_object_b".
+    """
+    return string.replace("(", "").replace(")", "").replace(" ", "_")
+
+
+def _action(name: str, parameters: str, precond: List[str], effects: List[str]):
+    """Returns the PDDL definition of an action."""
+    effects_text = "".join(f"\n        {e}" for e in effects)
+    return (
+        f"    (:action {name}\n"
+        f"     :parameters ({parameters})\n"
+        f"     :precondition (and {' '.join(precond)})\n"
+        f"     :effect (and{effects_text})\n"
+        "    )\n"
+    )
+
+
+def _grounded_domain(model: Model) -> Tuple[str, List[str], List[str]]:
+    """Returns the types, predicates and actions of a grounded model."""
+    predicates = {pddl_name(str(f)): None for f in model.fluents}
+    actions = []
+    for a in model.actions:
+        precond = sorted(f"({pddl_name(f)})" for f in a.precond)
+        effects = sorted(f"({pddl_name(f)})" for f in a.add)
+        effects += sorted(f"(not ({pddl_name(f)}))" for f in a.delete)
+        # fluents only referenced by the actions are declared as well
+        predicates.update(dict.fromkeys(map(pddl_name, a.precond | a.add | a.delete)))
+        actions.append(_action(pddl_name(a.details()), "", precond, effects))
+    return "", [f"({p})" for p in predicates], actions
+
+
+def _lifted_domain(model: Model) -> Tuple[str, List[str], List[str]]:
+    """Returns the types, predicates and actions of a lifted model."""
+    sorts: Dict[str, None] = {}
+    predicates = {}
+    for f in model.fluents:
+        sorts.update(dict.fromkeys(f.param_sorts))
+        params = " ".join(f"?x{i} - {s}" for i, s in enumerate(f.param_sorts))
+        predicates[f.name] = f"({f.name} {params})" if params else f"({f.name})"
+
+    def atom(f):
+        params = " ".join(f"?x{i}" for i in f.param_act_inds)
+        return f"({f.name} {params})" if params else f"({f.name})"
+
+    actions = []
+    for a in model.actions:
+        sorts.update(dict.fromkeys(a.param_sorts))
+        params = " ".join(f"?x{i} - {s}" for i, s in enumerate(a.param_sorts))
+        precond = sorted(map(atom, a.precond))
+        effects = sorted(map(atom, a.add))
+        effects += sorted(f"(not {atom(f)})" for f in a.delete)
+        actions.append(_action(a.name, params, precond, effects))
+    types = "".join(f"        {s} - object\n" for s in sorts)
+    return types, list(predicates.values()), actions
+
+
+def domain_pddl(model: Model, domain_name: str) -> str:
+    """Returns the PDDL domain of a model.
+
+    Args:
+        model (Model):
+            The model, with grounded or lifted actions.
+        domain_name (str):
+            The name of the domain.
+
+    Returns:
+        The text of the PDDL domain file.
+    """
+    lifted = model.is_lifted()
+    types, predicates, actions = (
+        _lifted_domain(model) if lifted else _grounded_domain(model)
+    )
+    predicates_text = "".join(f"        {p}\n" for p in predicates)
+    return (
+        DOMAIN_HEADER
+        + f"(define (domain {domain_name})\n"
+        + f"    (:requirements {':typing' if lifted else ''})\n"
+        + f"    (:types\n{types}        object\n    )\n\n"
+        + f"    (:predicates\n{predicates_text}    )\n\n"
+        + "\n".join(actions)
+        + ")\n"
+    )
+
+
+def problem_pddl(domain_name: str, problem_name: str) -> str:
+    """Returns an (empty) PDDL problem for a domain.
+
+    Args:
+        domain_name (str):
+            The name of the domain.
+        problem_name (str):
+            The name of the problem.
+
+    Returns:
+        The text of the PDDL problem file, with no objects, an empty initial state
+        and an empty goal.
+    """
+    return (
+        PROBLEM_HEADER
+        + f"(define (problem {problem_name})\n"
+        + f"    (:domain {domain_name})\n\n"
+        + "    (:objects\n    )\n\n"
+        + "    (:init\n    )\n\n"
+        + "    (:goal\n        (and )\n    )\n"
+        + ")\n"
+    )
+
+
+def write_pddl(
+    model: Model,
+    domain_name: str,
+    problem_name: str,
+    domain_filename: str,
+    problem_filename: str,
+):
+    """Writes a model to PDDL domain and problem files.
+
+    Args:
+        model (Model):
+            The model to write.
+        domain_name (str):
+            The name of the domain.
+        problem_name (str):
+            The name of the problem.
+        domain_filename (str):
+            The path of the domain file to write.
+        problem_filename (str):
+            The path of the problem file to write.
+    """
+    with open(domain_filename, "w") as fp:
+        fp.write(domain_pddl(model, domain_name))
+    with open(problem_filename, "w") as fp:
+        fp.write(problem_pddl(domain_name, problem_name))
+
+
+def write_models(
+    models: Mapping[str, Model], directory: str
+) -> Dict[str, Tuple[str, str]]:
+    """Writes many models to PDDL files in one directory.
+
+    Each model is written to "<name>.pddl" and "<name>_problem.pddl", where name
+    is its key in `models`, which is also used as the domain name.
+
+    Args:
+        models (Mapping[str, Model]):
+            The models to write, by name.
+        directory (str):
+            The directory to write the files to. Created if it does not exist.
+
+    Returns:
+        Dict[str, Tuple[str, str]]:
+            The paths of the domain and problem files of each model.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for name, model in models.items():
+        problem_name = name + "_problem"
+        paths[name] = (
+            os.path.join(directory, name + ".pddl"),
+            os.path.join(directory, problem_name + ".pddl"),
+        )
+        write_pddl(model, name, problem_name, *paths[name])
+    return paths
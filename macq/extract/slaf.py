@@ -2,9 +2,11 @@
 
 from typing import Set, Union
 from bauhaus import Encoding
-from nnf import And, Or, Var, config, false, true
+from nnf import And, Or, Var, false, true
 import macq.extract as extract
 from ..observation import AtomicPartialObservation, ObservedTraceList
+from ..utils.pysat import encode, get_encoding
+from ..utils.solvers import SATEngine, get_sat_solver
 from .exceptions import IncompatibleObservationToken
 from .learned_fluent import LearnedFluent
 from .model import Model
@@ -40,7 +42,13 @@ class SLAF:
     top = true
     bottom = false
 
-    def __new__(cls, o_list: ObservedTraceList, debug: bool = False, sample: bool = False):
+    def __new__(
+        cls,
+        o_list: ObservedTraceList,
+        debug: bool = False,
+        sample: bool = False,
+        solver: Union[str, SATEngine, None] = None,
+    ):
         """Creates a new Model object.
 
         Args:
@@ -52,6 +60,9 @@ class SLAF:
             sample (bool):
                 An optional mode that allows the user to sample the possible models instead of returning
                 one that includes only guaranteed entailed fluents.
+            solver (Union[str, SATEngine, None]):
+                Optional; The SAT engine (or the name of a pysat SAT solver) used to find the entailed
+                fluents. Defaults to CaDiCaL.
         Raises:
             IncompatibleObservationToken:
                 Raised if the observations are not identity observation.
@@ -63,7 +74,7 @@ class SLAF:
             raise Exception("The SLAF extraction technique only takes one trace.")
 
         SLAF.debug_mode = debug
-        entailed = SLAF.__as_strips_slaf(o_list, sample)
+        entailed = SLAF.__as_strips_slaf(o_list, sample, solver)
         # return the Model
         return SLAF.__sort_results(o_list, entailed)
 
@@ -218,7 +229,11 @@ class SLAF:
         return Model(model_fluents, set(learned_actions.values()))
 
     @staticmethod
-    def __as_strips_slaf(o_list: ObservedTraceList, sample: bool):
+    def __as_strips_slaf(
+        o_list: ObservedTraceList,
+        sample: bool,
+        solver: Union[str, SATEngine, None] = None,
+    ):
         """Implements the AS-STRIPS-SLAF algorithm from section 5.3 of the SLAF paper.
         Iterates through the action/observation pairs of each observation/trace, returning
         a fluent-factored transition belief formula that filters according to that action/observation.
@@ -233,6 +248,9 @@ class SLAF:
             sample (bool):
                 If true, an arbitrary solution will be produced rather than just the entailed literals.
 
+            solver (Union[str, SATEngine, None]):
+                The SAT engine used to solve the formula.
+
         Returns:
             The set of fluents that are entailed.
         """
@@ -474,22 +492,26 @@ class SLAF:
         cnf_formula = And(map(SLAF.__or_refactor, full_formula.children))
 
         entailed = set()
-        if sample:
-            with config(sat_backend="kissat"):
-                sol = cnf_formula.solve()
-                if sol:
+        # encode the formula once; each entailment check is an incremental call
+        var_ids, _ = get_encoding(cnf_formula)
+        clauses = encode(cnf_formula, var_ids)
+        with get_sat_solver(solver).new_solver(clauses) as sat_solver:
+            if sample:
+                if sat_solver.solve():
+                    true_ids = {lit for lit in sat_solver.get_model() if lit > 0}
                     for f in all_var:
-                        if sol[str(f)]:
+                        if (var_ids.get(f.name) in true_ids) == f.true:
+                            entailed.add(f)
+            elif not sat_solver.solve():
+                # everything is entailed by an inconsistent formula
+                entailed.update(all_var)
+            else:
+                # iterate through all fluents, gathering those that are entailed
+                for f in all_var:
+                    # fluents not in the formula are unconstrained
+                    if f.name in var_ids:
+                        lit = var_ids[f.name] if f.true else -var_ids[f.name]
+                        # if False, then f is entailed
+                        if not sat_solver.solve(assumptions=[-lit]):
                             entailed.add(f)
-        else:
-            children = set(cnf_formula.children)
-            # iterate through all fluents, gathering those that are entailed
-            for f in all_var:
-                children.add(Or([~f]))
-                check_theory = And(children)
-                # if False, then f is entailed
-                with config(sat_backend="kissat"):
-                    if not check_theory.solve():
-                        entailed.add(f)
-                children.discard(Or([~f]))
         return entailed
@@ -1,7 +1,11 @@
+from .planners import Planner, LocalPlanner, RemotePlanner, FastDownwardPlanner
+from .plan_cache import PlanCache
 from .generator import Generator
+from .batch_walk import BatchWalker
 from .vanilla_sampling import VanillaSampling
 from .trace_from_goal import TraceFromGoal
 from .random_goal_sampling import RandomGoalSampling
 from .fd_random_walk import FDRandomWalkSampling
+from .coverage_sampling import CoverageSampling, CoverageStats
 
-__all__ = ["Generator", "VanillaSampling", "TraceFromGoal", "RandomGoalSampling", "FDRandomWalkSampling"]
+__all__ = ["Generator", "Planner", "LocalPlanner", "RemotePlanner", "FastDownwardPlanner", "PlanCache", "BatchWalker", "VanillaSampling", "TraceFromGoal", "RandomGoalSampling", "FDRandomWalkSampling", "CoverageSampling", "CoverageStats"]
@@ -0,0 +1,253 @@
+"""Random walks advanced in lock-step over a batch of states.
+
+The grounded operators of a problem are compiled into boolean masks over its
+atoms, and the states of a batch of walks into a matrix (one row per walk, one
+column per atom). Each step tests the applicability of every operator in every
+state with two matrix products (counting the unmet positive and violated
+negative preconditions), picks an applicable operator uniformly at random for
+each walk, and applies the delete and add masks of the chosen operators to the
+whole batch at once. Only the walks that reach their length are converted into
+traces, so that most of the work happens in a few NumPy operations per step.
+"""
+
+import random
+from time import monotonic
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from tarski.syntax.builtins import BuiltinPredicateSymbol
+
+from ...trace import Action, Fluent, State, Step, Trace, TraceList
+from ...utils import TraceSearchTimeOut
+from .planners import _Task
+
+if TYPE_CHECKING:
+    from .generator import Generator
+
+
+def _atom_key(atom) -> Tuple[str, Tuple[str, ...]]:
+    """Returns the key of a tarski atom, matching `_fluent_key`."""
+    name = atom.predicate.name
+    if isinstance(name, BuiltinPredicateSymbol):
+        name = name.value
+    return name, tuple(t.name for t in atom.subterms)
+
+
+def _fluent_key(fluent) -> Tuple[str, Tuple[str, ...]]:
+    """Returns the key of a macq fluent, matching `_atom_key`."""
+    return fluent.name, tuple(o.name for o in fluent.objects)
+
+
+class BatchWalker:
+    """Samples random walks of a generator's problem in batches.
+
+    The walks start from the initial state, and pick each action uniformly at
+    random among the applicable ones, as `VanillaSampling` does. Walks that reach
+    a dead end before their length are discarded.
+
+    Example:
+        ```python
+        walker = BatchWalker(generator)
+        traces = walker.walk(num_traces=1000, plan_len=20)
+        ```
+
+    Attributes:
+        generator (Generator):
+            The generator of the problem walked.
+        batch_size (int):
+            The number of walks advanced together.
+    """
+
+    def __init__(self, generator: "Generator", batch_size: int = 1024):
+        """Compiles the generator's grounded operators.
+
+        Args:
+            generator (Generator):
+                The generator of the problem to walk.
+            batch_size (int):
+                Optional; The number of walks advanced together. Defaults to 1024.
+
+        Raises:
+            UnsupportedTask:
+                Raised if the operators are not STRIPS operators (with negative
+                preconditions).
+        """
+        if batch_size < 1:
+            raise ValueError("The batch size must be positive.")
+        self.generator = generator
+        self.batch_size = batch_size
+        self._task = task = _Task(generator.instance.operators)
+        num_atoms = len(task.atoms)
+
+        def masks(ints: List[int], dtype) -> np.ndarray:
+            mask = np.zeros((len(ints), num_atoms), dtype=dtype)
+            for row, bits in enumerate(ints):
+                while bits:
+                    low = bits & -bits
+                    mask[row, low.bit_length() - 1] = 1
+                    bits ^= low
+            return mask
+
+        # float masks, so applicability is tested with (BLAS) matrix products
+        self._pre = masks(task.pre, np.float32).T.copy()
+        self._neg = masks(task.neg, np.float32).T.copy()
+        self._add = masks(task.add, bool)
+        self._keep = ~masks(task.delete, bool)
+        self._actions: Dict[int, Action] = {}
+
+        # the atom column of each grounded fluent, or -1 for the fluents that no
+        # operator mentions (which keep their initial value)
+        columns = {_atom_key(a): i for i, a in enumerate(task.atom_objects)}
+        self._fluents = [f for f in generator.grounded_fluents if f is not None]
+        self._columns = np.array(
+            [columns.get(_fluent_key(f), -1) for f in self._fluents], dtype=np.int64
+        )
+
+    def _init(self) -> Tuple[np.ndarray, Dict[Fluent, bool]]:
+        """Returns the initial state row, and the values of the grounded fluents
+        in it."""
+        atoms = self.generator.problem.init.as_atoms()
+        init = np.zeros(len(self._task.atoms), dtype=bool)
+        ids = [self._task.atoms.get(str(a)) for a in atoms]
+        init[[i for i in ids if i is not None]] = True
+        true = {_atom_key(a) for a in atoms}
+        return init, {f: _fluent_key(f) in true for f in self._fluents}
+
+    def _action(self, op: int) -> Action:
+        """Returns a new macq action for an operator."""
+        action = self._actions.get(op)
+        if action is None:
+            action = self._actions[op] = self.generator.tarski_act_to_macq(
+                self._task.operators[op]
+            )
+        if action.precond is None:
+            return Action(action.name, action.obj_params.copy(), action.cost)
+        return Action(
+            action.name,
+            action.obj_params.copy(),
+            action.cost,
+            set(action.precond),
+            set(action.add),
+            set(action.delete),
+        )
+
+    def _batch(
+        self, lengths: np.ndarray, rng: np.random.Generator
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Advances a batch of walks in lock-step.
+
+        Args:
+            lengths (np.ndarray):
+                The number of states of each walk.
+            rng (np.random.Generator):
+                The random number generator choosing the actions.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]:
+                The states (steps x walks x atoms), the actions (steps x walks)
+                and whether each walk reached its length.
+        """
+        init, _ = self._init()
+        batch = len(lengths)
+        steps = int(lengths.max()) - 1
+        states = np.empty((steps + 1, batch, len(init)), dtype=bool)
+        actions = np.zeros((steps, batch), dtype=np.int64)
+        alive = np.ones(batch, dtype=bool)
+        states[0] = init
+        if not self._task.operators:
+            return states, actions, lengths <= 1
+        for t in range(steps):
+            x = states[t]
+            unmet = (~x).astype(np.float32) @ self._pre
+            violated = x.astype(np.float32) @ self._neg
+            applicable = (unmet == 0) & (violated == 0)
+            # a uniform choice among the applicable operators of each walk
+            scores = rng.random(applicable.shape, dtype=np.float32)
+            scores[~applicable] = -1
+            chosen = scores.argmax(axis=1)
+            stuck = ~applicable[np.arange(batch), chosen]
+            # walks stuck before their last state are dead ends
+            alive &= ~(stuck & (t < lengths - 1))
+            actions[t] = chosen
+            states[t + 1] = (x & self._keep[chosen]) | self._add[chosen]
+        return states, actions, alive
+
+    def _trace(
+        self,
+        states: np.ndarray,
+        actions: np.ndarray,
+        length: int,
+        init: Dict[Fluent, bool],
+    ) -> Trace:
+        """Converts the first states and actions of a walk into a trace."""
+        columns = self._columns
+        # only the fluents of some atom can change
+        mentioned = np.flatnonzero(columns >= 0)
+        fluents = [self._fluents[k] for k in mentioned.tolist()]
+        values = states[:length][:, columns[mentioned]]
+        # each state is a copy of the previous one with the changed fluents set,
+        # since copying a dict does not hash its keys again
+        fluent_values = init
+        steps = []
+        for j in range(length):
+            fluent_values = fluent_values.copy()
+            if j:
+                for k in np.flatnonzero(values[j] != values[j - 1]).tolist():
+                    fluent_values[fluents[k]] = bool(values[j, k])
+            action = self._action(int(actions[j])) if j < length - 1 else None
+            steps.append(Step(State(fluent_values), action, j + 1))
+        # set the fluents and actions of the trace directly, rather than
+        # updating them with the fluents of every state
+        trace = Trace()
+        trace.steps = steps
+        trace.fluents = set(fluent_values)
+        trace.actions = {step.action for step in steps[:-1]}
+        return trace
+
+    def walk(
+        self,
+        num_traces: int,
+        plan_len: Union[int, Callable[[], int]],
+        max_time: Optional[float] = None,
+    ) -> TraceList:
+        """Samples random walks from the initial state.
+
+        Args:
+            num_traces (int):
+                The number of traces to sample.
+            plan_len (Union[int, Callable[[], int]]):
+                The number of steps of each trace, or a function sampling it for
+                each trace. Lengths below 1 are taken as 1.
+            max_time (Optional[float]):
+                Optional; The maximum time allowed for a batch that yields no
+                trace (e.g. when most walks reach dead ends).
+
+        Raises:
+            TraceSearchTimeOut:
+                Raised if no trace was found for `max_time` seconds.
+
+        Returns:
+            The TraceList of the walks.
+        """
+        # seeded from `random`, so that seeding it makes the walks reproducible
+        rng = np.random.default_rng(random.getrandbits(64))
+        _, init = self._init()
+        traces = TraceList()
+        last = monotonic()
+        while len(traces) < num_traces:
+            batch = min(self.batch_size, num_traces - len(traces))
+            if callable(plan_len):
+                lengths = [plan_len() for _ in range(batch)]
+            else:
+                lengths = [plan_len] * batch
+            lengths = np.maximum(np.array(lengths, dtype=np.int64), 1)
+            states, actions, alive = self._batch(lengths, rng)
+            for i in np.flatnonzero(alive).tolist():
+                traces.append(
+                    self._trace(states[:, i], actions[:, i], int(lengths[i]), init)
+                )
+            if alive.any():
+                last = monotonic()
+            elif max_time is not None and monotonic() - last > max_time:
+                raise TraceSearchTimeOut(max_time)
+        return traces
@@ -0,0 +1,255 @@
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from . import Generator
+from .batch_walk import BatchWalker
+from .planners import Planner
+from .plan_cache import PlanCache
+from ...trace import Trace, TraceList
+from ...utils import (
+    InvalidTime,
+    PercentError,
+    TraceSearchTimeOut,
+    progress,
+    set_num_traces,
+    set_plan_length,
+    set_timer_throw_exc,
+)
+
+
+@dataclass
+class CoverageStats:
+    """The coverage of the state space reached by the traces of a sampler.
+
+    Attributes:
+        states (int):
+            The number of distinct states visited.
+        state_actions (int):
+            The number of distinct (state, action) pairs taken.
+        actions (int):
+            The number of distinct (ground) actions taken.
+        total_actions (int):
+            The number of ground actions of the problem.
+        steps (int):
+            The number of actions taken.
+    """
+
+    states: int = 0
+    state_actions: int = 0
+    actions: int = 0
+    total_actions: int = 0
+    steps: int = 0
+
+    @property
+    def action_coverage(self) -> float:
+        """The fraction of the ground actions that were taken."""
+        return self.actions / self.total_actions if self.total_actions else 1.0
+
+    @property
+    def novelty(self) -> float:
+        """The fraction of the steps that took a new (state, action) pair."""
+        return self.state_actions / self.steps if self.steps else 1.0
+
+
+class CoverageSampling(Generator):
+    """Coverage-Driven State Trace Sampler - inherits the base Generator class and its attributes.
+
+    A state trace generator that generates traces by random walks biased towards the unexplored parts of the
+    state space. It indexes the states visited and the (state, action) pairs taken by all its traces, stored
+    compactly as bitmasks of the atoms that hold. At each step, an action leading to an unvisited state is
+    taken if there is one; otherwise, actions are picked with probability inversely proportional to the number
+    of times they were taken in the state. Traces are generated until a target fraction of the ground actions
+    has been taken, so fewer, less redundant traces are needed to observe every action.
+
+    Attributes:
+        max_time (float):
+            The maximum time allowed for a trace to be generated.
+        plan_len (int):
+            The length of the traces to be generated.
+        num_traces (int):
+            The (maximum) number of traces to be generated.
+        target_coverage (Optional[float]):
+            The fraction of the ground actions to take before generation stops.
+        visited (Set[int]):
+            The states visited, as bitmasks of the atoms that hold.
+        counts (Dict[Tuple[int, int], int]):
+            The number of times each (state, action) pair was taken.
+        traces (TraceList):
+            The list of traces generated.
+    """
+
+    def __init__(
+        self,
+        dom: str = None,
+        prob: str = None,
+        problem_id: int = None,
+        observe_pres_effs: bool = False,
+        plan_len: int = 1,
+        num_traces: int = 0,
+        target_coverage: Optional[float] = None,
+        seed: int = None,
+        max_time: float = 30,
+        planner: Union[str, Planner, None] = None,
+        plan_cache: Union[bool, PlanCache] = True,
+        grounding_cache: Union[bool, str] = False,
+    ):
+        """
+        Initializes a coverage-driven state trace sampler using the plan length, number of traces,
+        target coverage, and the domain and problem.
+
+        Args:
+            dom (str):
+                The domain filename.
+            prob (str):
+                The problem filename.
+            problem_id (int):
+                The ID of the problem to access.
+            observe_pres_effs (bool):
+                Option to observe action preconditions and effects upon generation.
+            plan_len (int):
+                The length of each generated trace. Traces that reach a state with no applicable actions
+                end there. Defaults to 1.
+            num_traces (int):
+                The maximum number of traces to generate. Defaults to 0.
+            target_coverage (Optional[float]):
+                Optional; The fraction of the ground actions (between 0 and 1) to take before generation
+                stops. By default, `num_traces` traces are generated.
+            seed (int):
+                The seed for the random number generator.
+            max_time (float):
+                The maximum time allowed for a trace to be generated.
+            planner (Union[str, Planner, None]):
+                Optional; The planner used to generate plans (see `Generator`).
+            plan_cache (Union[bool, PlanCache]):
+                Optional; Whether to cache the plans found, or the `PlanCache` to use (see `Generator`).
+            grounding_cache (Union[bool, str]):
+                Optional; Whether to cache the grounding of the problem on disk, or the cache directory to use (see `Generator`).
+
+        Raises:
+            UnsupportedTask:
+                Raised if the problem is not a STRIPS problem (with negative preconditions).
+        """
+        super().__init__(
+            dom=dom,
+            prob=prob,
+            problem_id=problem_id,
+            observe_pres_effs=observe_pres_effs,
+            planner=planner,
+            plan_cache=plan_cache,
+            grounding_cache=grounding_cache,
+        )
+        if max_time <= 0:
+            raise InvalidTime()
+        if target_coverage is not None and not 0 <= target_coverage <= 1:
+            raise PercentError()
+        if seed:
+            random.seed(seed)
+        self.max_time = max_time
+        self.plan_len = set_plan_length(plan_len)
+        self.num_traces = set_num_traces(num_traces)
+        self.target_coverage = target_coverage
+        self.visited: Set[int] = set()
+        self.counts: Dict[Tuple[int, int], int] = {}
+        self._taken: Set[int] = set()
+        self._steps = 0
+        # the compiled operators, and the conversion of walks into traces
+        self._walker = BatchWalker(self, batch_size=1)
+        self._task = self._walker._task
+        if self.num_traces > 0:
+            self.traces = self.generate_traces()
+        else:
+            self.traces = None
+
+    @property
+    def coverage(self) -> CoverageStats:
+        """The `CoverageStats` of the traces generated so far."""
+        return CoverageStats(
+            states=len(self.visited),
+            state_actions=len(self.counts),
+            actions=len(self._taken),
+            total_actions=len(self._task.operators),
+            steps=self._steps,
+        )
+
+    def covered(self) -> bool:
+        """Returns whether the target coverage was reached."""
+        return (
+            self.target_coverage is not None
+            and self.coverage.action_coverage >= self.target_coverage
+        )
+
+    def generate_traces(self):
+        """Generates traces until the target coverage is reached, or `num_traces` traces were generated.
+
+        Returns:
+            A TraceList object with the list of traces generated.
+        """
+        traces = TraceList()
+        traces.generator = self.generate_single_trace_setup(num_seconds=self.max_time)
+        for _ in progress(range(self.num_traces)):
+            if self.covered():
+                break
+            traces.append(traces.generator())
+        self.traces = traces
+        return traces
+
+    def generate_single_trace_setup(self, num_seconds: float, plan_len: int = None):
+        @set_timer_throw_exc(
+            num_seconds=num_seconds, exception=TraceSearchTimeOut, max_time=num_seconds
+        )
+        def generate_single_trace(self=self, plan_len=plan_len):
+            """Generates a single trace by a random walk biased towards unvisited states and untaken
+            (state, action) pairs, and adds its states and actions to the index.
+
+            Returns:
+                A Trace object (the trace generated).
+            """
+            if not plan_len:
+                plan_len = self.plan_len
+            return self._walk(plan_len)
+
+        return generate_single_trace
+
+    def _choose(self, state: int, applicable: List[int]) -> int:
+        """Picks the action to take in a state."""
+        task = self._task
+        novel = [
+            op for op in applicable if task.progress(state, op) not in self.visited
+        ]
+        if novel:
+            return random.choice(novel)
+        weights = [1 / (1 + self.counts.get((state, op), 0)) for op in applicable]
+        return random.choices(applicable, weights)[0]
+
+    def _walk(self, plan_len: int) -> Trace:
+        task = self._task
+        state = task.state(self.problem.init.as_atoms())
+        states, actions = [state], []
+        self.visited.add(state)
+        while len(states) < plan_len:
+            applicable = task.applicable(state)
+            if not applicable:
+                break
+            op = self._choose(state, applicable)
+            self.counts[(state, op)] = self.counts.get((state, op), 0) + 1
+            self._taken.add(op)
+            self._steps += 1
+            state = task.progress(state, op)
+            self.visited.add(state)
+            states.append(state)
+            actions.append(op)
+
+        # unpack the bitmasks into the rows of a state matrix
+        num_atoms = len(task.atoms)
+        num_bytes = (num_atoms + 7) // 8
+        packed = np.frombuffer(
+            b"".join(s.to_bytes(num_bytes, "little") for s in states), dtype=np.uint8
+        ).reshape(len(states), num_bytes)
+        matrix = np.unpackbits(packed, axis=1, bitorder="little")[:, :num_atoms]
+        _, init = self._walker._init()
+        return self._walker._trace(
+            matrix.astype(bool), np.array(actions, dtype=np.int64), len(states), init
+        )
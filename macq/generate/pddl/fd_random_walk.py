@@ -1,5 +1,6 @@
 
 import random
+from typing import Optional, Union
 
 from . import VanillaSampling
 
@@ -37,6 +38,8 @@ class FDRandomWalkSampling(VanillaSampling):
         init_h: int = None,
         num_traces: int = 1,
         seed: int = None,
+        batch_size: Optional[int] = None,
+        grounding_cache: Union[bool, str] = False,
     ):
         """
         Initializes a the fd random walk sampler.
@@ -58,6 +61,11 @@ class FDRandomWalkSampling(VanillaSampling):
                 The number of traces to generate. Defaults to 1.
             seed (int):
                 The seed for the random number generator.
+            batch_size (Optional[int]):
+                Optional; The number of random walks to advance together (see `VanillaSampling`).
+                By default, traces are generated one at a time.
+            grounding_cache (Union[bool, str]):
+                Optional; Whether to cache the grounding of the problem on disk, or the cache directory to use (see `Generator`).
         """
 
         super().__init__(
@@ -68,6 +76,8 @@ class FDRandomWalkSampling(VanillaSampling):
             num_traces=num_traces,
             seed=seed,
             max_time=max_time,
+            batch_size=batch_size,
+            grounding_cache=grounding_cache,
         )
 
         if init_h is None:
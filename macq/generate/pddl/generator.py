@@ -1,35 +1,29 @@
-import re
-from time import sleep
-from typing import Set, List, Union
+import hashlib
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Set, List, Optional, Tuple, Union
 from tarski.io import PDDLReader
 from tarski.search import GroundForwardSearchModel
 from tarski.search.operations import progress
-from tarski.grounding.lp_grounding import (
-    ground_problem_schemas_into_plain_operators,
-    LPGroundingStrategy,
-)
 from tarski.syntax import land
 from tarski.syntax.ops import CompoundFormula, flatten
-from tarski.syntax.formulas import Atom, neg
+from tarski.syntax.formulas import Atom, Connective, neg
 from tarski.syntax.builtins import BuiltinPredicateSymbol
 from tarski.fstrips.action import PlainOperator
 from tarski.fstrips.fstrips import AddEffect
 from tarski.model import Model, create
 from tarski.io import fstrips as iofs
 
-import requests
-from .planning_domains_api import get_problem, get_plan
+from .planning_domains_api import fetch_problem
+from .grounding import ground
+from .planners import Planner, PlanningDomainsAPIError, get_planner
+from .plan_cache import PlanCache, default_plan_cache
 from ..plan import Plan
 from ...trace import Action, State, PlanningObject, Fluent, Trace, Step
 
 
-class PlanningDomainsAPIError(Exception):
-    """Raised when a valid response cannot be obtained from the planning.domains solver."""
-
-    def __init__(self, message):
-        super().__init__(message)
-
-
 class InvalidGoalFluent(Exception):
     """
     Raised when the user attempts to supply a new goal with invalid fluent(s).
@@ -50,8 +44,15 @@ class Generator:
     Attributes:
         pddl_dom (str):
             The name of the local PDDL domain filename (relevant if the problem ID is not provided.)
+            None if the initial state or goal were changed in memory, until the files are rendered
+            (see `pddl_files`).
         pddl_prob (str):
             The name of the local PDDL problem filename (relevant if the problem ID is not provided.)
+            None if the initial state or goal were changed in memory, until the files are rendered.
+        modified (bool):
+            Whether the initial state or goal were changed since the problem was loaded.
+        plan_cache (Optional[PlanCache]):
+            The cache of the plans found, or None if plans are not cached.
         problem_id (int):
             The ID of the problem to be accessed (relevant if local files are not provided.)
         problem (tarski.fstrips.problem.Problem):
@@ -66,6 +67,8 @@ class Generator:
             The problem's ground operators, formatted to a dictionary for easy access during plan generation.
         observe_pres_effs (bool):
             Option to observe action preconditions and effects upon generation.
+        planner (Planner):
+            The planner used to generate plans (see `macq.generate.pddl.planners`).
     """
 
     def __init__(
@@ -74,6 +77,9 @@ class Generator:
         prob: str = None,
         problem_id: int = None,
         observe_pres_effs: bool = False,
+        planner: Union[str, Planner, None] = None,
+        grounding_cache: Union[bool, str] = False,
+        plan_cache: Union[bool, PlanCache] = True,
     ):
         """Creates a basic PDDL state trace generator. Takes either the raw filenames
         of the domain and problem, or a problem ID.
@@ -87,28 +93,59 @@ class Generator:
                 The ID of the problem to access.
             observe_pres_effs (bool):
                 Option to observe action preconditions and effects upon generation.
+            planner (Union[str, Planner, None]):
+                Optional; The planner used to generate plans, or the name of one:
+                "local" (an in-process heuristic search), "remote" (the
+                planning.domains solver) or "fd" (a local Fast Downward install). By
+                default, the in-process search is used, falling back to the remote
+                solver for the problems it does not support (see `LocalPlanner`).
+            grounding_cache (Union[bool, str]):
+                Optional; Whether to cache the grounding of the problem on disk, or the
+                cache directory to use (True for the default cache directory; see
+                `macq.generate.pddl.grounding`). Defaults to False.
+            plan_cache (Union[bool, PlanCache]):
+                Optional; Whether to cache the plans found (see `macq.generate.pddl.plan_cache`), or the `PlanCache` to
+                use. Defaults to True, i.e. the in-memory cache shared by the generators of the process.
         """
         # get attributes
         self.pddl_dom = dom
         self.pddl_prob = prob
         self.problem_id = problem_id
         self.observe_pres_effs = observe_pres_effs
+        self.planner = get_planner(planner)
+        if plan_cache is True:
+            plan_cache = default_plan_cache
+        self.plan_cache = None if plan_cache is False else plan_cache
         # read the domain and problem
         reader = PDDLReader(raise_on_error=True)
         if not problem_id:
-            reader.parse_domain(dom)
-            self.problem = reader.parse_instance(prob)
+            with open(dom, "r") as f:
+                dom = f.read()
+            with open(prob, "r") as f:
+                prob = f.read()
         else:
-            dom = requests.get(get_problem(problem_id, formalism='classical')["domain_url"]).text
-            prob = requests.get(get_problem(problem_id, formalism='classical')["problem_url"]).text
-            reader.parse_domain_string(dom)
-            self.problem = reader.parse_instance_string(prob)
+            dom, prob = fetch_problem(problem_id, formalism='classical')
+        reader.parse_domain_string(dom)
+        self.problem = reader.parse_instance_string(prob)
+        self.modified = False
+        # the PDDL text of the current problem (None when it needs rendering), and the
+        # rendered domain, which does not change
+        self._pddl_text: Optional[Tuple[str, str]] = (dom, prob)
+        self._rendered_domain: Optional[str] = None
+        self._tmp_dir: Optional[str] = None
         self.lang = self.problem.language
-        # ground the problem
-        operators = ground_problem_schemas_into_plain_operators(self.problem)
+        # ground the problem (or load its cached grounding)
+        operators, state_variables = ground(self.problem, dom, prob, cache=grounding_cache)
         self.instance = GroundForwardSearchModel(self.problem, operators)
-        self.grounded_fluents = self.__get_all_grounded_fluents()
+        self.grounded_fluents = [self.__tarski_atom_to_macq_fluent(a) for a in state_variables]
         self.op_dict = self.__get_op_dict()
+        # the op_dict keys of the operators, by name
+        self.__op_keys = {o.name: key for key, o in self.op_dict.items()}
+        # plans are valid across problems with the same domain and objects
+        fingerprint = hashlib.sha256(dom.encode())
+        for c in sorted(f"{c.name} - {c.sort.name}" for c in self.lang.constants()):
+            fingerprint.update(b"\0" + c.encode())
+        self.__fingerprint = fingerprint.hexdigest()
 
     def extract_action_typing(self):
         """Retrieves a dictionary mapping all of this problem's actions and the types
@@ -168,21 +205,6 @@ class Generator:
                 op_dict["".join(["(", o.name.replace("(", " ").replace(",", "")])] = o
         return op_dict
 
-    def __get_all_grounded_fluents(self):
-        """Extracts all the grounded fluents in the problem.
-
-        Returns:
-            A list of all the grounded fluents in the problem, in the form of macq Fluents.
-        """
-        return [
-            self.__tarski_atom_to_macq_fluent(grounded_fluent.to_atom())
-            for grounded_fluent in LPGroundingStrategy(
-                self.problem, include_variable_inequalities=True
-            )
-            .ground_state_variables()
-            .objects
-        ]
-
     def __effect_split(self, act: PlainOperator):
         """Converts the effects of an action as defined by tarski to fluents as defined by macq.
 
@@ -297,19 +319,20 @@ class Generator:
     def change_init(
         self,
         init_fluents: Union[Set[Fluent], List[Fluent]],
-        new_domain: str = "new_domain.pddl",
-        new_prob: str = "new_prob.pddl",
+        new_domain: Optional[str] = None,
+        new_prob: Optional[str] = None,
     ):
-        """Changes the initial state of the `Generator`. The domain and problem PDDL files
-        are rewritten to accomodate the new goal for later use by a planner.
+        """Changes the initial state of the `Generator`. The change is made in memory; the
+        PDDL files are only rendered if a planner needs them (see `pddl_files`), unless new
+        file names are given.
 
         Args:
             init_fluents (Union[Set[Fluent], List[Fluent]]):
                 The collection of fluents that will make up the new initial state.
-            new_domain (str):
-                The name of the new domain file.
-            new_prob (str):
-                The name of the new problem file.
+            new_domain (Optional[str]):
+                Optional; The name of a domain file to write the problem to.
+            new_prob (Optional[str]):
+                Optional; The name of a problem file to write the problem to.
         """
         init = create(self.lang)
         for f in init_fluents:
@@ -320,29 +343,25 @@ class Generator:
             )
             init.add(atom.predicate, *atom.subterms)
         self.problem.init = init
-
-        # rewrite PDDL files appropriately
-        writer = iofs.FstripsWriter(self.problem)
-        writer.write(new_domain, new_prob)
-        self.pddl_dom = new_domain
-        self.pddl_prob = new_prob
+        self.__problem_changed(new_domain, new_prob)
 
     def change_goal(
         self,
         goal_fluents: Union[Set[Fluent], List[Fluent]],
-        new_domain: str = "new_domain.pddl",
-        new_prob: str = "new_prob.pddl",
+        new_domain: Optional[str] = None,
+        new_prob: Optional[str] = None,
     ):
-        """Changes the goal of the `Generator`. The domain and problem PDDL files
-        are rewritten to accomodate the new goal for later use by a planner.
+        """Changes the goal of the `Generator`. The change is made in memory; the PDDL
+        files are only rendered if a planner needs them (see `pddl_files`), unless new
+        file names are given.
 
         Args:
             goal_fluents (Union[Set[Fluent], List[Fluent]]):
                 The collection of fluents that will make up the new goal.
-            new_domain (str):
-                The name of the new domain file.
-            new_prob (str):
-                The name of the new problem file.
+            new_domain (Optional[str]):
+                Optional; The name of a domain file to write the problem to.
+            new_prob (Optional[str]):
+                Optional; The name of a problem file to write the problem to.
 
         Raises:
             InvalidGoalFluent:
@@ -369,17 +388,115 @@ class Generator:
             )
         # reset the goal
         self.problem.goal = flatten(goal)
+        self.__problem_changed(new_domain, new_prob)
+
+    def __problem_changed(self, new_domain: Optional[str], new_prob: Optional[str]):
+        """Invalidates the PDDL text and files of the problem after a change, writing the
+        files if names are given."""
+        self.modified = True
+        self._pddl_text = None
+        self.pddl_dom = None
+        self.pddl_prob = None
+        if new_domain is not None and new_prob is not None:
+            self.__write_pddl(new_domain, new_prob)
+
+    def __write_pddl(self, domain_filename: str, problem_filename: str):
+        dom, prob = self.pddl_text()
+        with open(domain_filename, "w") as f:
+            f.write(dom)
+        with open(problem_filename, "w") as f:
+            f.write(prob)
+        self.pddl_dom = domain_filename
+        self.pddl_prob = problem_filename
+
+    def pddl_text(self) -> Tuple[str, str]:
+        """Returns the PDDL text of the domain and (current) problem, rendering the problem
+        if it was changed.
 
-        # rewrite PDDL files appropriately
-        writer = iofs.FstripsWriter(self.problem)
-        writer.write(new_domain, new_prob)
-        self.pddl_dom = new_domain
-        self.pddl_prob = new_prob
+        Returns:
+            Tuple[str, str]:
+                The text of the domain and problem.
+        """
+        if self._pddl_text is None:
+            writer = iofs.FstripsWriter(self.problem)
+            if self._rendered_domain is None:
+                self._rendered_domain = writer.print_domain()
+            self._pddl_text = (self._rendered_domain, writer.print_instance())
+        return self._pddl_text
+
+    def pddl_files(self) -> Tuple[str, str]:
+        """Returns the paths of PDDL files holding the domain and (current) problem. If the
+        problem was changed (or loaded from a problem ID), the files are written to a
+        temporary directory of this generator, which is removed with it.
+
+        Returns:
+            Tuple[str, str]:
+                The paths of the domain and problem files.
+        """
+        if self.pddl_dom is None or self.pddl_prob is None:
+            if self._tmp_dir is None:
+                self._tmp_dir = tempfile.mkdtemp(prefix="macq-")
+                weakref.finalize(self, shutil.rmtree, self._tmp_dir, ignore_errors=True)
+            self.__write_pddl(
+                os.path.join(self._tmp_dir, "domain.pddl"),
+                os.path.join(self._tmp_dir, "problem.pddl"),
+            )
+        return self.pddl_dom, self.pddl_prob
+
+    def plan_key(self) -> str:
+        """Returns the key of the current problem in the plan cache: a hash of the (grounded) initial state, the goal,
+        the fingerprint of the domain and objects, and the planner and its configuration (see `Planner.cache_key`).
+
+        Returns:
+            The hex digest identifying the problem.
+        """
+        key = hashlib.sha256(self.__fingerprint.encode())
+        key.update(b"\2" + self.planner.cache_key().encode())
+        for atom in sorted(str(a) for a in self.problem.init.as_atoms()):
+            key.update(b"\0" + atom.encode())
+        goal = self.problem.goal
+        if isinstance(goal, CompoundFormula) and goal.connective == Connective.And:
+            conjuncts = sorted(str(f) for f in goal.subformulas)
+        else:
+            conjuncts = [str(goal)]
+        key.update(b"\1")
+        for conjunct in conjuncts:
+            key.update(b"\0" + conjunct.encode())
+        return key.hexdigest()
+
+    def cached_plan(self, key: str) -> Optional[Plan]:
+        """Returns the cached plan of a problem.
+
+        Args:
+            key (str):
+                The key of the problem (see `plan_key`).
+
+        Returns:
+            The cached `Plan`, or None if there is none (or the generator has no plan cache).
+        """
+        if self.plan_cache is None:
+            return None
+        actions = self.plan_cache.get(key)
+        if actions is None or not all(a in self.op_dict for a in actions):
+            return None
+        return Plan([self.op_dict[a] for a in actions])
+
+    def cache_plan(self, key: str, plan: Plan):
+        """Stores the plan of a problem in the plan cache (if the generator has one).
+
+        Args:
+            key (str):
+                The key of the problem (see `plan_key`).
+            plan (Plan):
+                The plan found for the problem.
+        """
+        if self.plan_cache is not None:
+            self.plan_cache.put(key, [self.__op_keys[o.name] for o in plan.actions])
 
     def generate_plan(self, from_ipc_file: bool = False, filename: str = None):
-        """Generates a plan. If reading from an IPC file, the `Plan` is read directly. Otherwise, if the initial state or
-        goal was changed, these changes are taken into account through the updated PDDL files. If no changes were made, the
-        default nitial state/goal in the initial problem file is used.
+        """Generates a plan. If reading from an IPC file, the `Plan` is read directly. Otherwise, the generator's planner
+        finds a plan from the current initial state to the current goal (taking any changes to them into account). Plans are
+        looked up in (and added to) the generator's plan cache.
 
         Args:
             from_ipc_file (bool):
@@ -387,50 +504,22 @@ class Generator:
             filename (str):
                 The name of the file to read the plan from.
 
+        Raises:
+            NoPlanFound:
+                Raised if the planner cannot find a plan.
+
         Returns:
             A `Plan` object that holds all the actions taken.
         """
         if not from_ipc_file:
-            # if the files are only being generated from the problem ID and are unaltered, retrieve the existing plan (note that
-            # if any changes were made, the local files would be used as the PDDL files are rewritten when changes are made).
-            if self.problem_id and not self.pddl_dom and not self.pddl_prob:
-                plan = get_plan(self.problem_id, formalism='classical')
-            # if you are not just using the unaltered files, use the local files instead
-            else:
-                data = {
-                    "domain": open(self.pddl_dom, "r").read(),
-                    "problem": open(self.pddl_prob, "r").read(),
-                }
-
-                headers = {"persistent": "true"}
-
-                def get_api_response(delays: List[int]):
-                    if delays:
-                        sleep(delays[0])
-                        try:
-                            service_url = "https://solver.planning.domains:5001/package/lama-first/solve"
-                            solve_request = requests.post(service_url, json=data, headers=headers).json()
-                            celery_result = requests.get("https://solver.planning.domains:5001/" +
-                                                         solve_request['result'])
-                            while celery_result.json().get("status", "") == 'PENDING':
-                                sleep(delays[0])
-                                celery_result = requests.get("https://solver.planning.domains:5001/" +
-                                                             solve_request['result'])
-                            sas_plan = celery_result.json()['result']['output']['sas_plan']
-                            actions_with_objects = re.findall(r'\((.*?)\)', sas_plan)
-
-                            plan_list = [f'({action})' for action in actions_with_objects]
-                            return plan_list
-
-                        except TypeError:
-                            return get_api_response(delays[1:])
-
-                plan = get_api_response([0, 1, 3, 5, 10])
-                if plan is None:
-                    raise PlanningDomainsAPIError(
-                        "Could not get a valid response from the planning.domains solver after 5 attempts.",
-                    )
-
+            if self.plan_cache is None:
+                return self.planner.plan(self)
+            key = self.plan_key()
+            plan = self.cached_plan(key)
+            if plan is None:
+                plan = self.planner.plan(self)
+                self.cache_plan(key, plan)
+            return plan
         else:
             f = open(filename, "r")
             plan = list(filter(lambda x: ";" not in x, f.read().splitlines()))
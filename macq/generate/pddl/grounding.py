@@ -0,0 +1,208 @@
+"""Grounds PDDL problems, caching the groundings on disk.
+
+A single logic-program grounding pass yields both the reachable ground operators
+and the state variables (fluents) of a problem. Since running the grounder is by
+far the slowest part of creating a `Generator`, the groundings (the parameter
+bindings of each action schema and fluent symbol) are cached in a directory,
+under a hash of the domain and problem text and the macq version. The operators
+and fluents are rebuilt from the bindings, as they are bound to the language of
+the parsed problem.
+
+The default cache directory is "~/.cache/macq/grounding", or
+"$MACQ_CACHE_DIR/grounding" if the `MACQ_CACHE_DIR` environment variable is set.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple, Union
+
+from tarski.fstrips.action import Action, PlainOperator
+from tarski.fstrips.fstrips import AddEffect, DelEffect
+from tarski.fstrips.problem import Problem
+from tarski.grounding.common import StateVariableLite
+from tarski.grounding.lp_grounding import LPGroundingStrategy
+from tarski.syntax.formulas import Atom, CompoundFormula, Contradiction, Tautology
+from tarski.syntax.terms import Constant, Variable
+from tarski.syntax.transform.action_grounding import (
+    ground_schema_into_plain_operator_from_grounding,
+)
+
+try:
+    from importlib.metadata import PackageNotFoundError, version
+
+    MACQ_VERSION = version("macq")
+except PackageNotFoundError:
+    MACQ_VERSION = "unknown"
+
+# the version of the cached groundings: bump it whenever `_solve` or `_instantiate`
+# change, since the macq version does not change in development installs
+CACHE_FORMAT = 1
+
+# the bindings of each action schema or fluent symbol, by name
+Bindings = Dict[str, List[List[str]]]
+
+
+def default_cache_dir() -> str:
+    """Returns the default grounding cache directory."""
+    base = os.environ.get("MACQ_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "macq"
+    )
+    return os.path.join(base, "grounding")
+
+
+def grounding_key(domain: str, problem: str) -> str:
+    """Returns the cache key of a problem.
+
+    Args:
+        domain (str):
+            The text of the PDDL domain.
+        problem (str):
+            The text of the PDDL problem.
+
+    Returns:
+        The hex digest identifying the problem's grounding.
+    """
+    digest = hashlib.sha256()
+    for part in (str(CACHE_FORMAT), MACQ_VERSION, domain, problem):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _solve(problem: Problem) -> Tuple[Bindings, Bindings]:
+    """Runs the grounder once, returning the action and fluent bindings."""
+    grounding = LPGroundingStrategy(problem, include_variable_inequalities=True)
+    actions = {
+        name: [list(b) for b in bindings]
+        for name, bindings in grounding.ground_actions().items()
+    }
+    fluents: Bindings = {}
+    for variable in grounding.ground_state_variables().objects:
+        fluents.setdefault(variable.symbol.name, []).append(
+            [c.name for c in variable.binding]
+        )
+    return actions, fluents
+
+
+def _load(path: str) -> Optional[Tuple[Bindings, Bindings]]:
+    try:
+        with open(path) as fp:
+            data = json.load(fp)
+        return data["actions"], data["fluents"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _store(path: str, actions: Bindings, fluents: Bindings):
+    """Writes a cache entry atomically, ignoring unwritable cache directories."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as fp:
+            json.dump({"actions": actions, "fluents": fluents}, fp)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+class _Unsupported(Exception):
+    """Raised by `_substitute` for expressions it cannot substitute into."""
+
+
+def _substitute(expr, binding: Dict[str, Constant]):
+    """Substitutes constants for the variables of a STRIPS formula or effect.
+
+    Much faster than tarski's generic (deep copying) substitution, which is used
+    for anything else (e.g. function terms or quantifiers).
+    """
+    if isinstance(expr, Atom):
+        terms = []
+        for t in expr.subterms:
+            if isinstance(t, Variable):
+                t = binding[t.symbol]
+            elif not isinstance(t, Constant):
+                raise _Unsupported()
+            terms.append(t)
+        return Atom(expr.predicate, tuple(terms))
+    if isinstance(expr, CompoundFormula):
+        return CompoundFormula(
+            expr.connective, tuple(_substitute(f, binding) for f in expr.subformulas)
+        )
+    if isinstance(expr, (Tautology, Contradiction)):
+        return expr
+    if type(expr) in (AddEffect, DelEffect):
+        return type(expr)(
+            _substitute(expr.atom, binding), _substitute(expr.condition, binding)
+        )
+    raise _Unsupported()
+
+
+def _instantiate(action: Action, grounding: List[str]) -> PlainOperator:
+    """Grounds an action schema into a `PlainOperator`, as tarski's
+    `ground_schema_into_plain_operator_from_grounding` does."""
+    lang = action.language
+    constants = [lang.get_constant(c) for c in grounding]
+    binding = {
+        v.symbol: c for v, c in zip(action.parameters.variables.values(), constants)
+    }
+    try:
+        precondition = _substitute(action.precondition, binding)
+        effects = [_substitute(e, binding) for e in action.effects]
+    except _Unsupported:
+        return ground_schema_into_plain_operator_from_grounding(
+            action, tuple(grounding)
+        )
+    name = f"{action.name}({', '.join(c.name for c in constants)})"
+    return PlainOperator(lang, name, precondition, effects)
+
+
+def ground(
+    problem: Problem,
+    domain: str,
+    problem_text: str,
+    cache: Union[bool, str] = False,
+) -> Tuple[List[PlainOperator], list]:
+    """Grounds a problem, using the cached grounding if there is one.
+
+    Args:
+        problem (Problem):
+            The parsed problem.
+        domain (str):
+            The text of the PDDL domain the problem was parsed from.
+        problem_text (str):
+            The text of the PDDL problem the problem was parsed from.
+        cache (Union[bool, str]):
+            Optional; Whether to use the cache, or the cache directory to use
+            (True for `default_cache_dir()`). Defaults to False.
+
+    Returns:
+        Tuple[List[PlainOperator], list]:
+            The reachable ground operators, and the atoms (or terms, for
+            functions) of the state variables of the problem.
+    """
+    path = None
+    cached = None
+    if cache:
+        cache_dir = default_cache_dir() if cache is True else cache
+        path = os.path.join(cache_dir, grounding_key(domain, problem_text) + ".json")
+        cached = _load(path)
+    if cached is None:
+        cached = _solve(problem)
+        if path is not None:
+            _store(path, *cached)
+    actions, fluents = cached
+
+    operators = [
+        _instantiate(problem.get_action(name), binding)
+        for name, bindings in actions.items()
+        for binding in bindings
+    ]
+    lang = problem.language
+    atoms = [
+        StateVariableLite(lang.get(name), tuple(lang.get(c) for c in binding)).to_atom()
+        for name, bindings in fluents.items()
+        for binding in bindings
+    ]
+    return operators, atoms
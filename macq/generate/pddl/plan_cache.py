@@ -0,0 +1,167 @@
+"""A cache of the plans found for the problems of generators.
+
+Plans are keyed by a canonical hash of the grounded initial state, the goal, a
+fingerprint of the domain and objects, and the planner and its configuration
+(see `Generator.plan_key`), so the same problem reached by different generators
+with the same planner, or again by the same one, is only planned for once. Plans
+are stored as their actions (e.g. "(stack a b)"), which are valid for every
+generator with the same fingerprint.
+
+Each cache holds recent plans in memory (least recently used first out) and can
+also store them in a directory, so they persist across runs.
+"""
+
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import List, Optional
+
+
+@dataclass
+class PlanCacheStats:
+    """The statistics of a plan cache.
+
+    Attributes:
+        hits (int):
+            The number of lookups answered from memory.
+        disk_hits (int):
+            The number of lookups answered from the cache directory.
+        misses (int):
+            The number of lookups that found no plan.
+        size (int):
+            The number of plans held in memory.
+    """
+
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of lookups that found a plan."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else 0.0
+
+
+class PlanCache:
+    """A plan cache, with an in-memory LRU and an optional on-disk store.
+
+    Example:
+        ```python
+        cache = PlanCache(path="plans")
+        sampler = RandomGoalSampling(..., plan_cache=cache)
+        print(cache.stats)
+        ```
+    """
+
+    def __init__(self, maxsize: Optional[int] = 1024, path: Optional[str] = None):
+        """Initializes the cache.
+
+        Args:
+            maxsize (Optional[int]):
+                Optional; The maximum number of plans held in memory (None for no
+                limit). Defaults to 1024.
+            path (Optional[str]):
+                Optional; The directory to store plans in. Created if it does not
+                exist.
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self._plans: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = Lock()
+        self._stats = PlanCacheStats()
+
+    def __len__(self):
+        return len(self._plans)
+
+    def __contains__(self, key: str):
+        return key in self._plans or (
+            self.path is not None and os.path.exists(self._file(key))
+        )
+
+    @property
+    def stats(self) -> PlanCacheStats:
+        """The `PlanCacheStats` of the cache."""
+        with self._lock:
+            return PlanCacheStats(
+                self._stats.hits,
+                self._stats.disk_hits,
+                self._stats.misses,
+                len(self._plans),
+            )
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key + ".json")
+
+    def _remember(self, key: str, actions: List[str]):
+        self._plans[key] = actions
+        self._plans.move_to_end(key)
+        if self.maxsize is not None and len(self._plans) > self.maxsize:
+            self._plans.popitem(last=False)
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Looks up a plan.
+
+        Args:
+            key (str):
+                The key of the problem.
+
+        Returns:
+            The actions of the plan, or None if there is no plan for the problem.
+        """
+        with self._lock:
+            actions = self._plans.get(key)
+            if actions is not None:
+                self._plans.move_to_end(key)
+                self._stats.hits += 1
+                return actions
+        if self.path is not None:
+            try:
+                with open(self._file(key)) as fp:
+                    actions = json.load(fp)
+            except (OSError, ValueError):
+                actions = None
+        with self._lock:
+            if actions is None:
+                self._stats.misses += 1
+            else:
+                self._stats.disk_hits += 1
+                self._remember(key, actions)
+        return actions
+
+    def put(self, key: str, actions: List[str]):
+        """Stores a plan.
+
+        Args:
+            key (str):
+                The key of the problem.
+            actions (List[str]):
+                The actions of the plan.
+        """
+        actions = list(actions)
+        with self._lock:
+            self._remember(key, actions)
+        if self.path is not None:
+            try:
+                os.makedirs(self.path, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+                with os.fdopen(fd, "w") as fp:
+                    json.dump(actions, fp)
+                os.replace(tmp, self._file(key))
+            except OSError:
+                pass
+
+    def clear(self):
+        """Removes the plans held in memory, and resets the statistics. Plans in the
+        cache directory are kept."""
+        with self._lock:
+            self._plans.clear()
+            self._stats = PlanCacheStats()
+
+
+# the cache shared by the generators of a process, by default
+default_plan_cache = PlanCache()
@@ -0,0 +1,894 @@
+"""Planners used by the generators to find plans for their problems.
+
+A planner takes a `Generator` (its grounded operators, initial state and goal)
+and returns a `Plan`. The built-in `LocalPlanner` searches the grounded task in
+process, so no network access is needed (the default planner falls back to the
+remote solver for the problems it does not support); `RemotePlanner` uses the
+planning.domains solver, and `FastDownwardPlanner` a local Fast Downward install.
+
+To plan for many problems concurrently, a planner's `pool` captures each problem
+of a generator as it is submitted and plans for it in the background: in worker
+processes for the local planner, with an asyncio client for the remote solver,
+and in threads for Fast Downward.
+"""
+
+import asyncio
+import heapq
+import os
+import re
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import count
+from multiprocessing import get_all_start_methods, get_context
+from time import sleep
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+from weakref import WeakKeyDictionary
+
+from tarski.fstrips.action import PlainOperator
+from tarski.fstrips.fstrips import AddEffect, DelEffect
+from tarski.syntax.builtins import BuiltinPredicateSymbol
+from tarski.syntax.formulas import (
+    Atom,
+    CompoundFormula,
+    Connective,
+    Formula,
+    Tautology,
+)
+
+from ..plan import Plan
+from .planning_domains_api import PlanningDomainsAPIError, get_plan, session
+
+if TYPE_CHECKING:
+    from .generator import Generator
+
+
+class NoPlanFound(Exception):
+    """Raised when a planner cannot find a plan for the problem."""
+
+    def __init__(self, message=None):
+        if message is None:
+            message = "No plan could be found for the problem."
+        super().__init__(message)
+
+
+class UnsupportedTask(Exception):
+    """Raised when a problem uses features the local planner does not support."""
+
+    def __init__(self, feature, message=None):
+        if message is None:
+            message = f"The local planner does not support {feature}. Use another planner (e.g. planner='remote')."
+        super().__init__(message)
+
+
+class Planner:
+    """Base class of the planners."""
+
+    def plan(self, generator: "Generator") -> Plan:
+        """Finds a plan from the generator's initial state to its goal.
+
+        Args:
+            generator (Generator):
+                The generator holding the problem.
+
+        Raises:
+            NoPlanFound:
+                Raised if no plan could be found.
+
+        Returns:
+            The `Plan`.
+        """
+        raise NotImplementedError
+
+    def pool(self, generator: "Generator", workers: int = 1) -> "PlannerPool":
+        """Returns a pool planning for the problems of a generator concurrently.
+
+        Args:
+            generator (Generator):
+                The generator holding the problems.
+            workers (int):
+                Optional; The maximum number of problems planned for at once.
+
+        Returns:
+            The `PlannerPool`. The base implementation plans for each problem as
+            it is submitted.
+        """
+        return PlannerPool(self, generator)
+
+    def cache_key(self) -> str:
+        """Returns a string identifying the planner and its configuration, so that
+        plan caches do not return the plans of one planner for another (see
+        `Generator.plan_key`).
+
+        Returns:
+            The class of the planner and its public attributes.
+        """
+        config = sorted(
+            (k, v.cache_key() if isinstance(v, Planner) else repr(v))
+            for k, v in vars(self).items()
+            if not k.startswith("_")
+        )
+        return f"{type(self).__module__}.{type(self).__qualname__}{config}"
+
+    @staticmethod
+    def _to_plan(generator: "Generator", actions: List[str]) -> Plan:
+        """Converts the actions of a plan (e.g. "(stack a b)") to a `Plan`."""
+        return Plan([generator.op_dict[a] for a in actions if a in generator.op_dict])
+
+
+def _then(future: Future, function: Callable) -> Future:
+    """Returns a future of the result of a function applied to the result of a
+    future. Cancelling the returned future cancels the original one."""
+    chained = Future()
+
+    def done(f: Future):
+        if chained.done():
+            return
+        if f.cancelled():
+            chained.cancel()
+        elif f.exception() is not None:
+            chained.set_exception(f.exception())
+        else:
+            try:
+                chained.set_result(function(f.result()))
+            except Exception as e:
+                chained.set_exception(e)
+
+    chained.add_done_callback(lambda f: f.cancelled() and future.cancel())
+    future.add_done_callback(done)
+    return chained
+
+
+def _track(future: Future, futures: Set[Future]) -> Future:
+    """Adds a future to a set of pending futures, until it is done."""
+    futures.add(future)
+    future.add_done_callback(futures.discard)
+    return future
+
+
+def _cancel(futures: Set[Future]):
+    """Cancels pending futures (like `Executor.shutdown(cancel_futures=True)`, which
+    needs Python 3.9)."""
+    for future in list(futures):
+        future.cancel()
+
+
+class PlannerPool:
+    """Plans for the problems of a generator concurrently.
+
+    The generator's current problem (initial state and goal) is captured when it
+    is submitted, so the generator can be changed while the plan is searched for.
+
+    Example:
+        ```python
+        with generator.planner.pool(generator, workers=4) as pool:
+            futures = []
+            for goal in goals:
+                generator.change_goal(goal)
+                futures.append(pool.submit())
+            plans = [f.result() for f in futures]
+        ```
+    """
+
+    def __init__(self, planner: Planner, generator: "Generator"):
+        self.planner = planner
+        self.generator = generator
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self) -> Future:
+        """Submits the generator's current problem. If the generator has a plan cache,
+        cached plans are returned directly, and the plans found are cached.
+
+        Returns:
+            A future of the `Plan`, raising `NoPlanFound` if there is none.
+        """
+        generator = self.generator
+        if generator.plan_cache is None:
+            return self._submit()
+        key = generator.plan_key()
+        plan = generator.cached_plan(key)
+        if plan is not None:
+            future = Future()
+            future.set_result(plan)
+            return future
+
+        def cache(future: Future):
+            if not future.cancelled() and future.exception() is None:
+                generator.cache_plan(key, future.result())
+
+        future = self._submit()
+        future.add_done_callback(cache)
+        return future
+
+    def _submit(self) -> Future:
+        """Submits the generator's current problem to be planned for."""
+        future = Future()
+        try:
+            future.set_result(self.planner.plan(self.generator))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def close(self):
+        """Stops the pool, cancelling the problems not yet planned for."""
+
+
+def _conjuncts(formula: Formula) -> List[Formula]:
+    """Returns the conjuncts of a (conjunctive) formula."""
+    if isinstance(formula, Tautology):
+        return []
+    if isinstance(formula, CompoundFormula) and formula.connective == Connective.And:
+        return [c for sub in formula.subformulas for c in _conjuncts(sub)]
+    return [formula]
+
+
+class _Task:
+    """A grounded STRIPS task, with states as bitmasks of the atoms that hold."""
+
+    def __init__(self, operators: Sequence[PlainOperator]):
+        self.atoms: Dict[str, int] = {}
+        self.atom_objects: List[Atom] = []
+        # the operators each atom is a precondition of
+        self.pre_of: List[List[int]] = []
+        self.operators: List[PlainOperator] = []
+        # the positive preconditions (as atom ids and as a mask), negative
+        # precondition mask, add mask and delete mask of each operator
+        self.pre_ids: List[List[int]] = []
+        self.pre: List[int] = []
+        self.neg: List[int] = []
+        self.add_ids: List[List[int]] = []
+        self.add: List[int] = []
+        self.delete: List[int] = []
+        for op in operators:
+            compiled = self._compile(op)
+            if compiled is None:
+                # statically inapplicable
+                continue
+            pre_ids, neg = compiled
+            add_ids, delete = [], 0
+            for effect in op.effects:
+                if not isinstance(effect.condition, Tautology):
+                    raise UnsupportedTask("conditional effects")
+                if isinstance(effect, AddEffect):
+                    add_ids.append(self.atom(effect.atom))
+                elif isinstance(effect, DelEffect):
+                    delete |= 1 << self.atom(effect.atom)
+                else:
+                    raise UnsupportedTask("functional effects")
+            self.operators.append(op)
+            self.pre_ids.append(pre_ids)
+            self.pre.append(self._mask(pre_ids))
+            self.neg.append(neg)
+            self.add_ids.append(add_ids)
+            self.add.append(self._mask(add_ids))
+            self.delete.append(delete)
+            for a in pre_ids:
+                self.pre_of[a].append(len(self.operators) - 1)
+
+    def atom(self, atom: Atom) -> int:
+        """Returns the id of an atom, adding it if it is new."""
+        key = str(atom)
+        if key not in self.atoms:
+            self.atoms[key] = len(self.atoms)
+            self.atom_objects.append(atom)
+            self.pre_of.append([])
+        return self.atoms[key]
+
+    @staticmethod
+    def _mask(ids: List[int]) -> int:
+        mask = 0
+        for a in ids:
+            mask |= 1 << a
+        return mask
+
+    def _compile(self, op: PlainOperator) -> Optional[Tuple[List[int], int]]:
+        """Returns the positive precondition ids and negative precondition mask of
+        an operator, or None if its preconditions can never hold."""
+        pre_ids, neg = [], 0
+        for c in _conjuncts(op.precondition):
+            positive = True
+            if isinstance(c, CompoundFormula) and c.connective == Connective.Not:
+                positive, c = False, c.subformulas[0]
+            if not isinstance(c, Atom):
+                raise UnsupportedTask(f"the precondition {c}")
+            if isinstance(c.predicate.name, BuiltinPredicateSymbol):
+                # (in)equalities between objects are known statically
+                equal = c.subterms[0].name == c.subterms[1].name
+                if c.predicate.name == BuiltinPredicateSymbol.NE:
+                    equal = not equal
+                if equal != positive:
+                    return None
+            elif positive:
+                pre_ids.append(self.atom(c))
+            else:
+                neg |= 1 << self.atom(c)
+        return pre_ids, neg
+
+    def state(self, atoms) -> int:
+        """Returns the bitmask of a set of atoms."""
+        return self._mask([self.atoms[str(a)] for a in atoms if str(a) in self.atoms])
+
+    def goal(self, formula: Formula) -> Tuple[List[int], int]:
+        """Returns the ids and mask of the atoms of a (conjunctive, positive) goal."""
+        ids = []
+        for c in _conjuncts(formula):
+            if not isinstance(c, Atom):
+                raise UnsupportedTask(f"the goal {c}")
+            ids.append(self.atom(c))
+        return ids, self._mask(ids)
+
+    def applicable(self, state: int) -> List[int]:
+        pre, neg = self.pre, self.neg
+        return [
+            i
+            for i in range(len(self.operators))
+            if state & pre[i] == pre[i] and not state & neg[i]
+        ]
+
+    def progress(self, state: int, op: int) -> int:
+        return (state & ~self.delete[op]) | self.add[op]
+
+    def heuristic(self, state: int, goal: List[int], ff: bool) -> Optional[int]:
+        """Returns the h_add or h_FF value of a state (None if the goal is
+        unreachable in the delete relaxation)."""
+        n = len(self.atoms)
+        inf = float("inf")
+        cost = [inf] * n
+        supporter = [-1] * n
+        done = [False] * n
+        heap = []
+        for a in range(n):
+            if state >> a & 1:
+                cost[a] = 0
+                heap.append((0, a))
+        unsatisfied = [len(ids) for ids in self.pre_ids]
+        op_cost = [0] * len(self.operators)
+
+        def apply(op: int, c: int):
+            for a in self.add_ids[op]:
+                if c + 1 < cost[a]:
+                    cost[a] = c + 1
+                    supporter[a] = op
+                    heapq.heappush(heap, (c + 1, a))
+
+        for op, ids in enumerate(self.pre_ids):
+            if not ids:
+                apply(op, 0)
+        heapq.heapify(heap)
+        remaining = set(goal)
+        while heap and remaining:
+            c, a = heapq.heappop(heap)
+            if done[a]:
+                continue
+            done[a] = True
+            remaining.discard(a)
+            for op in self.pre_of[a]:
+                op_cost[op] += c
+                unsatisfied[op] -= 1
+                if not unsatisfied[op]:
+                    apply(op, op_cost[op])
+        if any(cost[g] == inf for g in goal):
+            return None
+        if not ff:
+            return sum(cost[g] for g in goal)
+
+        # extract a relaxed plan by following the best supporters back
+        relaxed_plan = set()
+        stack = [g for g in goal if cost[g] > 0]
+        seen = set(stack)
+        while stack:
+            op = supporter[stack.pop()]
+            if op in relaxed_plan:
+                continue
+            relaxed_plan.add(op)
+            for a in self.pre_ids[op]:
+                if cost[a] > 0 and a not in seen:
+                    seen.add(a)
+                    stack.append(a)
+        return len(relaxed_plan)
+
+
+class LocalPlanner(Planner):
+    """An in-process greedy best-first search planner, guided by the FF (or
+    additive) heuristic over the grounded task.
+
+    Supports grounded STRIPS tasks with negative preconditions, and conjunctive
+    goals of positive atoms. Other problems (e.g. with conditional effects) are
+    passed to the fallback planner if there is one, and raise `UnsupportedTask`
+    otherwise. The plans found are not necessarily optimal.
+    """
+
+    # the compiled tasks of the generators planned for, or why they are unsupported
+    _tasks: "WeakKeyDictionary[Generator, Union[_Task, UnsupportedTask]]"
+
+    def __init__(
+        self,
+        heuristic: str = "ff",
+        max_expansions: Optional[int] = None,
+        fallback: Optional[Planner] = None,
+    ):
+        """Initializes the planner.
+
+        Args:
+            heuristic (str):
+                Optional; The heuristic guiding the search, "ff" (default) or
+                "add".
+            max_expansions (Optional[int]):
+                Optional; The maximum number of states to expand before giving up.
+            fallback (Optional[Planner]):
+                Optional; The planner used for the problems this planner does not
+                support. By default, they raise `UnsupportedTask`.
+        """
+        if heuristic not in ("ff", "add"):
+            raise ValueError(f"Unknown heuristic: {heuristic}. Must be 'ff' or 'add'.")
+        self.heuristic = heuristic
+        self.max_expansions = max_expansions
+        self.fallback = fallback
+        self._tasks = WeakKeyDictionary()
+
+    def task(self, generator: "Generator") -> _Task:
+        """Returns the compiled task of a generator (compiled once per generator).
+
+        Raises:
+            UnsupportedTask:
+                Raised if the operators are not STRIPS operators (with negative
+                preconditions).
+        """
+        task = self._tasks.get(generator)
+        if task is None:
+            try:
+                task = _Task(generator.instance.operators)
+            except UnsupportedTask as e:
+                task = e
+            self._tasks[generator] = task
+        if isinstance(task, UnsupportedTask):
+            raise task
+        return task
+
+    def supports(self, generator: "Generator") -> bool:
+        """Returns whether the planner supports the operators and goal of a
+        generator's current problem."""
+        try:
+            self.task(generator).goal(generator.problem.goal)
+        except UnsupportedTask:
+            return False
+        return True
+
+    def _problem(self, task: _Task, generator: "Generator") -> Tuple[int, List[int]]:
+        """Returns the initial state and goal of a generator's problem."""
+        # the goal is compiled first, as it may add atoms to the task
+        goal, _ = task.goal(generator.problem.goal)
+        return task.state(generator.problem.init.as_atoms()), goal
+
+    def plan(self, generator: "Generator") -> Plan:
+        if self.fallback is not None and not self.supports(generator):
+            return self.fallback.plan(generator)
+        task = self.task(generator)
+        ops = _search(
+            task,
+            *self._problem(task, generator),
+            self.heuristic == "ff",
+            self.max_expansions,
+        )
+        return Plan([task.operators[op] for op in ops])
+
+    def pool(self, generator: "Generator", workers: int = 1) -> PlannerPool:
+        if workers <= 1:
+            return PlannerPool(self, generator)
+        if self.fallback is not None:
+            try:
+                self.task(generator)
+            except UnsupportedTask:
+                return self.fallback.pool(generator, workers)
+        return _LocalPlannerPool(self, generator, workers)
+
+
+def _search(
+    task: _Task,
+    init: int,
+    goal: List[int],
+    ff: bool,
+    max_expansions: Optional[int],
+) -> List[int]:
+    """Greedy best-first search, returning the operators of the plan found."""
+    goal_mask = task._mask(goal)
+    h = task.heuristic(init, goal, ff)
+    if h is None:
+        raise NoPlanFound()
+    parents: Dict[int, Tuple[Optional[int], int]] = {init: (None, -1)}
+    tiebreak = count()
+    open_list = [(h, next(tiebreak), init)]
+    expansions = 0
+    while open_list:
+        _, _, state = heapq.heappop(open_list)
+        if state & goal_mask == goal_mask:
+            # follow the parent pointers back from the goal state
+            ops = []
+            parent, op = parents[state]
+            while parent is not None:
+                ops.append(op)
+                parent, op = parents[parent]
+            ops.reverse()
+            return ops
+        expansions += 1
+        if max_expansions is not None and expansions > max_expansions:
+            break
+        for op in task.applicable(state):
+            succ = task.progress(state, op)
+            if succ in parents:
+                continue
+            parents[succ] = (state, op)
+            h = task.heuristic(succ, goal, ff)
+            if h is not None:
+                heapq.heappush(open_list, (h, next(tiebreak), succ))
+    raise NoPlanFound()
+
+
+# the task and search options of a local planner pool's worker process
+_worker_search = None
+
+
+def _init_worker(task: _Task, ff: bool, max_expansions: Optional[int]):
+    global _worker_search
+    _worker_search = (task, ff, max_expansions)
+
+
+def _worker_plan(init: int, goal: List[int]) -> List[int]:
+    task, ff, max_expansions = _worker_search
+    return _search(task, init, goal, ff, max_expansions)
+
+
+class _LocalPlannerPool(PlannerPool):
+    """Plans with a local planner in worker processes."""
+
+    def __init__(self, planner: LocalPlanner, generator: "Generator", workers: int):
+        super().__init__(planner, generator)
+        self.task = planner.task(generator)
+        self.num_atoms = len(self.task.atoms)
+        context = get_context("fork") if "fork" in get_all_start_methods() else None
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.task, planner.heuristic == "ff", planner.max_expansions),
+        )
+        self.futures: Set[Future] = set()
+
+    def _submit(self) -> Future:
+        try:
+            init, goal = self.planner._problem(self.task, self.generator)
+        except UnsupportedTask:
+            # plan with the fallback planner (or raise) in this process
+            return super()._submit()
+        if len(self.task.atoms) > self.num_atoms:
+            # the goal added atoms (that no operator mentions) the workers do
+            # not know of, so plan in this process
+            return super()._submit()
+        future = _track(self.executor.submit(_worker_plan, init, goal), self.futures)
+        operators = self.task.operators
+        return _then(future, lambda ops: Plan([operators[op] for op in ops]))
+
+    def close(self):
+        _cancel(self.futures)
+        self.executor.shutdown(wait=False)
+
+
+async def _in_thread(function: Callable, *args, **kwargs):
+    """Calls a blocking function in the executor of the running event loop (like
+    `asyncio.to_thread`, which needs Python 3.9)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, partial(function, *args, **kwargs))
+
+
+class RemotePlanner(Planner):
+    """The planning.domains online solver (LAMA-first by default).
+
+    If the generator's problem was loaded from a problem ID and left unaltered,
+    its stored plan is retrieved instead.
+    """
+
+    def __init__(
+        self,
+        url: str = "https://solver.planning.domains:5001",
+        package: str = "lama-first",
+        delays: Sequence[float] = (0, 1, 3, 5, 10),
+    ):
+        """Initializes the planner.
+
+        Args:
+            url (str):
+                Optional; The URL of the solver.
+            package (str):
+                Optional; The planner package to run.
+            delays (Sequence[float]):
+                Optional; The seconds to wait before each attempt (and between
+                polls for the result).
+        """
+        self.url = url
+        self.package = package
+        self.delays = list(delays)
+
+    def cache_key(self) -> str:
+        # the delays do not change the plans found
+        name = f"{type(self).__module__}.{type(self).__qualname__}"
+        return f"{name}({self.url}, {self.package})"
+
+    def plan(self, generator: "Generator") -> Plan:
+        # if the problem was loaded from a problem ID and is unaltered, retrieve the existing plan
+        if generator.problem_id and not generator.modified:
+            return self._to_plan(
+                generator, get_plan(generator.problem_id, formalism="classical")
+            )
+        domain, problem = generator.pddl_text()
+        data = {"domain": domain, "problem": problem}
+        for delay in self.delays:
+            sleep(delay)
+            actions = self._solve(data, delay)
+            if actions is not None:
+                return self._to_plan(generator, actions)
+        raise self._failure()
+
+    def pool(self, generator: "Generator", workers: int = 1) -> PlannerPool:
+        if workers <= 1:
+            return PlannerPool(self, generator)
+        return _RemotePlannerPool(self, generator, workers)
+
+    def _failure(self) -> PlanningDomainsAPIError:
+        return PlanningDomainsAPIError(
+            f"Could not get a valid response from the planning.domains solver after {len(self.delays)} attempts.",
+        )
+
+    @staticmethod
+    def _actions(sas_plan: str) -> List[str]:
+        return [f"({action})" for action in re.findall(r"\((.*?)\)", sas_plan)]
+
+    def _solve(self, data: dict, delay: float) -> Optional[List[str]]:
+        """Makes one attempt at solving the problem with the solver."""
+        headers = {"persistent": "true"}
+        try:
+            solve_request = (
+                session()
+                .post(
+                    f"{self.url}/package/{self.package}/solve",
+                    json=data,
+                    headers=headers,
+                )
+                .json()
+            )
+            result_url = f"{self.url}/{solve_request['result']}"
+            celery_result = session().get(result_url)
+            while celery_result.json().get("status", "") == "PENDING":
+                sleep(delay)
+                celery_result = session().get(result_url)
+            sas_plan = celery_result.json()["result"]["output"]["sas_plan"]
+        except TypeError:
+            return None
+        return self._actions(sas_plan)
+
+    async def _solve_async(self, data: dict, delay: float) -> Optional[List[str]]:
+        """Makes one attempt at solving the problem with the solver, waiting for
+        the result without blocking the event loop."""
+        headers = {"persistent": "true"}
+        try:
+            solve_request = (
+                await _in_thread(
+                    session().post,
+                    f"{self.url}/package/{self.package}/solve",
+                    json=data,
+                    headers=headers,
+                )
+            ).json()
+            result_url = f"{self.url}/{solve_request['result']}"
+            celery_result = await _in_thread(session().get, result_url)
+            while celery_result.json().get("status", "") == "PENDING":
+                await asyncio.sleep(delay)
+                celery_result = await _in_thread(session().get, result_url)
+            sas_plan = celery_result.json()["result"]["output"]["sas_plan"]
+        except TypeError:
+            return None
+        return self._actions(sas_plan)
+
+    async def plan_async(self, data: dict) -> List[str]:
+        """Solves a problem with the solver asynchronously.
+
+        Args:
+            data (dict):
+                The PDDL text of the "domain" and "problem".
+
+        Raises:
+            PlanningDomainsAPIError:
+                Raised if no valid response is obtained from the solver.
+
+        Returns:
+            List[str]:
+                The actions of the plan, e.g. "(stack a b)".
+        """
+        for delay in self.delays:
+            await asyncio.sleep(delay)
+            actions = await self._solve_async(data, delay)
+            if actions is not None:
+                return actions
+        raise self._failure()
+
+
+class _RemotePlannerPool(PlannerPool):
+    """Plans with the planning.domains solver using an asyncio client, running
+    in an event loop in a background thread."""
+
+    def __init__(self, planner: RemotePlanner, generator: "Generator", workers: int):
+        super().__init__(planner, generator)
+        self.loop = asyncio.new_event_loop()
+        # the threads making the (blocking) HTTP requests
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.loop.set_default_executor(self.executor)
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        # the semaphore is created in the loop, since before Python 3.10 it binds to
+        # the event loop of the thread it is created in
+        self.requests = asyncio.run_coroutine_threadsafe(
+            self._semaphore(workers), self.loop
+        ).result()
+
+    @staticmethod
+    async def _semaphore(workers: int) -> asyncio.Semaphore:
+        return asyncio.Semaphore(workers)
+
+    async def _plan(self, data: dict) -> List[str]:
+        async with self.requests:
+            return await self.planner.plan_async(data)
+
+    def _submit(self) -> Future:
+        generator = self.generator
+        if generator.problem_id and not generator.modified:
+            return super()._submit()
+        domain, problem = generator.pddl_text()
+        future = asyncio.run_coroutine_threadsafe(
+            self._plan({"domain": domain, "problem": problem}), self.loop
+        )
+        return _then(future, lambda actions: self.planner._to_plan(generator, actions))
+
+    async def _cancel(self):
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._cancel(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.executor.shutdown(wait=False)
+
+
+class FastDownwardPlanner(Planner):
+    """A locally installed Fast Downward, run in a subprocess."""
+
+    def __init__(
+        self,
+        command: Sequence[str] = ("fast-downward.py",),
+        search: Sequence[str] = ("--alias", "lama-first"),
+        time_limit: Optional[float] = None,
+    ):
+        """Initializes the planner.
+
+        Args:
+            command (Sequence[str]):
+                Optional; The command to run Fast Downward.
+            search (Sequence[str]):
+                Optional; The search options, placed before the PDDL files.
+            time_limit (Optional[float]):
+                Optional; The maximum number of seconds to plan for.
+        """
+        self.command = list(command)
+        self.search = list(search)
+        self.time_limit = time_limit
+
+    def plan(self, generator: "Generator") -> Plan:
+        return self._to_plan(generator, self._run(*generator.pddl_files()))
+
+    def pool(self, generator: "Generator", workers: int = 1) -> PlannerPool:
+        if workers <= 1:
+            return PlannerPool(self, generator)
+        return _FastDownwardPlannerPool(self, generator, workers)
+
+    def _run_text(self, domain: str, problem: str) -> List[str]:
+        """Runs Fast Downward on the PDDL text of a problem."""
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = os.path.join(tmp, "domain.pddl"), os.path.join(tmp, "problem.pddl")
+            for path, text in zip(paths, (domain, problem)):
+                with open(path, "w") as fp:
+                    fp.write(text)
+            return self._run(*paths)
+
+    def _run(self, domain: str, problem: str) -> List[str]:
+        """Runs Fast Downward on PDDL files, returning the actions of the plan."""
+        with tempfile.TemporaryDirectory() as tmp:
+            plan_file = os.path.join(tmp, "sas_plan")
+            try:
+                subprocess.run(
+                    self.command
+                    + ["--plan-file", plan_file]
+                    + self.search
+                    + [os.path.abspath(domain), os.path.abspath(problem)],
+                    cwd=tmp,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    timeout=self.time_limit,
+                )
+            except subprocess.TimeoutExpired:
+                raise NoPlanFound("Fast Downward did not find a plan in time.")
+            if not os.path.exists(plan_file):
+                raise NoPlanFound()
+            with open(plan_file) as fp:
+                return [line.strip() for line in fp if not line.startswith(";")]
+
+
+class _FastDownwardPlannerPool(PlannerPool):
+    """Runs Fast Downward processes from a thread pool."""
+
+    def __init__(
+        self, planner: FastDownwardPlanner, generator: "Generator", workers: int
+    ):
+        super().__init__(planner, generator)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.futures: Set[Future] = set()
+
+    def _submit(self) -> Future:
+        generator = self.generator
+        future = _track(
+            self.executor.submit(self.planner._run_text, *generator.pddl_text()),
+            self.futures,
+        )
+        return _then(future, lambda actions: self.planner._to_plan(generator, actions))
+
+    def close(self):
+        _cancel(self.futures)
+        self.executor.shutdown(wait=False)
+
+
+PLANNERS = {
+    "local": LocalPlanner,
+    "remote": RemotePlanner,
+    "fd": FastDownwardPlanner,
+}
+
+
+def get_planner(planner: Union[str, Planner, None] = None) -> Planner:
+    """Returns a planner.
+
+    Args:
+        planner (Union[str, Planner, None]):
+            Optional; The planner, or the name of one ("local", "remote" or
+            "fd"). By default, a `LocalPlanner` falling back to a
+            `RemotePlanner` for the problems it does not support.
+
+    Returns:
+        The planner.
+    """
+    if planner is None:
+        return LocalPlanner(fallback=RemotePlanner())
+    if isinstance(planner, Planner):
+        return planner
+    if planner in PLANNERS:
+        return PLANNERS[planner]()
+    raise ValueError(
+        f"Unknown planner: {planner}. Must be one of {', '.join(PLANNERS)} or a Planner."
+    )
@@ -1,14 +1,99 @@
 
-import http.client, urllib.parse, json, os
+import hashlib, json, os, re, tempfile, threading
 import xml.etree.ElementTree as etree
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
 
 URL = 'api.planning.domains'
+API_URL = f"https://{URL}"
 VERSION = '0.5'
 
 DOMAIN_PATH = False
 USER_EMAIL = False
 USER_TOKEN = False
 
+# Responses to GET queries for immutable resources (see CACHED_QUERIES), and the
+# domain and problem files fetched, are cached in CACHE_DIR (by default
+# "~/.cache/macq/planning.domains", or "$MACQ_CACHE_DIR/planning.domains"). In
+# OFFLINE mode (or with MACQ_OFFLINE=1), only the cache is used.
+CACHE_DIR = None
+# the queries cached by default: the details of a problem (and its file URLs),
+# and its stored plan (which is invalidated when a plan is submitted)
+CACHED_QUERIES = re.compile(r"(problem|plan)/\d+")
+OFFLINE = os.environ.get("MACQ_OFFLINE", "") not in ("", "0")
+# the number of pooled connections, and the seconds to wait for a response
+POOL_SIZE = 16
+TIMEOUT = 30
+
+_session = None
+_session_lock = threading.Lock()
+# the locks of the URLs fetched, so that each is only downloaded once
+_url_locks = {}
+
+
+class PlanningDomainsAPIError(Exception):
+    """Raised when a valid response cannot be obtained from planning.domains."""
+
+    def __init__(self, message):
+        super().__init__(message)
+
+
+def session():
+    """Return the HTTP session shared by all requests, which pools connections"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+    return _session
+
+def cache_dir():
+    """Return the directory responses are cached in"""
+    if CACHE_DIR:
+        return CACHE_DIR
+    base = os.environ.get("MACQ_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "macq")
+    return os.path.join(base, "planning.domains")
+
+def _cache_file(key):
+    return os.path.join(cache_dir(), hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+def _load(key):
+    try:
+        with open(_cache_file(key)) as fp:
+            entry = json.load(fp)
+        return entry["data"] if entry["key"] == key else None
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _store(key, data):
+    """Writes a cache entry atomically, ignoring unwritable cache directories."""
+    try:
+        os.makedirs(cache_dir(), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir(), suffix=".tmp")
+        with os.fdopen(fd, "w") as fp:
+            json.dump({"key": key, "data": data}, fp)
+        os.replace(tmp, _cache_file(key))
+    except OSError:
+        pass
+
+def _invalidate(key):
+    try:
+        os.remove(_cache_file(key))
+    except OSError:
+        pass
+
+def clear_cache():
+    """Remove all the cached responses"""
+    if os.path.isdir(cache_dir()):
+        for name in os.listdir(cache_dir()):
+            if name.endswith(".json"):
+                os.remove(os.path.join(cache_dir(), name))
+
 def checkForDomainPath():
     """Returns the domain path if one exists and is saved in the settings.xml"""
 
@@ -41,20 +126,31 @@ def checkForDomainPath():
         USER_TOKEN = list(filter(lambda x: x.tag == 'token', installationSettings))[0].text
     return True
 
-def query(qs, formalism, qtype="GET", params={}, offline=False, format='/json'):
-
-    assert not offline, "Error: Offline mode is not supported currently."
+def query(qs, formalism, qtype="GET", params={}, offline=None, format='/json', use_cache=None):
+    """Query the API. Successful GET queries are cached if use_cache is set (by
+    default, only those matching CACHED_QUERIES, whose results rarely change), and
+    only the cache is used if offline (which defaults to OFFLINE)."""
+
+    if offline is None:
+        offline = OFFLINE
+    if use_cache is None:
+        use_cache = CACHED_QUERIES.fullmatch(qs) is not None
+    path = f"{format}/{qs}" if formalism == "" else f"{format}/{formalism}/{qs}"
+    cacheable = qtype == "GET" and use_cache
+    if cacheable:
+        data = _load(path)
+        if data is not None:
+            return data
+    if offline:
+        return { "error": True, "message": f"{path} is not in the offline cache."}
 
     headers = {"Content-type": "application/x-www-form-urlencoded", "Accept": "text/plain"}
 
-    params = urllib.parse.urlencode(params)
-    conn = http.client.HTTPSConnection(URL)
-    if formalism == "":
-        conn.request(qtype, f"{format}/{qs}", params, headers)
-    else:
-        conn.request(qtype, f"{format}/{formalism}/{qs}", params, headers)
-    response = conn.getresponse()
-    tmp = response.read().decode('utf-8')
+    try:
+        response = session().request(qtype, f"{API_URL}{path}", data=params or None, headers=headers, timeout=TIMEOUT)
+    except requests.RequestException as e:
+        return { "error": True, "message": f"Request failed: {e}"}
+    tmp = response.text
     if "<pre>Payload Too Large</pre>" in tmp:
         data = { "error": True, "message": "Payload too large."}
     else:
@@ -62,10 +158,33 @@ def query(qs, formalism, qtype="GET", params={}, offline=False, format='/json'):
             data = json.loads(tmp)
         except:
             data = { "error": True, "message": f"Invalid JSON response:\n{tmp}"}
-    conn.close()
+    if cacheable and not data.get("error"):
+        _store(path, data)
 
     return data
 
+def fetch(url, offline=None):
+    """Return the text at a URL (e.g. of a domain or problem file, which do not
+    change), caching it"""
+
+    if offline is None:
+        offline = OFFLINE
+    with _session_lock:
+        lock = _url_locks.setdefault(url, threading.Lock())
+    with lock:
+        text = _load(url)
+        if text is not None:
+            return text
+        if offline:
+            raise PlanningDomainsAPIError(f"{url} is not in the offline cache.")
+        try:
+            response = session().get(url, timeout=TIMEOUT)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise PlanningDomainsAPIError(f"Could not fetch {url}: {e}")
+        _store(url, response.text)
+        return response.text
+
 def simple_query(qs, formalism):
     res = query(qs, formalism)
     if res['error']:
@@ -260,6 +379,30 @@ def untag_problem(pid, tagname, formalism):
     else:
         change_tag("untagproblem", pid, tag2id[tagname], formalism)
 
+def fetch_problem(pid, formalism, problem=None) -> Tuple[str, str]:
+    """Return the text of the domain and problem files of a problem id (using the
+    problem's details if given, e.g. from get_problems)"""
+    if problem is None:
+        problem = get_problem(pid, formalism)
+    if not problem:
+        raise PlanningDomainsAPIError(f"Could not get problem {pid} from planning.domains.")
+    return fetch(problem["domain_url"]), fetch(problem["problem_url"])
+
+def fetch_problems(pids: Iterable[int], formalism, workers=8) -> Dict[int, Tuple[str, str]]:
+    """Fetch the domain and problem files of many problem ids concurrently (see fetch_problem)"""
+    pids = list(pids)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        files = list(pool.map(lambda pid: fetch_problem(pid, formalism), pids))
+    return dict(zip(pids, files))
+
+def fetch_collection(cid, formalism, workers=8) -> Dict[int, Tuple[str, str]]:
+    """Fetch the domain and problem files of every problem in a collection
+    concurrently, e.g. to populate the cache for offline use"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        problems = [p for ps in pool.map(lambda d: list(get_problems(d['domain_id'], formalism)), get_domains(cid, formalism)) for p in ps]
+        files = list(pool.map(lambda p: fetch_problem(p['problem_id'], formalism, p), problems))
+    return {p['problem_id']: f for p, f in zip(problems, files)}
+
 def get_plan(pid, formalism):
     """Return the existing plan for a problem if it exists"""
     res = simple_query("plan/%d" % pid, formalism)
@@ -279,6 +422,8 @@ def submit_plan(pid, plan, formalism):
                 params=params,
                 offline=False,
                 format='')
+    # the stored plan of the problem may have been replaced
+    _invalidate(f"/json/{formalism}/plan/{pid}")
     if res['error']:
         print ("Error: %s" % res['message'])
     else:
@@ -309,8 +454,11 @@ def generate_lab_suite(cid, formalism):
         return
 
     SUITE = []
-    for d in get_domains(cid, formalism):
-        for p in get_problems(d['domain_id'], formalism):
+    # fetch the problems of the domains concurrently
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        domain_problems = list(pool.map(lambda d: list(get_problems(d['domain_id'], formalism)), get_domains(cid, formalism)))
+    for problems in domain_problems:
+        for p in problems:
             SUITE.append(Problem(p['domain'], p['problem'],
                                  domain_file = p['domain_path'],
                                  problem_file = p['problem_path'],
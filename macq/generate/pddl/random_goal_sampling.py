@@ -1,8 +1,13 @@
 import random
-from typing import Dict
-from tarski.syntax.formulas import Atom
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from concurrent.futures import TimeoutError
+from time import monotonic
+from typing import Dict, List, Optional, Set, Tuple, Union
+from tarski.model import Model
+from tarski.search.operations import progress as progress_state
 from . import VanillaSampling
+from .planners import NoPlanFound, Planner
+from .plan_cache import PlanCache
 from ...trace import TraceList, State
 from ...utils import PercentError, basic_timer, progress
 
@@ -26,6 +31,8 @@ class RandomGoalSampling(VanillaSampling):
         goals_inits_plans (List[Dict]):
             A list of dictionaries, where each dictionary stores the generated goal state as the key and the initial state and plan used to
             reach the goal as values.
+        workers (int):
+            The number of candidate goals planned for concurrently.
     """
 
     def __init__(
@@ -39,6 +46,10 @@ class RandomGoalSampling(VanillaSampling):
         problem_id: int = None,
         max_time: float = 30,
         observe_pres_effs: bool = False,
+        planner: Union[str, Planner, None] = None,
+        plan_cache: Union[bool, PlanCache] = True,
+        grounding_cache: Union[bool, str] = False,
+        workers: int = 1,
     ):
         """
         Initializes a random goal state trace sampler using the plan length, number of traces,
@@ -65,9 +76,19 @@ class RandomGoalSampling(VanillaSampling):
                 The maximum time allowed for a trace to be generated.
             observe_pres_effs (bool):
                 Option to observe action preconditions and effects upon generation.
+            planner (Union[str, Planner, None]):
+                Optional; The planner used to generate plans (see `Generator`).
+            plan_cache (Union[bool, PlanCache]):
+                Optional; Whether to cache the plans found, or the `PlanCache` to use (see `Generator`).
+            grounding_cache (Union[bool, str]):
+                Optional; Whether to cache the grounding of the problem on disk, or the cache directory to use (see `Generator`).
+            workers (int):
+                Optional; The number of candidate goals planned for concurrently (see `Planner.pool`). With more than one
+                worker, candidate goals are sampled ahead while earlier ones are planned for. Defaults to 1.
         """
         if subset_size_perc < 0 or subset_size_perc > 1:
             raise PercentError()
+        self.workers = workers
         self.steps_deep = steps_deep
         self.enforced_hill_climbing_sampling = enforced_hill_climbing_sampling
         self.subset_size_perc = subset_size_perc
@@ -79,6 +100,9 @@ class RandomGoalSampling(VanillaSampling):
             num_traces=num_traces,
             observe_pres_effs=observe_pres_effs,
             max_time=max_time,
+            planner=planner,
+            plan_cache=plan_cache,
+            grounding_cache=grounding_cache,
         )
 
     def goal_sampling(self):
@@ -100,7 +124,49 @@ class RandomGoalSampling(VanillaSampling):
             del filtered_goals[d]
         return filtered_goals
 
+    def _sample_goal(
+        self, init: Model, init_f: Set[str], deadline: float
+    ) -> Optional[Tuple[List, List]]:
+        """Samples a candidate goal by a random walk of `steps_deep` steps from an initial state (restarting at dead ends).
+
+        Returns:
+            The goal fluents and the full state they were taken from (the next initial state for enforced hill climbing sampling),
+            or None if the goal holds in the initial state or the deadline was reached.
+        """
+        # like the last state of a trace generated by `generate_single_trace`, but only the last state is converted
+        state = None
+        while state is None:
+            if monotonic() >= deadline:
+                return None
+            state = init
+            for _ in range(self.steps_deep - 1):
+                applicable = list(self.instance.applicable(state))
+                if not applicable:
+                    # dead end; try again
+                    state = None
+                    break
+                state = progress_state(state, random.choice(applicable))
+        state = self.tarski_state_to_macq(state)
+
+        # get all positive fluents (only positive fluents can be used for a goal)
+        goal_f = [f for f in state if state[f]]
+        # get next initial state (only used for enforced hill climbing sampling)
+        next_init_f = goal_f.copy()
+        # get the subset size
+        subset_size = int(len(state.fluents) * self.subset_size_perc)
+        # if necessary, take a subset of the fluents
+        if len(goal_f) > subset_size:
+            random.shuffle(goal_f)
+            goal_f = goal_f[:subset_size]
+
+        # ensure that the goal doesn't hold in the initial state
+        if {str(f) for f in goal_f} <= init_f:
+            return None
+        return goal_f, next_init_f
+
     def generate_goals_setup(self, num_seconds: float, goal_states: Dict):
+        deadline = monotonic() + num_seconds
+
         @basic_timer(num_seconds=num_seconds)
         def generate_goals(self=self, goal_states=goal_states):
             """Helper function for `goal_sampling`. Generates as many goals as possible within the specified max_time seconds (timing is
@@ -109,6 +175,12 @@ class RandomGoalSampling(VanillaSampling):
             The outside function is a wrapper that provides parameters for both the timer
             wrapper and the function.
 
+            With more than one worker, candidate goals are sampled ahead and planned for concurrently by the planner's pool, and
+            their plans are taken in the order the goals were sampled. With enforced hill climbing sampling, candidates are sampled
+            from the state of the previous candidate, assuming a plan is found for it; if not, the candidates sampled after it are
+            discarded, and sampling resumes from its initial state. With one worker, each candidate is planned for before the next
+            is sampled.
+
             Given the specified number of traces `num_traces`, if `num_traces` plans of length k (`steps_deep`) are found before
             the time is up, exit early.
 
@@ -116,61 +188,78 @@ class RandomGoalSampling(VanillaSampling):
                 goal_states (Dict):
                     The dictionary to fill with the values of each goal state, initial state, and plan.
             """
-            # create a sampler to test the complexity of the new goal by running a planner on it
             k_length_plans = 0
-            while True:
-                # generate a trace of the specified length and retrieve the state of the last step
-                state = self.generate_single_trace_setup(
-                    num_seconds, self.steps_deep
-                )()[-1].state
-
-                # get all positive fluents (only positive fluents can be used for a goal)
-                goal_f = [f for f in state if state[f]]
-                # get next initial state (only used for enforced hill climbing sampling)
-                next_init_f = goal_f.copy()
-                # get the subset size
-                subset_size = int(len(state.fluents) * self.subset_size_perc)
-                # if necessary, take a subset of the fluents
-                if len(goal_f) > subset_size:
-                    random.shuffle(goal_f)
-                    goal_f = goal_f[:subset_size]
-
-                self.change_goal(goal_fluents=goal_f)
-
-                # ensure that the goal doesn't hold in the initial state; restart if it does
-                init_state = {str(a) for a in self.problem.init.as_atoms()}
-                goal = {str(a) for a in self.problem.goal.subformulas}
-
-                if goal.issubset(init_state):
-                    continue
-
-                try:
-                    # attempt to generate a plan, and find a new goal if a plan can't be found
-                    # should only crash if there are server issues
-                    test_plan = self.generate_plan()
-                except KeyError:
-                    continue
-
-                # create a State and add it to the dictionary
-                state_dict = {}
-                for f in goal_f:
-                    state_dict[f] = True
-                # map each goal to the initial state and plan used to achieve it
-                goal_states[State(state_dict)] = {
-                    "plan": test_plan,
-                    "initial state": self.problem.init,
-                }
-
-                # optionally change the initial state of the sampler for the next iteration to the goal state just generated (ensures more diversity in goals/plans)
-                # use the full state the goal was extracted from as the initial state to prevent planning errors from incomplete initial states
-                if self.enforced_hill_climbing_sampling:
-                    self.change_init(next_init_f)
-
-                # keep track of the number of plans of length k; if we get enough of them, exit early
-                if len(test_plan.actions) >= self.steps_deep:
-                    k_length_plans += 1
-                if k_length_plans >= self.num_traces:
-                    break
+            # the initial state the next candidate is sampled from, and its true fluents
+            init = self.problem.init
+            init_f = {str(f) for f, v in self.tarski_state_to_macq(init).items() if v}
+            # the initial state of the next goal, given the plans found so far
+            committed = (init, init_f)
+            pending = deque()
+            # only sample ahead if candidates are planned for concurrently, since the pool of a single worker plans for each
+            # candidate as it is submitted, and candidates sampled ahead may be discarded
+            ahead = 2 * self.workers if self.workers > 1 else 1
+            with self.planner.pool(self, self.workers) as pool:
+                while True:
+                    # sample candidate goals ahead, and submit them to be planned for
+                    while len(pending) < ahead and monotonic() < deadline:
+                        candidate = self._sample_goal(init, init_f, deadline)
+                        if candidate is None:
+                            continue
+                        goal_f, next_init_f = candidate
+                        goal_init = self.problem.init = init
+                        self.change_goal(goal_fluents=goal_f)
+                        future = pool.submit()
+                        if self.enforced_hill_climbing_sampling:
+                            # use the full state the goal was extracted from as the next initial state to prevent planning errors
+                            # from incomplete initial states
+                            self.change_init(next_init_f)
+                            init, init_f = self.problem.init, {
+                                str(f) for f in next_init_f
+                            }
+                        pending.append((future, goal_f, goal_init, (init, init_f)))
+                    if not pending:
+                        break
+
+                    future, goal_f, goal_init, next_init = pending.popleft()
+                    try:
+                        # attempt to generate a plan, and find a new goal if a plan can't be found
+                        # should only crash if there are server issues
+                        test_plan = future.result(
+                            timeout=max(0, deadline - monotonic())
+                        )
+                    except (KeyError, NoPlanFound):
+                        if self.enforced_hill_climbing_sampling:
+                            # the later candidates were sampled assuming this goal would be reached
+                            for f, *_ in pending:
+                                f.cancel()
+                            pending.clear()
+                            init, init_f = committed
+                        continue
+                    except TimeoutError:
+                        break
+
+                    # create a State and add it to the dictionary
+                    state_dict = {}
+                    for f in goal_f:
+                        state_dict[f] = True
+                    # map each goal to the initial state and plan used to achieve it
+                    goal_states[State(state_dict)] = {
+                        "plan": test_plan,
+                        "initial state": goal_init,
+                    }
+                    # optionally change the initial state for the next goal to the goal state just generated (ensures more diversity
+                    # in goals/plans)
+                    if self.enforced_hill_climbing_sampling:
+                        committed = next_init
+
+                    # keep track of the number of plans of length k; if we get enough of them, exit early
+                    if len(test_plan.actions) >= self.steps_deep:
+                        k_length_plans += 1
+                    if k_length_plans >= self.num_traces:
+                        break
+                for f, *_ in pending:
+                    f.cancel()
+            self.problem.init = committed[0]
 
         return generate_goals
 
@@ -1,4 +1,7 @@
+from typing import Union
 from .generator import Generator
+from .planners import Planner
+from .plan_cache import PlanCache
 
 
 class TraceFromGoal(Generator):
@@ -8,6 +11,9 @@ class TraceFromGoal(Generator):
         prob: str = None,
         problem_id: int = None,
         observe_pres_effs: bool = False,
+        planner: Union[str, Planner, None] = None,
+        plan_cache: Union[bool, PlanCache] = True,
+        grounding_cache: Union[bool, str] = False,
     ):
         """
         Initializes a goal state trace sampler using the domain and problem. This method of sampling
@@ -22,12 +28,21 @@ class TraceFromGoal(Generator):
                 The ID of the problem to access.
             observe_pres_effs (bool):
                 Option to observe action preconditions and effects upon generation.
+            planner (Union[str, Planner, None]):
+                Optional; The planner used to generate plans (see `Generator`).
+            plan_cache (Union[bool, PlanCache]):
+                Optional; Whether to cache the plans found, or the `PlanCache` to use (see `Generator`).
+            grounding_cache (Union[bool, str]):
+                Optional; Whether to cache the grounding of the problem on disk, or the cache directory to use (see `Generator`).
         """
         super().__init__(
             dom=dom,
             prob=prob,
             problem_id=problem_id,
             observe_pres_effs=observe_pres_effs,
+            planner=planner,
+            plan_cache=plan_cache,
+            grounding_cache=grounding_cache,
         )
         self.trace = self.generate_trace()
 
@@ -1,10 +1,15 @@
 from tarski.search.operations import progress
 import random
+from typing import Dict, FrozenSet, Optional, Union
 from . import Generator
+from .planners import Planner, UnsupportedTask
+from .batch_walk import BatchWalker
+from .plan_cache import PlanCache
 from ...utils import (
     set_timer_throw_exc,
     TraceSearchTimeOut,
     InvalidTime,
+    InvalidPlanLength,
     set_num_traces,
     set_plan_length,
     progress as print_progress,
@@ -29,6 +34,13 @@ class VanillaSampling(Generator):
             The length of the traces to be generated.
         num_traces (int):
             The number of traces to be generated.
+        batch_size (Optional[int]):
+            The number of random walks advanced together, or None to generate traces one at a time.
+        backtrack (int):
+            The number of steps a walk may backtrack from dead ends before restarting.
+        dead_ends (Dict[FrozenSet[str], int]):
+            The states found (when backtracking) to be unable to take some number of further steps, mapped
+            to the fewest such steps.
         traces (TraceList):
             The list of traces generated.
     """
@@ -43,6 +55,11 @@ class VanillaSampling(Generator):
         num_traces: int = 0,
         seed: int = None,
         max_time: float = 30,
+        planner: Union[str, Planner, None] = None,
+        plan_cache: Union[bool, PlanCache] = True,
+        grounding_cache: Union[bool, str] = False,
+        batch_size: Optional[int] = None,
+        backtrack: int = 0,
     ):
         """
         Initializes a vanilla state trace sampler using the plan length, number of traces,
@@ -63,18 +80,42 @@ class VanillaSampling(Generator):
                 The length of each generated trace. Defaults to 1.
             num_traces (int):
                 The number of traces to generate. Defaults to 1.
+            planner (Union[str, Planner, None]):
+                Optional; The planner used to generate plans (see `Generator`).
+            plan_cache (Union[bool, PlanCache]):
+                Optional; Whether to cache the plans found, or the `PlanCache` to use (see `Generator`).
+            grounding_cache (Union[bool, str]):
+                Optional; Whether to cache the grounding of the problem on disk, or the cache directory to use (see `Generator`).
+            batch_size (Optional[int]):
+                Optional; The number of random walks to advance together over a state matrix (see
+                `macq.generate.pddl.batch_walk`), which is much faster for many traces. By default, traces
+                are generated one at a time. Problems the batched walks do not support (e.g. with
+                conditional effects) are always walked one trace at a time.
+            backtrack (int):
+                Optional; The number of steps a walk may backtrack when it reaches a dead end, to try the other
+                applicable actions, before restarting from the initial state. States found to be dead ends are
+                not entered again. Defaults to 0, i.e. walks restart at every dead end. Only used when generating
+                traces one at a time.
         """
         super().__init__(
             dom=dom,
             prob=prob,
             problem_id=problem_id,
             observe_pres_effs=observe_pres_effs,
+            planner=planner,
+            plan_cache=plan_cache,
+            grounding_cache=grounding_cache,
         )
         if max_time <= 0:
             raise InvalidTime()
         if seed:
             random.seed(seed)
         self.max_time = max_time
+        self.batch_size = batch_size
+        if backtrack < 0:
+            raise ValueError("The number of steps to backtrack cannot be negative.")
+        self.backtrack = backtrack
+        self.dead_ends: Dict[FrozenSet[str], int] = {}
         self.plan_len = set_plan_length(plan_len)
         self.num_traces = set_num_traces(num_traces)
         if self.num_traces > 0:
@@ -91,12 +132,22 @@ class VanillaSampling(Generator):
         Returns:
             A TraceList object with the list of traces generated.
         """
-        traces = TraceList()
-        traces.generator = self.generate_single_trace_setup(
+        generator = self.generate_single_trace_setup(
             num_seconds=self.max_time, plan_len=self.plan_len
         )
-        for _ in print_progress(range(self.num_traces)):
-            traces.append(traces.generator())
+        walker = None
+        if self.batch_size:
+            try:
+                walker = BatchWalker(self, self.batch_size)
+            except UnsupportedTask:
+                pass
+        if walker is not None:
+            traces = walker.walk(self.num_traces, self.plan_len, self.max_time)
+        else:
+            traces = TraceList()
+            for _ in print_progress(range(self.num_traces)):
+                traces.append(generator())
+        traces.generator = generator
         self.traces = traces
         return traces
 
@@ -120,6 +171,8 @@ class VanillaSampling(Generator):
                 plan_len = self.plan_len
             if callable(plan_len):
                 plan_len = plan_len()
+            if self.backtrack:
+                return self._walk_with_backtracking(plan_len)
 
             trace = Trace()
 
@@ -152,3 +205,69 @@ class VanillaSampling(Generator):
             return trace
 
         return generate_single_trace
+
+    def _walk_with_backtracking(self, plan_len: int):
+        """Generates a single trace by a random walk that backtracks from dead ends.
+
+        At each state, the applicable actions are tried in a random order. When none of them leads to a state
+        from which the walk can reach the desired length, the walk backtracks to the previous state (and the
+        state is recorded in `dead_ends`), up to `backtrack` steps per attempt before restarting from the initial
+        state.
+
+        Args:
+            plan_len (int):
+                The length of the trace to generate.
+
+        Raises:
+            InvalidPlanLength:
+                Raised if no trace of the given length exists from the initial state.
+
+        Returns:
+            A Trace object (the valid trace generated).
+        """
+        states, actions, untried = [self.problem.init], [], [None]
+        backtracked = 0
+        while len(states) < plan_len:
+            if untried[-1] is None:
+                untried[-1] = list(self.instance.applicable(states[-1]))
+                random.shuffle(untried[-1])
+            # the number of steps the walk still has to take from the next state
+            remaining = plan_len - len(states) - 1
+            next_state = None
+            while untried[-1]:
+                act = untried[-1].pop()
+                state = progress(states[-1], act)
+                # states unable to take fewer steps may still be able to take these ones
+                if self.dead_ends.get(_state_key(state), remaining + 1) > remaining:
+                    next_state = state
+                    break
+            if next_state is not None:
+                states.append(next_state)
+                actions.append(act)
+                untried.append(None)
+                continue
+
+            # every action from this state leads to a dead end
+            key = _state_key(states[-1])
+            steps = remaining + 1
+            self.dead_ends[key] = min(self.dead_ends.get(key, steps), steps)
+            if len(states) == 1:
+                raise InvalidPlanLength(f"No trace of length {plan_len} exists from the initial state.")
+            states.pop()
+            actions.pop()
+            untried.pop()
+            backtracked += 1
+            if backtracked > self.backtrack:
+                states, actions, untried = [self.problem.init], [], [None]
+                backtracked = 0
+
+        trace = Trace()
+        for j, state in enumerate(states):
+            macq_action = self.tarski_act_to_macq(actions[j]) if j < len(actions) else None
+            trace.append(Step(self.tarski_state_to_macq(state), macq_action, j + 1))
+        return trace
+
+
+def _state_key(state) -> FrozenSet[str]:
+    """Returns a hashable key identifying a tarski state."""
+    return frozenset(str(atom) for atom in state.as_atoms())
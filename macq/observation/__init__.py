@@ -9,6 +9,7 @@ from .noisy_partial_observation import NoisyPartialObservation
 from .noisy_partial_disordered_parallel_observation import (
     NoisyPartialDisorderedParallelObservation,
 )
+from .batch_tokenization import BatchTokenizer, LazyObservedTrace
 
 
 __all__ = [
@@ -22,4 +23,6 @@ __all__ = [
     "NoisyObservation",
     "NoisyPartialObservation",
     "NoisyPartialDisorderedParallelObservation",
+    "BatchTokenizer",
+    "LazyObservedTrace",
 ]
@@ -44,12 +44,11 @@ class AtomicPartialObservation(PartialObservation):
 
         Observation.__init__(self, index=step.index)
 
-        if percent_missing < 1:
-            step = self.hide_random_subset(step, percent_missing)
-        if hide:
-            step = self.hide_subset(step, hide)
-
-        self.state = None if percent_missing == 1 else step.state.clone(atomic=True)
+        self.state = (
+            None
+            if percent_missing == 1
+            else self.hide_fluents(step.state, percent_missing, hide).clone(atomic=True)
+        )
         self.action = None if step.action is None else step.action.clone(atomic=True)
 
     def __eq__(self, other):
@@ -0,0 +1,375 @@
+from __future__ import annotations
+from collections.abc import Sequence
+from typing import List, Optional, Set, Type, Union, TYPE_CHECKING
+import numpy as np
+
+from ..trace import Action, Fluent, MaskedState, PartialState, State
+from ..trace.state import AtomicState
+from ..utils import PercentError, TokenizationError
+from . import (
+    Observation,
+    ObservedTraceList,
+    IdentityObservation,
+    PartialObservation,
+    AtomicPartialObservation,
+    NoisyObservation,
+    ActionObservation,
+    NoisyPartialDisorderedParallelObservation,
+)
+
+# Prevents circular importing
+if TYPE_CHECKING:
+    from macq.trace import Trace, TraceList
+
+
+# upper bound on the number of matrix cells processed at once, to bound the
+# memory used by the random keys when selecting subsets
+CHUNK_CELLS = 1 << 22
+
+
+def random_subset_mask(
+    rng: np.random.Generator, candidates: np.ndarray, percent: float
+) -> np.ndarray:
+    """Randomly selects a subset of the candidate cells in each row of a matrix.
+
+    Mirrors `Observation.extract_fluent_subset`: exactly `int(n * percent)`
+    cells are selected (uniformly at random) in each row, where `n` is the
+    number of candidates in that row.
+
+    Args:
+        rng (np.random.Generator):
+            The random generator to draw from.
+        candidates (np.ndarray):
+            A (rows x columns) boolean matrix of the cells that can be selected.
+        percent (float):
+            The percentage of candidates to select in each row.
+
+    Returns:
+        A boolean matrix of the same shape, marking the selected cells.
+    """
+    mask = np.zeros(candidates.shape, dtype=bool)
+    rows, cols = candidates.shape
+    if not rows or not cols or percent == 0:
+        return mask
+
+    chunk = max(1, CHUNK_CELLS // cols)
+    for start in range(0, rows, chunk):
+        cand = candidates[start : start + chunk]
+        k = (cand.sum(axis=1) * percent).astype(int)
+        # non-candidates get keys larger than any candidate, so they are never
+        # among the k smallest
+        keys = rng.random(cand.shape)
+        keys[~cand] = 2.0
+        if (k == k[0]).all():
+            if k[0] == 0:
+                continue
+            selected = np.argpartition(keys, k[0] - 1, axis=1)[:, : k[0]]
+            np.put_along_axis(mask[start : start + chunk], selected, True, axis=1)
+        else:
+            order = np.argsort(keys, axis=1)
+            ranked = np.arange(cols) < k[:, None]
+            np.put_along_axis(mask[start : start + chunk], order, ranked, axis=1)
+    return mask
+
+
+class LazyObservedTrace(Sequence):
+    """A tokenized trace whose tokens are only created when accessed.
+
+    A `list`-like object holding the (masked) trace matrices produced by a
+    `BatchTokenizer`. Each token is materialised the first time it is accessed
+    and reused afterwards, so changes made to a token are kept. If the source
+    states of the trace are available, token states are `MaskedState` views of
+    them rather than copies.
+
+    Attributes:
+        Token (Type[Observation]):
+            The type of the tokens.
+        fluents (List[Fluent]):
+            The fluents corresponding to the columns of the matrices.
+        actions (List[Action | None]):
+            The action of each step.
+        values (np.ndarray):
+            The (steps x fluents) boolean matrix of observed fluent values.
+        hidden (np.ndarray | None):
+            The (steps x fluents) boolean matrix of hidden fluents, or None if
+            the states are not observed at all.
+        states (List[State] | None):
+            The source state of each step, if available.
+        changed (np.ndarray | None):
+            The (steps x fluents) boolean matrix of fluents whose observed value
+            differs from their source value, if the source states are available.
+    """
+
+    def __init__(
+        self,
+        Token: Type[Observation],
+        fluents: List[Fluent],
+        actions: List[Optional[Action]],
+        values: np.ndarray,
+        hidden: Optional[np.ndarray],
+        states: Optional[List[State]] = None,
+        changed: Optional[np.ndarray] = None,
+    ):
+        self.Token = Token
+        self.fluents = fluents
+        self.actions = actions
+        self.values = values
+        self.hidden = hidden
+        self.states = states
+        self.changed = changed
+        self._tokens: List[Optional[Observation]] = [None] * len(actions)
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self)))]
+        token = self._tokens[key]
+        if token is None:
+            token = self._tokens[key] = self._materialise(key % len(self))
+        return token
+
+    def _materialise(self, i: int) -> Observation:
+        """Creates the token for step `i` from the trace matrices."""
+        Token = self.Token
+        action = self.actions[i]
+        atomic = issubclass(Token, AtomicPartialObservation)
+        if action is not None:
+            action = action.clone(atomic=atomic)
+
+        if self.hidden is None or issubclass(Token, ActionObservation):
+            state = None
+        elif self.states is not None:
+            fluents = self.fluents
+            hidden = []
+            if issubclass(Token, PartialObservation):
+                hidden = [fluents[j] for j in np.flatnonzero(self.hidden[i]).tolist()]
+            flipped = [fluents[j] for j in np.flatnonzero(self.changed[i]).tolist()]
+            state = MaskedState(self.states[i], hidden=hidden, flipped=flipped)
+            if atomic:
+                state = state.clone(atomic=True)
+        else:
+            values = self.values[i].tolist()
+            if issubclass(Token, PartialObservation):
+                for j in np.flatnonzero(self.hidden[i]).tolist():
+                    values[j] = None
+            if atomic:
+                state = AtomicState(dict(zip(map(str, self.fluents), values)))
+            elif issubclass(Token, PartialObservation):
+                state = PartialState(dict(zip(self.fluents, values)))
+            else:
+                state = State(dict(zip(self.fluents, values)))
+
+        # NOTE: step indices start at 1
+        return Token._from_parts(i + 1, state, action)
+
+
+class BatchTokenizer:
+    """Tokenizes whole traces at once.
+
+    Instead of tokenizing step by step, the states of a trace are converted to a
+    (steps x fluents) boolean matrix, and the hiding and noise masks of the
+    token type are drawn for every step in one pass using NumPy. Tokens are only
+    created when accessed (see `LazyObservedTrace`).
+
+    The masks follow the same distribution as step-level tokenization. Given a
+    seed, the masks drawn for a trace only depend on the seed and the position
+    of the trace in the `TraceList`, so tokenization is reproducible.
+
+    Supports `IdentityObservation`, `ActionObservation`, `PartialObservation`,
+    `AtomicPartialObservation`, `NoisyObservation`, and
+    `NoisyPartialObservation` tokens.
+
+    Attributes:
+        Token (Type[Observation]):
+            The type of token to create.
+        seed (np.random.SeedSequence):
+            The seed sequence the per-trace random generators are derived from.
+        percent_missing (float):
+            The percentage of fluents to randomly hide in each step.
+        hide (Set[Fluent]):
+            The set of fluents to explicitly hide in each step.
+        percent_noisy (float):
+            The percentage of visible fluents to randomly make noisy in each step.
+        replace (bool):
+            Option to replace noisy fluents with the values of other visible
+            fluents instead of just flipping their values.
+    """
+
+    def __init__(
+        self,
+        Token: Type[Observation],
+        seed: Optional[int] = None,
+        percent_missing: float = 0,
+        hide: Set[Fluent] = None,
+        percent_noisy: float = 0,
+        replace: bool = False,
+    ):
+        """Initializes a BatchTokenizer for the given token type.
+
+        Args:
+            Token (Type[Observation]):
+                The type of token to create.
+            seed (int):
+                Optional; The seed used to draw the masks.
+            percent_missing (float):
+                The percentage of fluents to randomly hide in each step. Only
+                valid for partial observation tokens.
+            hide (Set[Fluent]):
+                The set of fluents to explicitly hide in each step. Only valid
+                for partial observation tokens.
+            percent_noisy (float):
+                The percentage of visible fluents to randomly make noisy in each
+                step. Only valid for noisy observation tokens.
+            replace (bool):
+                Option to replace noisy fluents with the values of other visible
+                fluents instead of just flipping their values. Only valid for
+                noisy observation tokens.
+
+        Raises:
+            TokenizationError:
+                Raised if the token type must be tokenized at the trace list
+                level.
+            PercentError:
+                Raised if a percentage supplied is invalid.
+        """
+        if issubclass(Token, NoisyPartialDisorderedParallelObservation):
+            raise TokenizationError(Token)
+        supported = (
+            IdentityObservation,
+            ActionObservation,
+            PartialObservation,
+            NoisyObservation,
+        )
+        if not issubclass(Token, supported):
+            raise TypeError(f"Cannot batch tokenize {Token.__name__} tokens.")
+        if (percent_missing or hide) and not issubclass(Token, PartialObservation):
+            raise TypeError(f"{Token.__name__} tokens cannot hide fluents.")
+        if (percent_noisy or replace) and not issubclass(Token, NoisyObservation):
+            raise TypeError(f"{Token.__name__} tokens cannot add noise.")
+        for percent in (percent_missing, percent_noisy):
+            if percent > 1 or percent < 0:
+                raise PercentError()
+
+        self.Token = Token
+        self.seed = np.random.SeedSequence(seed)
+        self.percent_missing = percent_missing
+        self.hide = hide if hide is not None else set()
+        self.percent_noisy = percent_noisy
+        self.replace = replace
+
+    def trace_rng(self, trace_index: int) -> np.random.Generator:
+        """Returns the random generator used to tokenize the trace at the given
+        position of a `TraceList`.
+        """
+        return np.random.default_rng(
+            np.random.SeedSequence(self.seed.entropy, spawn_key=(trace_index,))
+        )
+
+    def tokenize(
+        self, traces: Union[Trace, TraceList]
+    ) -> Union[LazyObservedTrace, ObservedTraceList]:
+        """Tokenizes a trace, or every trace in a trace list.
+
+        Args:
+            traces (Trace | TraceList):
+                The trace or traces to tokenize.
+
+        Returns:
+            A `LazyObservedTrace` if a single trace was given, otherwise an
+            `ObservedTraceList` of `LazyObservedTrace`s.
+        """
+        from ..trace import Trace
+
+        if isinstance(traces, Trace):
+            return self.tokenize_trace(traces)
+
+        obs_tracelist = ObservedTraceList()
+        obs_tracelist.type = self.Token
+        obs_tracelist.observations = [
+            self.tokenize_trace(trace, i) for i, trace in enumerate(traces)
+        ]
+        return obs_tracelist
+
+    def tokenize_trace(self, trace: Trace, trace_index: int = 0) -> LazyObservedTrace:
+        """Tokenizes a single trace.
+
+        Args:
+            trace (Trace):
+                The trace to tokenize.
+            trace_index (int):
+                Optional; The position of the trace in its `TraceList`, used to
+                derive its random generator. Defaults to 0.
+
+        Returns:
+            The tokenized trace.
+        """
+        matrix, fluents = trace.to_matrix()
+        actions = [step.action for step in trace]
+        states = [step.state for step in trace]
+        return self.tokenize_matrix(matrix, fluents, actions, trace_index, states)
+
+    def tokenize_matrix(
+        self,
+        matrix: np.ndarray,
+        fluents: List[Fluent],
+        actions: List[Optional[Action]],
+        trace_index: int = 0,
+        states: Optional[List[State]] = None,
+    ) -> LazyObservedTrace:
+        """Tokenizes a trace given in matrix form.
+
+        Args:
+            matrix (np.ndarray):
+                The (steps x fluents) boolean matrix of fluent values.
+            fluents (List[Fluent]):
+                The fluents corresponding to the columns of the matrix.
+            actions (List[Action | None]):
+                The action of each step.
+            trace_index (int):
+                Optional; The position of the trace in its `TraceList`, used to
+                derive its random generator. Defaults to 0.
+            states (List[State]):
+                Optional; The source state of each step. If given, token states
+                are views of these states instead of copies.
+
+        Returns:
+            The tokenized trace.
+        """
+        rng = self.trace_rng(trace_index)
+        values = np.array(matrix, dtype=bool)
+        hidden = np.zeros(values.shape, dtype=bool)
+
+        # a fully hidden state is not observed at all (see PartialObservation)
+        if self.percent_missing == 1:
+            return LazyObservedTrace(self.Token, fluents, actions, values, None, states)
+
+        if self.percent_missing:
+            hidden |= random_subset_mask(
+                rng, np.ones(values.shape, dtype=bool), self.percent_missing
+            )
+        if self.hide:
+            hidden[:, [j for j, f in enumerate(fluents) if f in self.hide]] = True
+
+        # hidden fluents cannot be made noisy
+        if self.percent_noisy:
+            visible = ~hidden
+            noisy = random_subset_mask(rng, visible, self.percent_noisy)
+            if not self.replace:
+                values ^= noisy
+            else:
+                # replace each noisy fluent with the value of a random visible
+                # fluent in the same step
+                rows, cols = np.nonzero(noisy)
+                vis_flat = np.flatnonzero(visible)
+                num_visible = visible.sum(axis=1)
+                row_starts = np.concatenate(([0], np.cumsum(num_visible)[:-1]))
+                offsets = (rng.random(len(rows)) * num_visible[rows]).astype(int)
+                sources = vis_flat[row_starts[rows] + offsets]
+                values[rows, cols] = values.flat[sources]
+
+        changed = None if states is None else values != matrix
+        return LazyObservedTrace(
+            self.Token, fluents, actions, values, hidden, states, changed
+        )
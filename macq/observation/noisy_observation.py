@@ -1,6 +1,6 @@
 import random
 from . import Observation
-from ..trace import Step
+from ..trace import Step, MaskedState
 from ..utils import PercentError
 
 
@@ -32,9 +32,7 @@ class NoisyObservation(Observation):
         if percent_noisy > 1 or percent_noisy < 0:
             raise PercentError()
 
-        step = self.random_noisy_subset(step, percent_noisy, replace)
-
-        self.state = step.state.clone()
+        self.state = self.random_noisy_subset(step, percent_noisy, replace).state
         self.action = None if step.action is None else step.action.clone()
 
     def random_noisy_subset(
@@ -43,6 +41,9 @@ class NoisyObservation(Observation):
         """Generates a random subset of fluents corresponding to the percent provided
         and flips their value to create noise.
 
+        The step's state is not copied; the new state is a view of it storing only
+        the noisy fluents.
+
         Args:
             step (Step):
                 The step associated with this observation.
@@ -55,21 +56,15 @@ class NoisyObservation(Observation):
         Returns:
             A new `Step` with the noisy fluents in place.
         """
+        state = step.state
         # hidden fluents cannot be made noisy; only use visible fluents
-        state = step.state.clone()
-        invisible_f = {f for f in state if state[f] is None}
-        visible_f = state.clone()
-        for f in invisible_f:
-            del visible_f[f]
+        visible_f = [f for f, v in state.items() if v is not None]
         noisy_f = self.extract_fluent_subset(visible_f, percent_noisy)
         if not replace:
-            for f in state:
-                state[f] = not state[f] if f in noisy_f else state[f]
+            state = MaskedState(state, flipped=noisy_f)
         else:
-            for f in state:
-                state[f] = (
-                    state[random.choice(list(visible_f.keys()))]
-                    if f in noisy_f
-                    else state[f]
-                )
+            state = MaskedState(
+                state,
+                overrides={f: state[random.choice(visible_f)] for f in noisy_f},
+            )
         return Step(state, step.action, step.index)
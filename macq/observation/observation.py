@@ -64,6 +64,30 @@ class Observation:
         action = self.action.details() if self.action else ""
         return (ind, state, action)
 
+    @classmethod
+    def _from_parts(
+        cls, index: int, state: Union[State, None], action: Union[Action, None]
+    ):
+        """Creates a token directly from an already tokenized state and action,
+        bypassing the per-step tokenization done in `__init__`.
+
+        Args:
+            index (int):
+                The index of the associated step in its trace.
+            state (State | None):
+                The (already tokenized) state of the token.
+            action (Action | None):
+                The (already tokenized) action of the token.
+
+        Returns:
+            A token of type `cls`.
+        """
+        token = cls.__new__(cls)
+        token.index = index
+        token.state = state
+        token.action = action
+        return token
+
     def _matches(self, *_):
         raise NotImplementedError()
 
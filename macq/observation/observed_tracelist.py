@@ -1,9 +1,14 @@
 from __future__ import annotations
+import random
 from collections import defaultdict
 from collections.abc import MutableSequence
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import get_all_start_methods, get_context
 from warnings import warn
-from typing import Callable, Dict, List, Type, Set, TYPE_CHECKING
+from typing import Any, Callable, Dict, Iterator, List, Type, Set, TYPE_CHECKING
 from inspect import cleandoc
+import numpy as np
 from rich.console import Console
 from rich.table import Table
 from rich.text import Text
@@ -36,6 +41,37 @@ class TokenTypeMismatch(Exception):
         super().__init__(message)
 
 
+def trace_seed(seed: int, trace_index: int) -> int:
+    """Derives the seed used to tokenize the trace at the given position of a
+    `TraceList`, so each trace is tokenized the same way regardless of which
+    process tokenizes it.
+
+    Args:
+        seed (int):
+            The seed of the whole tokenization.
+        trace_index (int):
+            The position of the trace in the `TraceList`.
+
+    Returns:
+        The seed for the trace.
+    """
+    seq = np.random.SeedSequence(seed, spawn_key=(trace_index,))
+    return int(seq.generate_state(1)[0])
+
+
+# the observation list tokenizing traces in a worker process (see `_init_worker`)
+_worker_obs_lists = None
+
+
+def _init_worker(obs_lists: ObservedTraceList):
+    global _worker_obs_lists
+    _worker_obs_lists = obs_lists
+
+
+def _tokenize_in_worker(trace, seed: int, kwargs: dict):
+    return _worker_obs_lists._tokenize_seeded(trace, seed, **kwargs)
+
+
 class ObservedTraceList(MutableSequence):
     """A sequence of observations.
 
@@ -128,11 +164,82 @@ class ObservedTraceList(MutableSequence):
                     fluents.update(list(obs.state.keys()))
         return fluents
 
-    def tokenize(self, trace_list: TraceList, **kwargs):
-        for trace in trace_list:
-            tokens = trace.tokenize(self.type, **kwargs)
+    def tokenize(
+        self,
+        trace_list: TraceList,
+        workers: int = None,
+        seed: int = None,
+        **kwargs,
+    ):
+        """Tokenizes the traces in the trace list, appending them in order.
+
+        Args:
+            trace_list (TraceList):
+                The traces to tokenize.
+            workers (int):
+                Optional; The number of processes to tokenize traces in. By
+                default, traces are tokenized serially in this process.
+            seed (int):
+                Optional; The seed used to tokenize the traces. Each trace is
+                tokenized with its own seed derived from this seed and its
+                position (see `trace_seed`), so the result is the same for any
+                number of workers.
+            **kwargs:
+                Any extra arguments to be supplied to the Token __init__.
+        """
+        for tokens in self._tokenize_traces(trace_list, workers, seed, **kwargs):
             self.append(tokens)
 
+    def _tokenize_trace(self, trace, **kwargs) -> Any:
+        """Tokenizes a single trace."""
+        return trace.tokenize(self.type, **kwargs)
+
+    def _tokenize_seeded(self, trace, seed: int, **kwargs) -> Any:
+        """Tokenizes a single trace after seeding the random number generator. The
+        state of the generator is restored afterwards, so seeding does not affect
+        the caller's later use of `random`."""
+        state = random.getstate()
+        random.seed(seed)
+        try:
+            return self._tokenize_trace(trace, **kwargs)
+        finally:
+            random.setstate(state)
+
+    def _tokenize_traces(
+        self, trace_list: TraceList, workers: int, seed: int, **kwargs
+    ) -> Iterator[Any]:
+        """Tokenizes the traces in the trace list, possibly in a process pool.
+
+        Yields:
+            The result of `_tokenize_trace` for each trace, in order.
+        """
+        parallel = workers is not None and workers > 1
+        if seed is None and not parallel:
+            for trace in trace_list:
+                yield self._tokenize_trace(trace, **kwargs)
+            return
+
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        seeds = [trace_seed(seed, i) for i in range(len(trace_list))]
+        if not parallel:
+            for trace, s in zip(trace_list, seeds):
+                yield self._tokenize_seeded(trace, s, **kwargs)
+            return
+
+        # forked workers share this process' hash seed, so sets of fluents and
+        # actions are iterated in the same order as in a serial run
+        context = get_context("fork") if "fork" in get_all_start_methods() else None
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self,),
+        ) as executor:
+            yield from executor.map(
+                _tokenize_in_worker, trace_list, seeds, repeat(kwargs)
+            )
+
     def fetch_observations(self, query: dict) -> List[Set[Observation]]:
         matches: List[Set[Observation]] = []
         for i, obs_trace in enumerate(self.observations):
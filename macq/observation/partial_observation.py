@@ -1,8 +1,8 @@
 from warnings import warn
 from typing import Set
 from ..utils import PercentError
-from ..trace import Step, Fluent
-from ..trace import PartialState
+from ..trace import Step, Fluent, State
+from ..trace import MaskedState
 from . import Observation, InvalidQueryParameter
 
 
@@ -39,12 +39,12 @@ class PartialObservation(Observation):
         # This allows ARMS (and other algorithms) to skip steps when there is no
         # state information available without having to check every mapping in
         # the state (slow in large domains).
-        if percent_missing < 1:
-            step = self.hide_random_subset(step, percent_missing)
-        if hide:
-            step = self.hide_subset(step, hide)
-
-        self.state = None if percent_missing == 1 else step.state.clone()
+        # The state is a view of the step's state, storing only the hidden fluents.
+        self.state = (
+            None
+            if percent_missing == 1
+            else self.hide_fluents(step.state, percent_missing, hide)
+        )
         self.action = None if step.action is None else step.action.clone()
 
     def __eq__(self, other):
@@ -54,6 +54,33 @@ class PartialObservation(Observation):
             and self.action == other.action
         )
 
+    def hide_fluents(
+        self, state: State, percent_missing: float = 0, hide: Set[Fluent] = None
+    ):
+        """Hides a random subset of the fluents in the state, as well as the
+        specified set of fluents.
+
+        The state is not copied; a view of it storing only the hidden fluents is
+        returned instead.
+
+        Args:
+            state (State):
+                The state to hide fluents in.
+            percent_missing (float):
+                The percentage of fluents to randomly hide (0-1).
+            hide (Set[Fluent]):
+                Optional; The set of fluents that will be hidden.
+
+        Returns:
+            A `MaskedState` view of the state with the fluents hidden.
+        """
+        if not isinstance(state, State):
+            state = State(state)
+        hidden = set(self.extract_fluent_subset(state, percent_missing))
+        if hide:
+            hidden.update(f for f in hide if state.has_key(f))
+        return MaskedState(state, hidden=hidden)
+
     def hide_random_subset(self, step: Step, percent_missing: float):
         """Hides a random subset of the fluents in the step.
         Args:
@@ -62,13 +89,11 @@ class PartialObservation(Observation):
             percent_missing (float):
                 The percentage of fluents to hide (0-1).
         Returns:
-            A Step whose state is a PartialState with the random fluents hidden.
+            A Step whose state is a view of the step's state with the random
+            fluents hidden.
         """
-        new_fluents = {}
-        hidden_f = self.extract_fluent_subset(step.state, percent_missing)
-        for f in step.state:
-            new_fluents[f] = None if f in hidden_f else step.state[f]
-        return Step(PartialState(new_fluents), step.action, step.index)
+        state = self.hide_fluents(step.state, percent_missing)
+        return Step(state, step.action, step.index)
 
     def hide_subset(self, step: Step, hide: Set[Fluent]):
         """Hides the specified set of fluents in the observation.
@@ -78,12 +103,11 @@ class PartialObservation(Observation):
             hide (Set[Fluent]):
                 The set of fluents that will be hidden.
         Returns:
-            A Step whose state is a PartialState with the specified fluents hidden.
+            A Step whose state is a view of the step's state with the specified
+            fluents hidden.
         """
-        new_fluents = {}
-        for f in step.state.fluents:
-            new_fluents[f] = None if f in hide else step.state[f]
-        return Step(PartialState(new_fluents), step.action, step.index)
+        state = self.hide_fluents(step.state, hide=hide)
+        return Step(state, step.action, step.index)
 
     def _matches(self, key: str, value: str):
         if key == "action":
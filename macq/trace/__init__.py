@@ -2,6 +2,7 @@ from .action import Action, PlanningObject
 from .fluent import Fluent
 from .state import State
 from .partial_state import PartialState
+from .masked_state import MaskedState
 from .step import Step
 from .trace import Trace, SAS
 from .trace_list import TraceList
@@ -17,6 +18,7 @@ __all__ = [
     "Fluent",
     "State",
     "PartialState",
+    "MaskedState",
     "Step",
     "Trace",
     "SAS",
@@ -1,9 +1,11 @@
+from collections.abc import Mapping
 from dataclasses import dataclass
-from math import exp
-from numpy import dot
-from random import random
-from typing import Callable, Type, Set, List
-from . import TraceList, Step, Action, PartialState, State
+from functools import cached_property
+from itertools import chain
+from random import getrandbits
+from typing import Callable, Dict, Optional, Type, Set, List
+import numpy as np
+from . import Trace, TraceList, Step, Action, Fluent, PartialState
 from ..observation import Observation, ObservedTraceList
 
 
@@ -44,7 +46,7 @@ def default_theta_vec(k: int):
     Returns:
         The default theta vector.
     """
-    return [(1 / k)] * k
+    return [1 / k] * k
 
 
 def objects_shared_feature(act_x: Action, act_y: Action):
@@ -82,17 +84,93 @@ def num_parameters_feature(act_x: Action, act_y: Action):
     return 1 if len(act_x.obj_params) == len(act_y.obj_params) else 0
 
 
-def _decision(probability: float):
-    """Makes a decision based on the given probability.
+def objects_shared_matrix(actions: List[Action]) -> np.ndarray:
+    """Vectorised form of `objects_shared_feature`.
 
     Args:
-        probability (float):
-            The probability used to make the decision.
+        actions (List[Action]):
+            The actions to be compared.
+
+    Returns:
+        The |A|x|A| matrix of the number of objects shared by each pair of actions.
+    """
+    objects: Dict = {}
+    rows, cols = [], []
+    for i, act in enumerate(actions):
+        for obj in act.obj_params:
+            rows.append(i)
+            cols.append(objects.setdefault(obj, len(objects)))
+    # counts[i, o] is the number of times object o is a parameter of action i
+    counts = np.zeros((len(actions), len(objects)), dtype=np.float32)
+    np.add.at(counts, (rows, cols), 1)
+    return counts @ counts.T
+
+
+def num_parameters_matrix(actions: List[Action]) -> np.ndarray:
+    """Vectorised form of `num_parameters_feature`.
+
+    Args:
+        actions (List[Action]):
+            The actions to be compared.
+
+    Returns:
+        The |A|x|A| matrix holding 1 for each pair of actions with the same number of
+        parameters, 0 otherwise.
+    """
+    num_params = np.array([len(act.obj_params) for act in actions])
+    return (num_params[:, None] == num_params[None, :]).astype(np.float32)
+
+
+# the default features are evaluated for all action pairs at once
+objects_shared_feature.matrix = objects_shared_matrix
+num_parameters_feature.matrix = num_parameters_matrix
+
+
+def vectorised_feature(matrix: Callable[[List[Action]], np.ndarray]):
+    """Creates a feature function from its vectorised form.
+
+    A vectorised feature takes the list of all actions and returns the |A|x|A|
+    (symmetric) matrix of the feature value of each pair of actions. Pairwise
+    feature functions can also be given a vectorised form by setting their
+    `matrix` attribute.
+
+    Args:
+        matrix (Callable[[List[Action]], np.ndarray]):
+            The vectorised feature.
 
-     Returns:
-        The (bool) decision made.
+    Returns:
+        A feature function taking a pair of actions, with the vectorised form as
+        its `matrix` attribute.
+    """
+
+    def feature(act_x: Action, act_y: Action):
+        return matrix([act_x, act_y])[0, 1]
+
+    feature.matrix = matrix
+    feature.__name__ = getattr(matrix, "__name__", "feature")
+    feature.__doc__ = matrix.__doc__
+    return feature
+
+
+class DisorderProbabilities(Mapping):
+    """A read-only mapping of each `ActionPair` to the probability that its actions
+    are disordered, backed by the probability matrix of a
+    `DisorderedParallelActionsObservationLists`.
     """
-    return random() < probability
+
+    def __init__(self, obs_lists: "DisorderedParallelActionsObservationLists"):
+        self.obs_lists = obs_lists
+
+    def __getitem__(self, pair: ActionPair):
+        act_x, act_y = pair.tup()
+        return self.obs_lists.probability(act_x, act_y)
+
+    def __iter__(self):
+        return iter(self.obs_lists.cross_actions)
+
+    def __len__(self):
+        n = len(self.obs_lists.actions)
+        return n * (n - 1) // 2
 
 
 class DisorderedParallelActionsObservationLists(ObservedTraceList):
@@ -117,16 +195,20 @@ class DisorderedParallelActionsObservationLists(ObservedTraceList):
             The supplied theta vector.
         actions (List[Action]):
             The list of all actions used in the traces given (no duplicates).
+        action_ids (Dict[Action, int]):
+            The index of each action in `actions`, used to index the probability matrix.
         propositions (Set[Fluent]):
             The set of all fluents.
-        cross_actions (List[ActionPair]):
-            The list of all possible `ActionPairs`.
         denominator (float):
             The value used for the denominator in all probability calculations (stored so it doesn't need to be recalculated
             each time).
-        probabilities (Dict[ActionPair, float]):
-            A dictionary that contains a mapping of each possible `ActionPair` and the probability that the actions
-            in them are disordered.
+        probability_matrix (np.ndarray):
+            The |A|x|A| matrix of the probability of each pair of actions (indexed by action id) being disordered.
+        probabilities (DisorderProbabilities):
+            A mapping of each possible `ActionPair` to the probability that the actions in them are disordered.
+        max_distance (Optional[int]):
+            The maximum distance between two parallel action sets for their actions to be disordered, or None if
+            actions can be disordered at any distance.
     """
 
     def __init__(
@@ -135,7 +217,8 @@ class DisorderedParallelActionsObservationLists(ObservedTraceList):
         Token: Type[Observation],
         features: List[Callable],
         learned_theta: List[float],
-        **kwargs
+        max_distance: Optional[int] = None,
+        **kwargs,
     ):
         """AI is creating summary for __init__
 
@@ -145,9 +228,13 @@ class DisorderedParallelActionsObservationLists(ObservedTraceList):
             Token (Type[Observation]):
                 The Token type to be used.
             features (List[Callable]):
-                The list of functions to be used to create the feature vector.
+                The list of functions to be used to create the feature vector. Features with a vectorised form
+                (see `vectorised_feature`) are evaluated for all pairs of actions at once.
             learned_theta (List[float]):
                 The supplied theta vector.
+            max_distance (Optional[int]):
+                Optional; The maximum distance between two parallel action sets for their actions to be disordered.
+                By default, actions can be disordered at any distance.
             **kwargs:
                 Any extra arguments to be supplied to the Token __init__.
         """
@@ -157,6 +244,7 @@ class DisorderedParallelActionsObservationLists(ObservedTraceList):
         self.all_states = []
         self.features = features
         self.learned_theta = learned_theta
+        self.max_distance = max_distance
         actions = {step.action for trace in traces for step in trace if step.action}
         # cast to list for iteration purposes
         self.actions = list(actions)
@@ -164,60 +252,73 @@ class DisorderedParallelActionsObservationLists(ObservedTraceList):
         self.propositions = {
             f for trace in traces for step in trace for f in step.state.fluents
         }
-        # create |A| (action x action set, no duplicates)
-        self.cross_actions = [
+        self.action_ids = {a: i for i, a in enumerate(self.actions)}
+        # matrix that holds the probabilities of all actions being disordered
+        self.probability_matrix = self._calculate_probability_matrix()
+        self.probabilities = DisorderProbabilities(self)
+        self.tokenize(traces, Token, **kwargs)
+
+    @cached_property
+    def cross_actions(self) -> List[ActionPair]:
+        """The list of all possible `ActionPairs` (action x action set, no duplicates), built on first access."""
+        return [
             ActionPair({self.actions[i], self.actions[j]})
             for i in range(len(self.actions))
             for j in range(i + 1, len(self.actions))
         ]
-        self.denominator = self._calculate_denom()
-        # dictionary that holds the probabilities of all actions being disordered
-        self.probabilities = self._calculate_all_probabilities()
-        self.tokenize(traces, Token, **kwargs)
 
-    @staticmethod
-    def _theta_dot_features_calc(f_vec: List[float], theta_vec: List[float]):
-        """Calculate the dot product of the feature vector and the theta vector, then use that as an exponent
-        for 'e'.
+    def _feature_matrix(self, feature: Callable) -> np.ndarray:
+        """Evaluates a feature for all pairs of actions.
 
         Args:
-            f_vec (List[float]):
-                The feature vector.
-            theta_vec (List[float]):
-                The theta vector.
+            feature (Callable):
+                The feature function. Its vectorised form is used if it has one,
+                otherwise it is evaluated once per pair of actions.
 
         Returns:
-            The result of the calculation.
-        """
-        return exp(dot(f_vec, theta_vec))
-
-    def _calculate_denom(self):
+            The |A|x|A| matrix of feature values, indexed by action id.
         """
-        Calculates and returns the denominator used in probability calculations.
-        """
-        denominator = 0
-        for combo in self.cross_actions:
-            denominator += self._theta_dot_features_calc(
-                self._get_f_vec(*combo.tup()), self.learned_theta
-            )
-        return denominator
-
-    def _get_f_vec(self, act_x: Action, act_y: Action):
-        """Returns the feature vector.
-
-        Args:
-        act_x (Action):
-            The first action to be used in each feature function.
-        act_y (Action):
-            The second action to be used in each feature function.
+        matrix = getattr(feature, "matrix", None)
+        if matrix is not None:
+            return np.asarray(matrix(self.actions), dtype=np.float32)
+        n = len(self.actions)
+        values = np.zeros((n, n), dtype=np.float32)
+        for i in range(n):
+            for j in range(i + 1, n):
+                values[i, j] = values[j, i] = feature(self.actions[i], self.actions[j])
+        return values
+
+    def _calculate_probability_matrix(self):
+        """Calculates the probabilities of all pairs of actions being disordered, i.e.
+        exp(f_vec . theta) / denominator for each pair, where the denominator is the sum
+        of the numerators of all pairs. Also sets `denominator`.
 
         Returns:
-            The full feature vector.
+            The |A|x|A| probability matrix, indexed by action id.
         """
-        return [f(act_x, act_y) for f in self.features]
-
-    def _calculate_probability(self, act_x: Action, act_y: Action):
-        """Calculates the probability of two actions being disordered.
+        if len(self.features) != len(self.learned_theta):
+            raise ValueError(
+                "The theta vector must have the same size as the feature vector."
+            )
+        n = len(self.actions)
+        scores = np.zeros((n, n), dtype=np.float32)
+        for feature, theta in zip(self.features, self.learned_theta):
+            values = self._feature_matrix(feature)
+            values *= theta
+            scores += values
+            del values
+        np.exp(scores, out=scores)
+        # an action is never disordered with itself
+        np.fill_diagonal(scores, 0)
+        # each (unordered) pair appears twice in the symmetric matrix
+        self.denominator = float(scores.sum(dtype=np.float64)) / 2
+        # with fewer than two actions there are no pairs, and no disorders
+        if self.denominator:
+            scores /= self.denominator
+        return scores
+
+    def probability(self, act_x: Action, act_y: Action) -> float:
+        """Returns the probability of two actions being disordered.
 
         Args:
             act_x (Action):
@@ -226,49 +327,98 @@ class DisorderedParallelActionsObservationLists(ObservedTraceList):
                 The second action.
 
         Returns:
-            The probability of two actions being disordered.
+            The probability of the two actions being disordered.
         """
-        # calculate the probability of two given actions being disordered
-        f_vec = self._get_f_vec(act_x, act_y)
-        numerator = self._theta_dot_features_calc(f_vec, self.learned_theta)
-        return numerator / self.denominator
+        return float(
+            self.probability_matrix[self.action_ids[act_x], self.action_ids[act_y]]
+        )
 
-    def _calculate_all_probabilities(self):
-        """Calculates the probabilities of all combinations of actions being disordered.
-
-        Returns:
-            A dictionary that contains a mapping of each possible `ActionPair` and the probability that the actions
-            in them are disordered.
-        """
-        probabilities = {}
-        # access all ActionPairs
-        for combo in self.cross_actions:
-            # calculate probability of act_x and act_y being disordered
-            probabilities[combo] = self._calculate_probability(*combo.tup())
-        return probabilities
-
-    def _get_new_partial_state(self):
+    def _get_partial_state(self, effects: Dict[Fluent, bool]):
         """
-        Return a PartialState with the fluents used in this observation, with each fluent set to None as default.
+        Return a PartialState with the fluents used in this observation, with each fluent set to None as default
+        except for the effects provided.
         """
-        cur_state = PartialState()
-        for f in self.propositions:
-            cur_state[f] = None
-        return cur_state
+        partial_state = PartialState(dict.fromkeys(self.propositions))
+        partial_state.update(effects)
+        return partial_state
 
-    def _update_partial_state(
-        self, partial_state: PartialState, orig_state: State, action: Action
+    def _sample_disorders(
+        self, set_ids: np.ndarray, act_ids: np.ndarray, rng: np.random.Generator
     ):
+        """Samples the pairs of actions of a trace that are disordered.
+
+        An action x in parallel action set i and an action y in a later set j are
+        disordered with probability P(x, y) / (j - i). Rather than drawing a number
+        for every pair, the next candidate pair of each action is found by skipping
+        ahead geometrically, using an upper bound of the probability of all the
+        remaining pairs, and then kept with the ratio of its probability to the
+        bound. The expected cost is linear in the number of actions.
+
+        Args:
+            set_ids (np.ndarray):
+                The (non-decreasing) parallel action set ID of each action.
+            act_ids (np.ndarray):
+                The action ID of each action.
+            rng (np.random.Generator):
+                The random generator used to sample disorders.
+
+        Returns:
+            The (k, l) positions of the disordered pairs of actions, in the order the
+            parallel action sets are compared.
         """
-        Update the provided PartialState with the fluents provided.
-        """
-        new_partial = partial_state.copy()
-        effects = set([e for e in action.add] + [e for e in action.delete])
-        for e in effects:
-            new_partial[e] = orig_state[e]
-        return new_partial
+        n = len(act_ids)
+        p_max = float(self.probability_matrix.max()) if n > 1 else 0
+        if not np.isfinite(p_max) or p_max <= 0:
+            return np.empty((0, 2), dtype=np.intp)
+        num_sets = int(set_ids[-1]) + 1
+        # the position of the first action of each set (and of the end of the trace)
+        set_starts = np.searchsorted(set_ids, np.arange(num_sets + 1))
+        k = np.arange(n)
+        # each action is compared to the actions from the next set on
+        l = set_starts[set_ids + 1]
+        if self.max_distance is None:
+            limit = np.full(n, n)
+        else:
+            limit = set_starts[np.minimum(set_ids + self.max_distance + 1, num_sets)]
+
+        hits = []
+        while True:
+            remaining = l < limit
+            k, l, limit = k[remaining], l[remaining], limit[remaining]
+            if not len(k):
+                break
+            # the probability decreases with distance, so the probability of the
+            # current candidate bounds the probability of all later candidates
+            bound = p_max / (set_ids[l] - set_ids[k])
+            l = l + np.minimum(rng.geometric(bound), n) - 1
+            remaining = l < limit
+            k, l, limit, bound = (
+                k[remaining],
+                l[remaining],
+                limit[remaining],
+                bound[remaining],
+            )
+            prob = self.probability_matrix[act_ids[k], act_ids[l]] / (
+                set_ids[l] - set_ids[k]
+            )
+            keep = rng.random(len(k)) * bound < prob
+            hits.append(np.stack((k[keep], l[keep]), axis=1))
+            l = l + 1
+
+        pairs = np.concatenate(hits) if hits else np.empty((0, 2), dtype=np.intp)
+        order = np.lexsort(
+            (pairs[:, 1], pairs[:, 0], set_ids[pairs[:, 1]], set_ids[pairs[:, 0]])
+        )
+        return pairs[order]
 
-    def tokenize(self, traces: TraceList, Token: Type[Observation], **kwargs):
+    def tokenize(
+        self,
+        traces: TraceList,
+        Token: Type[Observation],
+        workers: int = None,
+        seed: int = None,
+        **kwargs,
+    ):
         """Main driver that handles the tokenization process.
 
         Args:
@@ -276,88 +426,106 @@ class DisorderedParallelActionsObservationLists(ObservedTraceList):
                 The traces to generate tokens from.
             Token (Type[Observation]):
                 The Token type to be used.
+            workers (int):
+                Optional; The number of processes to tokenize traces in. By
+                default, traces are tokenized serially in this process.
+            seed (int):
+                Optional; The seed used to tokenize the traces. The result is
+                the same for any number of workers.
             **kwargs:
                 Any extra arguments to be supplied to the Token __init__.
         """
+        for par_act_sets, states, tokens in self._tokenize_traces(
+            traces, workers, seed, **kwargs
+        ):
+            self.all_par_act_sets.append(par_act_sets)
+            self.all_states.append(states)
+            self.append(tokens)
+
+    def _tokenize_trace(self, trace: Trace, **kwargs):
+        """Tokenizes a single trace.
+
+        Args:
+            trace (Trace):
+                The trace to generate tokens from.
+            **kwargs:
+                Any extra arguments to be supplied to the Token __init__.
+
+        Returns:
+            The parallel action sets of the trace, the states between them, and
+            the tokens generated.
+        """
+        Token = self.type
         # build parallel action sets
-        for trace in traces:
-            par_act_sets = []
-            states = []
-            cur_par_act = set()
-            cur_par_act_conditions = set()
-            # add initial state
-            states.append(trace[0].state)
-
-            cur_state = self._get_new_partial_state()
-
-            # last step doesn't have an action/just contains the state after the last action
-            for i in range(len(trace)):
-                a = trace[i].action
-                if a:
-                    a_conditions = set(
-                        [p for p in a.precond]
-                        + [e for e in a.add]
-                        + [e for e in a.delete]
-                    )
-                    # if the action has any conditions in common with any actions in the previous parallel set (NOT parallel)
-                    if a_conditions.intersection(cur_par_act_conditions) != set():
-                        # add psi_k and s'_k to the final (ordered) lists of parallel action sets and states
-                        par_act_sets.append(cur_par_act)
-                        states.append(cur_state)
-                        # reset the state
-                        cur_state = self._get_new_partial_state()
-                        # reset psi_k (that is, create a new parallel action set)
-                        cur_par_act = set()
-                        # reset the conditions
-                        cur_par_act_conditions = set()
-                    # add the action and state to the appropriate psi_k and s'_k (either the existing ones, or
-                    # new/empty ones if the current action is NOT parallel with actions in the previous set of actions.)
-                    cur_par_act.add(a)
-                    cur_state = self._update_partial_state(
-                        cur_state, trace[i + 1].state, trace[i].action
-                    )
-                    cur_par_act_conditions.update(a_conditions)
-                # if on the last step of the trace, add the current set/state to the final result before exiting the loop
-                if i == len(trace) - 1:
+        par_act_sets = []
+        states = []
+        cur_par_act = set()
+        cur_par_act_conditions = set()
+        # the values of the effects of the current set's actions, after the actions
+        cur_effects = {}
+        # add initial state
+        states.append(trace[0].state)
+
+        # last step doesn't have an action/just contains the state after the last action
+        for i in range(len(trace)):
+            a = trace[i].action
+            if a:
+                a_conditions = set(a.precond).union(a.add, a.delete)
+                # if the action has any conditions in common with any actions in the previous parallel set (NOT parallel)
+                if not cur_par_act_conditions.isdisjoint(a_conditions):
+                    # add psi_k and s'_k to the final (ordered) lists of parallel action sets and states
                     par_act_sets.append(cur_par_act)
-                    states.append(cur_state)
-
-            # generate disordered actions - do trace by trace
-            # prevent going over sets twice
-            for i in range(len(par_act_sets)):
-                # prevent comparing the same sets
-                for j in range(i + 1, len(par_act_sets)):
-                    for act_x in par_act_sets[i]:
-                        for act_y in par_act_sets[j]:
-                            if act_x != act_y:
-                                # get probability and divide by distance
-                                prob = self.probabilities[
-                                    ActionPair({act_x, act_y})
-                                ] / (j - i)
-                                if _decision(prob):
-                                    par_act_sets[i].discard(act_x)
-                                    par_act_sets[i].add(act_y)
-                                    par_act_sets[j].discard(act_y)
-                                    par_act_sets[j].add(act_x)
+                    states.append(self._get_partial_state(cur_effects))
+                    # reset the state
+                    cur_effects = {}
+                    # reset psi_k (that is, create a new parallel action set)
+                    cur_par_act = set()
+                    # reset the conditions
+                    cur_par_act_conditions = set()
+                # add the action and state to the appropriate psi_k and s'_k (either the existing ones, or
+                # new/empty ones if the current action is NOT parallel with actions in the previous set of actions.)
+                cur_par_act.add(a)
+                next_state = trace[i + 1].state
+                for e in chain(a.add, a.delete):
+                    cur_effects[e] = next_state[e]
+                cur_par_act_conditions.update(a_conditions)
+            # if on the last step of the trace, add the current set/state to the final result before exiting the loop
+            if i == len(trace) - 1:
+                par_act_sets.append(cur_par_act)
+                states.append(self._get_partial_state(cur_effects))
+
+        # generate disordered actions - do trace by trace
+        acts = [act for par_act in par_act_sets for act in par_act]
+        set_ids = np.repeat(
+            np.arange(len(par_act_sets)), [len(par_act) for par_act in par_act_sets]
+        )
+        act_ids = np.array([self.action_ids[act] for act in acts], dtype=np.intp)
+        # seeded from the random module so seeded tokenization is reproducible
+        rng = np.random.default_rng(getrandbits(64))
+        for k, l in self._sample_disorders(set_ids, act_ids, rng):
+            acts[k], acts[l] = acts[l], acts[k]
+        set_starts = np.searchsorted(set_ids, np.arange(len(par_act_sets) + 1))
+        par_act_sets = [
+            set(acts[set_starts[i] : set_starts[i + 1]])
+            for i in range(len(par_act_sets))
+        ]
 
-            self.all_par_act_sets.append(par_act_sets)
-            self.all_states.append(states)
-            tokens = []
-            for i in range(len(par_act_sets)):
-                for act in par_act_sets[i]:
-                    tokens.append(
-                        Token(
-                            Step(state=states[i], action=act, index=i),
-                            par_act_set_ID=i,
-                            **kwargs
-                        )
+        tokens = []
+        for i in range(len(par_act_sets)):
+            for act in par_act_sets[i]:
+                tokens.append(
+                    Token(
+                        Step(state=states[i], action=act, index=i),
+                        par_act_set_ID=i,
+                        **kwargs,
                     )
-            # add the final token, with the final state but no action
-            tokens.append(
-                Token(
-                    Step(state=states[-1], action=None, index=len(par_act_sets)),
-                    par_act_set_ID=len(par_act_sets),
-                    **kwargs
                 )
+        # add the final token, with the final state but no action
+        tokens.append(
+            Token(
+                Step(state=states[-1], action=None, index=len(par_act_sets)),
+                par_act_set_ID=len(par_act_sets),
+                **kwargs,
             )
-            self.append(tokens)
+        )
+        return par_act_sets, states, tokens
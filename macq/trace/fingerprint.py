@@ -0,0 +1,101 @@
+"""Content fingerprints of states, actions, steps and traces.
+
+Fingerprints are 64-bit integers. The fingerprint of a state is an
+order-independent sum of the (cached) hashes of its fluent-value pairs, so it
+does not depend on the order the fluents were added in, and those of steps and
+traces are chained with a 64-bit mixing function. Equal contents always have
+equal fingerprints, and different contents have different ones with very high
+probability, so fingerprints can be used to find duplicate traces and
+transitions without comparing them.
+"""
+
+from functools import lru_cache
+from hashlib import blake2b
+from typing import Iterable
+
+MASK = (1 << 64) - 1
+
+# the hash of the "no action" of the last step of a trace
+NO_ACTION = 0x9E3779B97F4A7C15
+
+
+@lru_cache(maxsize=1 << 16)
+def token(text: str) -> int:
+    """Returns the 64-bit hash of a string."""
+    return int.from_bytes(blake2b(text.encode(), digest_size=8).digest(), "little")
+
+
+def mix(h: int, x: int) -> int:
+    """Combines a fingerprint with a value (in an order-dependent way)."""
+    # the splitmix64 finalizer
+    z = (h * 0x100000001B3 + x + 0x9E3779B97F4A7C15) & MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return z ^ (z >> 31)
+
+
+def _value(value) -> int:
+    if value is True:
+        return 1
+    if value is False:
+        return 2
+    if value is None:
+        return 3
+    return token(repr(value))
+
+
+def state_fingerprint(state) -> int:
+    """Returns the fingerprint of a state (any mapping of fluents to values).
+
+    Args:
+        state (State):
+            The state.
+
+    Returns:
+        The 64-bit fingerprint of the fluents and their values.
+    """
+    h = 0
+    for fluent, value in state.items():
+        h += mix(token(str(fluent)), _value(value))
+    return mix(len(state), h & MASK)
+
+
+def action_fingerprint(action) -> int:
+    """Returns the fingerprint of an action (or of no action, for None).
+
+    Args:
+        action (Optional[Action]):
+            The action.
+
+    Returns:
+        The 64-bit fingerprint of the action's name and objects.
+    """
+    return NO_ACTION if action is None else token(str(action))
+
+
+def step_fingerprint(state: int, action: int) -> int:
+    """Returns the fingerprint of a step, from those of its state and action."""
+    return mix(state, action)
+
+
+def transition_fingerprint(pre_state: int, action: int, post_state: int) -> int:
+    """Returns the fingerprint of a (state, action, next state) transition, from
+    those of its states and action."""
+    return mix(mix(pre_state, action), post_state)
+
+
+def chain(fingerprints: Iterable[int], h: int = 0) -> int:
+    """Folds step fingerprints into the fingerprint of a sequence of steps.
+
+    Args:
+        fingerprints (Iterable[int]):
+            The fingerprints of the steps.
+        h (int):
+            Optional; The fingerprint of the preceding steps, to extend.
+
+    Returns:
+        The fingerprint of the sequence.
+    """
+    for x in fingerprints:
+        h = mix(h, x)
+    return h
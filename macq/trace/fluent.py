@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 
 class PlanningObject:
@@ -53,6 +53,8 @@ class Fluent:
             Example: Block A.
     """
 
+    _hash: Optional[int] = None
+
     def __init__(self, name: str, objects: List[PlanningObject]):
         """Initializes a Fluent with a name and a list of objects.
 
@@ -65,9 +67,21 @@ class Fluent:
         self.name = name
         self.objects = objects
 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name != "_hash":
+            # the hash is computed on first use, and again after any change
+            object.__setattr__(self, "_hash", None)
+
+    def __getstate__(self):
+        # string hashes differ between processes
+        return {**self.__dict__, "_hash": None}
+
     def __hash__(self):
         # Order of objects is important!
-        return hash(str(self))
+        if self._hash is None:
+            self._hash = hash(str(self))
+        return self._hash
 
     def __repr__(self):
         return (
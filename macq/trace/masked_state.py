@@ -0,0 +1,194 @@
+from __future__ import annotations
+from typing import Dict, Iterable, Optional, Union
+from . import Fluent, State
+
+
+class MaskedState(State):
+    """A copy-free view of a State where some fluents are hidden or altered.
+
+    The view stores a reference to its source state along with a compact mask:
+    hidden fluents are unknown (None), flipped fluents have the opposite of
+    their source value, and overridden fluents have the value stored in the
+    view. The source state is never modified by the view.
+
+    The values of the view are materialised into a dict when it is first read,
+    and then read like those of a `State`. Assigning or deleting a fluent in
+    the view updates both its overrides and this dict, and the `fluents` of the
+    view are this dict, so changes made to them directly are kept by the view.
+
+    A view aliases its source state: changes to the source made before the view
+    is first read are seen by the view, and those made afterwards are not. The
+    source should therefore not be changed while views of it are in use.
+
+    Attributes:
+        source (State):
+            The state being viewed.
+        hidden (frozenset):
+            The fluents whose value is unknown in this view.
+        flipped (frozenset):
+            The fluents whose value is flipped in this view.
+        overrides (dict):
+            A mapping of the fluents whose value is replaced in this view to
+            their new value.
+    """
+
+    def __init__(
+        self,
+        source: Union[State, Dict[Fluent, Union[bool, None]]],
+        hidden: Iterable[Fluent] = (),
+        flipped: Iterable[Fluent] = (),
+        overrides: Optional[Dict[Fluent, Union[bool, None]]] = None,
+    ):
+        """Initializes a MaskedState over a source state.
+
+        If the source is itself a `MaskedState`, the masks are combined so the
+        new view reads directly from the original state, unless the `fluents`
+        of the source have been accessed (and possibly changed) directly, in
+        which case the new view reads from them.
+
+        Args:
+            source (State | dict):
+                The state to view.
+            hidden (Iterable[Fluent]):
+                Optional; The fluents to hide.
+            flipped (Iterable[Fluent]):
+                Optional; The fluents to flip.
+            overrides (dict):
+                Optional; A mapping of fluents to the values replacing their
+                (flipped or hidden) source values.
+        """
+        overrides = overrides if overrides is not None else {}
+        self._cache: Optional[Dict[Fluent, Union[bool, None]]] = None
+        self._exposed = False
+        if isinstance(source, MaskedState) and source._exposed:
+            # the fluents of the source may have been changed directly
+            source = State(source._cache)
+        if isinstance(source, MaskedState):
+            hidden, flipped, overrides = source._combine(hidden, flipped, overrides)
+            self._removed = set(source._removed)
+            source = source.source
+        else:
+            self._removed = set()
+            if not isinstance(source, State):
+                source = State(source)
+        self.source = source
+        self.hidden = frozenset(hidden)
+        self.flipped = frozenset(flipped)
+        self.overrides = overrides
+
+    def _combine(self, hidden, flipped, overrides):
+        """Combines this view's masks with the masks of a view on top of it."""
+        combined_hidden = set(self.hidden)
+        combined_flipped = set(self.flipped)
+        combined_overrides = dict(self.overrides)
+        for f in flipped:
+            if f in combined_overrides:
+                combined_overrides[f] = not combined_overrides[f]
+            elif f in combined_hidden:
+                combined_overrides[f] = True
+            else:
+                combined_flipped.symmetric_difference_update({f})
+        for f in hidden:
+            combined_overrides.pop(f, None)
+            combined_hidden.add(f)
+        combined_overrides.update(overrides)
+        return combined_hidden, combined_flipped, combined_overrides
+
+    def _values(self) -> Dict[Fluent, Union[bool, None]]:
+        """Returns the values of the view, materialising them on first use."""
+        if self._cache is None:
+            values = self.source.fluents.copy()
+            for f in self.flipped:
+                if f in values:
+                    values[f] = not values[f]
+            for f in self.hidden:
+                if f in values:
+                    values[f] = None
+            for f in self._removed:
+                values.pop(f, None)
+            values.update(self.overrides)
+            self._cache = values
+        return self._cache
+
+    @property
+    def fluents(self):
+        """A mapping of the fluents in this view to their value."""
+        self._exposed = True
+        return self._values()
+
+    @fluents.setter
+    def fluents(self, fluents):
+        self._cache = fluents
+        self._exposed = True
+
+    def __eq__(self, other):
+        if isinstance(other, MaskedState):
+            return self._values() == other._values()
+        return isinstance(other, State) and self._values() == other.fluents
+
+    def __hash__(self):
+        # not cached, as the fluents dict may be changed directly
+        return hash(frozenset(f for f, v in self._values().items() if v))
+
+    def __len__(self):
+        return len(self._values())
+
+    def __getitem__(self, key: Fluent):
+        return self._values()[key]
+
+    def __iter__(self):
+        return iter(self._values())
+
+    def __contains__(self, key):
+        return self._values()[key]
+
+    def copy(self):
+        return self._values().copy()
+
+    def has_key(self, k):
+        return k in self._values()
+
+    def keys(self):
+        return self._values().keys()
+
+    def values(self):
+        return self._values().values()
+
+    def items(self):
+        return self._values().items()
+
+    def __setitem__(self, key: Fluent, value: Union[bool, None]):
+        self.overrides[key] = value
+        self._removed.discard(key)
+        if self._cache is not None:
+            self._cache[key] = value
+
+    def __delitem__(self, key: Fluent):
+        if not self.has_key(key):
+            raise KeyError(key)
+        self.overrides.pop(key, None)
+        if self.source.has_key(key):
+            self._removed.add(key)
+        if self._cache is not None:
+            del self._cache[key]
+
+    def clear(self):
+        self.overrides.clear()
+        self._removed = set(self.source)
+        if self._cache is not None:
+            self._cache.clear()
+
+    def update(self, *args, **kwargs):
+        for f, v in dict(*args, **kwargs).items():
+            self[f] = v
+
+    def clone(self, atomic=False):
+        if atomic:
+            return super().clone(atomic=True)
+        if self._exposed:
+            return MaskedState(State(self._cache.copy()))
+        clone = MaskedState(
+            self.source, self.hidden, self.flipped, dict(self.overrides)
+        )
+        clone._removed = set(self._removed)
+        return clone
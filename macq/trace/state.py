@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Dict
+from typing import Dict, Optional
 from rich.text import Text
 from . import Fluent
 
@@ -10,11 +10,18 @@ class State:
     A dict-like object. Maps `Fluent` objects to boolean values, representing
     the state for a `Step` in a `Trace`.
 
+    States are hashed by the set of fluents that hold in them. The hash is
+    cached, and recomputed after the state is changed through its methods (or
+    its `fluents` are replaced); changing the `fluents` dict in place does not
+    update it.
+
     Attributes:
         fluents (dict):
             A mapping of `Fluent` objects to their value in this state.
     """
 
+    _hash: Optional[int] = None
+
     def __init__(self, fluents: Dict[Fluent, bool] = None):
         """Initializes State with an optional fluent-value mapping.
 
@@ -31,20 +38,33 @@ class State:
     def __str__(self):
         return ", ".join([str(fluent) for (fluent, value) in self.items() if value])
 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name == "fluents":
+            object.__setattr__(self, "_hash", None)
+
+    def __getstate__(self):
+        # string hashes differ between processes
+        return {**self.__dict__, "_hash": None}
+
     def __hash__(self):
-        return hash(str(self.details()))
+        if self._hash is None:
+            self._hash = hash(frozenset(f for f, v in self.items() if v))
+        return self._hash
 
     def __len__(self):
         return len(self.fluents)
 
     def __setitem__(self, key: Fluent, value: bool):
         self.fluents[key] = value
+        self._hash = None
 
     def __getitem__(self, key: Fluent):
         return self.fluents[key]
 
     def __delitem__(self, key: Fluent):
         del self.fluents[key]
+        self._hash = None
 
     def __iter__(self):
         return iter(self.fluents)
@@ -53,6 +73,7 @@ class State:
         return self.fluents[key]
 
     def clear(self):
+        self._hash = None
         return self.fluents.clear()
 
     def copy(self):
@@ -62,6 +83,7 @@ class State:
         return k in self.fluents
 
     def update(self, *args, **kwargs):
+        self._hash = None
         return self.fluents.update(*args, **kwargs)
 
     def keys(self):
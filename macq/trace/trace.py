@@ -1,12 +1,21 @@
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import List, Type, Iterable, Callable, Set
+from typing import List, Optional, Tuple, Type, Iterable, Callable, Set
 from inspect import cleandoc
 from warnings import warn
+import numpy as np
 from rich.table import Table
 from rich.text import Text
 from rich.console import Console
-from . import Action, Step, State
+from . import Action, Fluent, Step, State
+from .fingerprint import (
+    action_fingerprint,
+    chain,
+    mix,
+    state_fingerprint,
+    step_fingerprint,
+    transition_fingerprint,
+)
 from ..observation import Observation, NoisyPartialDisorderedParallelObservation
 from ..utils import TokenizationError
 
@@ -18,11 +27,7 @@ class SAS:
     post_state: State
 
     def __hash__(self):
-        return hash(
-            str(self.pre_state.details())
-            + self.action.details()
-            + str(self.post_state.details())
-        )
+        return hash((self.pre_state, self.action, self.post_state))
 
 
 class Trace:
@@ -55,6 +60,10 @@ class Trace:
         """
         self.steps = steps if steps is not None else []
         self.__reinit_actions_and_fluents()
+        # the (state, action) fingerprints of the steps, and the fingerprint of the
+        # trace, computed on demand and extended as steps are appended
+        self._step_fingerprints: Optional[List[Tuple[int, int]]] = None
+        self._fingerprint: Optional[int] = None
 
     def __eq__(self, other):
         return isinstance(other, Trace) and self.steps == other.steps
@@ -64,12 +73,14 @@ class Trace:
 
     def __setitem__(self, key: int, value: Step):
         self.steps[key] = value
+        self.__invalidate_fingerprints()
 
     def __getitem__(self, key: int):
         return self.steps[key]
 
     def __delitem__(self, key: int):
         del self.steps[key]
+        self.__invalidate_fingerprints()
 
     def __iter__(self):
         return iter(self.steps)
@@ -83,11 +94,19 @@ class Trace:
     def append(self, step: Step):
         self.steps.append(step)
         self.__update_actions_and_fluents(step)
+        if self._step_fingerprints is not None:
+            fingerprints = (
+                state_fingerprint(step.state),
+                action_fingerprint(step.action),
+            )
+            self._step_fingerprints.append(fingerprints)
+            self._fingerprint = mix(self._fingerprint, step_fingerprint(*fingerprints))
 
     def clear(self):
         self.steps.clear()
         self.fluents = set()
         self.actions = set()
+        self.__invalidate_fingerprints()
 
     def copy(self):
         return self.steps.copy()
@@ -96,9 +115,8 @@ class Trace:
         return self.steps.count(value)
 
     def extend(self, iterable: Iterable[Step]):
-        self.steps.extend(iterable)
         for step in iterable:
-            self.__update_actions_and_fluents(step)
+            self.append(step)
 
     def index(self, value: Step):
         return self.steps.index(value)
@@ -106,21 +124,72 @@ class Trace:
     def insert(self, index: int, item: Step):
         self.steps.insert(index, item)
         self.__update_actions_and_fluents(item)
+        self.__invalidate_fingerprints()
 
     def pop(self):
         result = self.steps.pop()
         self.__reinit_actions_and_fluents()
+        self.__invalidate_fingerprints()
         return result
 
     def remove(self, value: Step):
         self.steps.remove(value)
         self.__reinit_actions_and_fluents()
+        self.__invalidate_fingerprints()
 
     def reverse(self):
         self.steps.reverse()
+        self.__invalidate_fingerprints()
 
     def sort(self, reverse: bool = False, key: Callable = lambda e: e.action.cost):
         self.steps.sort(reverse=reverse, key=key)
+        self.__invalidate_fingerprints()
+
+    def __invalidate_fingerprints(self):
+        self._step_fingerprints = None
+        self._fingerprint = None
+
+    def step_fingerprints(self) -> List[Tuple[int, int]]:
+        """Retrieves the fingerprints of the states and actions of the steps in this trace
+        (see `macq.trace.fingerprint`). They are computed once, and extended as steps are
+        appended; modifying the states or actions of steps in place is not detected.
+
+        Returns:
+            The (state, action) fingerprints of the steps.
+        """
+        if self._step_fingerprints is None:
+            self._step_fingerprints = [
+                (state_fingerprint(step.state), action_fingerprint(step.action))
+                for step in self.steps
+            ]
+            self._fingerprint = chain(
+                step_fingerprint(*f) for f in self._step_fingerprints
+            )
+        return self._step_fingerprints
+
+    def fingerprint(self) -> int:
+        """Retrieves the fingerprint of the contents of this trace: traces with the same
+        states and actions (in the same order) have the same fingerprint.
+
+        Returns:
+            The 64-bit fingerprint of the trace.
+        """
+        self.step_fingerprints()
+        return self._fingerprint
+
+    def transition_fingerprints(self) -> List[int]:
+        """Retrieves the fingerprints of the (state, action, next state) transitions in
+        this trace.
+
+        Returns:
+            The fingerprints of the transitions, in order.
+        """
+        fingerprints = self.step_fingerprints()
+        return [
+            transition_fingerprint(state, action, fingerprints[i + 1][0])
+            for i, (state, action) in enumerate(fingerprints[:-1])
+            if self.steps[i].action is not None
+        ]
 
     def details(self, wrap=False):
         indent = " " * 2
@@ -396,6 +465,39 @@ class Trace:
         """
         return len(self.get_steps(action)) / len(self)
 
+    def to_matrix(
+        self, fluents: Optional[List[Fluent]] = None
+    ) -> Tuple[np.ndarray, List[Fluent]]:
+        """Converts the states of this trace into a boolean matrix.
+
+        Row `i` of the matrix holds the state of step `i`, and column `j` holds
+        the value of `fluents[j]` across the trace. Fluents missing from a
+        step's state (or with an unknown value) are treated as false.
+
+        Args:
+            fluents (List[Fluent]):
+                Optional; The fluents to use as columns, in order. Defaults to
+                the fluents of the first step's state, followed by any other
+                fluents in the trace in sorted order.
+
+        Returns:
+            The (steps x fluents) boolean matrix, and the list of fluents
+            corresponding to its columns.
+        """
+        if fluents is None:
+            fluents = list(self[0].state.keys()) if self.steps else []
+            fluents.extend(sorted(self.fluents.difference(fluents)))
+        matrix = np.zeros((len(self), len(fluents)), dtype=bool)
+        for i, step in enumerate(self):
+            state = step.state.fluents
+            # generated states share the same fluent ordering, so the values
+            # can be copied directly without looking each fluent up
+            if len(state) == len(fluents) and list(state) == fluents:
+                matrix[i] = np.fromiter(state.values(), dtype=bool, count=len(state))
+            else:
+                matrix[i] = [bool(state.get(f)) for f in fluents]
+        return matrix, fluents
+
     def tokenize(self, Token: Type[Observation], **kwargs):
         """Tokenizes the steps in this trace.
 
@@ -1,5 +1,5 @@
 from collections.abc import MutableSequence
-from typing import Callable, List, Type, Union
+from typing import Callable, Iterator, List, Type, Union
 from warnings import warn
 
 from ..observation import Observation, ObservedTraceList
@@ -88,6 +88,51 @@ class TraceList(MutableSequence):
 
         self.traces.extend([self.generator() for _ in range(num)])
 
+    def fingerprints(self) -> List[int]:
+        """Retrieves the content fingerprints of the traces (see `Trace.fingerprint`).
+        Each trace computes its fingerprint once, extending it as steps are appended.
+
+        Returns:
+            The 64-bit fingerprint of each trace.
+        """
+        return [trace.fingerprint() for trace in self.traces]
+
+    def unique(self) -> Iterator[Trace]:
+        """Iterates over the traces, skipping the duplicates (traces with the same states
+        and actions as an earlier one).
+
+        Returns:
+            An iterator over the first occurrence of each distinct trace.
+        """
+        seen = set()
+        for trace in self.traces:
+            fingerprint = trace.fingerprint()
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                yield trace
+
+    def dedupe(self) -> int:
+        """Removes the duplicate traces, keeping the first occurrence of each.
+
+        Returns:
+            The number of traces removed.
+        """
+        unique = list(self.unique())
+        removed = len(self.traces) - len(unique)
+        self.traces[:] = unique
+        return removed
+
+    def unique_transitions(self) -> int:
+        """Counts the distinct (state, action, next state) transitions in the traces.
+
+        Returns:
+            The number of distinct transitions.
+        """
+        transitions = set()
+        for trace in self.traces:
+            transitions.update(trace.transition_fingerprints())
+        return len(transitions)
+
     def get_usage(self, action: Action):
         """Calculates how often an action was performed in each of the traces.
 
@@ -131,6 +176,10 @@ class TraceList(MutableSequence):
                 for the steps.
             ObsLists (Type[ObservationLists]):
                 The type of `ObservationLists` to be used. Defaults to the base `ObservationLists`.
+            **kwargs (keyword arguments):
+                Keyword arguments to pass into the `ObservationLists` tokenization,
+                such as `workers` (the number of processes to tokenize traces in)
+                and `seed`, followed by any arguments for the Token.
         """
         return ObsLists(self, Token, **kwargs)
 
@@ -5,6 +5,17 @@ from .trace_errors import InvalidPlanLength, InvalidNumberOfTraces
 from .trace_utils import set_num_traces, set_plan_length
 from .tokenization_errors import TokenizationError
 from .progress import progress
+from .solvers import (
+    SolverResult,
+    MaxSATEngine,
+    RC2Engine,
+    LSUEngine,
+    ExternalMaxSATEngine,
+    SATEngine,
+    UnknownSolver,
+    get_maxsat_solver,
+    get_sat_solver,
+)
 
 # from .tokenization_utils import extract_fluent_subset
 
@@ -21,4 +32,13 @@ __all__ = [
     "InvalidNumberOfTraces",
     "TokenizationError",
     "progress",
+    "SolverResult",
+    "MaxSATEngine",
+    "RC2Engine",
+    "LSUEngine",
+    "ExternalMaxSATEngine",
+    "SATEngine",
+    "UnknownSolver",
+    "get_maxsat_solver",
+    "get_sat_solver",
 ]
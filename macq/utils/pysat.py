@@ -1,8 +1,11 @@
-from typing import List, Tuple, Dict, Hashable
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import get_all_start_methods, get_context
+from time import time
+from typing import IO, Iterable, List, Optional, Tuple, Dict, Hashable, Union
 from pysat.formula import WCNF
-from pysat.examples.rc2 import RC2
 from nnf import And, Or, Var
-from ..extract.exceptions import InvalidMaxSATModel
+from .solvers import MaxSATEngine, SolverResult, get_maxsat_solver
 
 
 def get_encoding(
@@ -45,6 +48,123 @@ def encode(clauses: And[Or[Var]], encode: Dict[Hashable, int]) -> List[List[int]
     return encoded
 
 
+Literal = Tuple[Hashable, bool]
+
+
+def nnf_literals(clause: Or[Var]) -> Iterable[Literal]:
+    """Returns the (key, polarity) literals of an NNF clause.
+
+    Args:
+        clause (Or[Var]):
+            The NNF clause (or a single NNF var).
+
+    Returns:
+        Iterable[Tuple[Hashable, bool]]:
+            The name and polarity of each var in the clause.
+    """
+    if isinstance(clause, Var):
+        return ((clause.name, clause.true),)
+    return ((var.name, var.true) for var in clause)
+
+
+class WCNFBuilder:
+    """Streams clauses into a pysat weighted CNF theory, or straight to a WCNF file.
+
+    Clauses are given as iterables of (key, polarity) literals, where the keys can
+    be any hashable (e.g. the names of NNF vars). Keys are interned to pysat vars as
+    clauses are added, so no intermediate NNF theory needs to be built.
+
+    Attributes:
+        wcnf (Optional[WCNF]):
+            The WCNF theory built, or None if writing to a file.
+        encode (Dict[Hashable, int]):
+            The pysat var of each key.
+        decode (Dict[int, Hashable]):
+            The key of each pysat var.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """Initializes an empty builder.
+
+        Args:
+            path (Optional[str]):
+                Optional; The path of a file to write the clauses to, in the
+                (header-less) DIMACS WCNF format used since the 2022 MaxSAT
+                Evaluation. By default, the clauses are added to a pysat `WCNF`.
+        """
+        self.wcnf = WCNF() if path is None else None
+        self.encode: Dict[Hashable, int] = {}
+        self.decode: Dict[int, Hashable] = {}
+        self._file: Optional[IO] = None if path is None else open(path, "w")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def var(self, key: Hashable) -> int:
+        """Returns the pysat var of a key, interning it if it is new."""
+        var = self.encode.get(key)
+        if var is None:
+            var = self.encode[key] = len(self.encode) + 1
+            self.decode[var] = key
+        return var
+
+    def clause(self, literals: Iterable[Literal]) -> List[int]:
+        """Encodes (key, polarity) literals into a pysat clause."""
+        encode = self.encode
+        clause = []
+        for key, polarity in literals:
+            var = encode.get(key) or self.var(key)
+            clause.append(var if polarity else -var)
+        return clause
+
+    def add_hard(self, literals: Iterable[Literal]):
+        """Adds a hard clause.
+
+        Args:
+            literals (Iterable[Tuple[Hashable, bool]]):
+                The (key, polarity) literals of the clause.
+        """
+        clause = self.clause(literals)
+        if self._file is None:
+            self.wcnf.hard.append(clause)
+        else:
+            self._file.write(f"h {' '.join(map(str, clause))} 0\n")
+
+    def add_soft(self, literals: Iterable[Literal], weight: Union[int, float]):
+        """Adds a soft clause.
+
+        Args:
+            literals (Iterable[Tuple[Hashable, bool]]):
+                The (key, polarity) literals of the clause.
+            weight (Union[int, float]):
+                The weight of the clause.
+        """
+        clause = self.clause(literals)
+        if self._file is None:
+            self.wcnf.soft.append(clause)
+            self.wcnf.wght.append(weight)
+        else:
+            self._file.write(f"{weight} {' '.join(map(str, clause))} 0\n")
+
+    def close(self) -> Tuple[Optional[WCNF], Dict[int, Hashable]]:
+        """Finishes building the theory (closing the file, if any).
+
+        Returns:
+            Tuple[Optional[WCNF], Dict[int, Hashable]]:
+                The WCNF theory (None if written to a file), and the decode
+                mapping to convert the pysat vars back to keys.
+        """
+        if self._file is not None:
+            self._file.close()
+        else:
+            self.wcnf.nv = max(self.wcnf.nv, len(self.encode))
+            self.wcnf.topw = sum(self.wcnf.wght) + 1
+        return self.wcnf, self.decode
+
+
 def to_wcnf(
     soft_clauses: And[Or[Var]], weights: List[int], hard_clauses: And[Or[Var]] = None
 ) -> Tuple[WCNF, Dict[int, Hashable]]:
@@ -62,22 +182,163 @@ def to_wcnf(
         Tuple[WCNF, Dict[int, Hashable]]:
             The WCNF theory, and the decode mapping to convert the pysat vars back to NNF.
     """
-    wcnf = WCNF()
-    soft_encode, decode = get_encoding(soft_clauses)
-    encoded = encode(soft_clauses, soft_encode)
-    wcnf.extend(encoded, weights)
-
+    builder = WCNFBuilder()
+    for clause, weight in zip(soft_clauses, weights):
+        builder.add_soft(nnf_literals(clause), weight)
     if hard_clauses:
-        hard_encode, hard_decode = get_encoding(hard_clauses, start=len(decode) + 1)
-        decode.update(hard_decode)
-        encoded = encode(hard_clauses, hard_encode)
-        wcnf.extend(encoded)
+        for clause in hard_clauses:
+            builder.add_hard(nnf_literals(clause))
+    return builder.close()
+
+
+def split_wcnf(wcnf: WCNF) -> List[Tuple[WCNF, List[int]]]:
+    """Splits a WCNF into independent subproblems.
+
+    Two clauses are in the same subproblem if they are connected in the variable
+    interaction graph, i.e. through a chain of clauses sharing vars. Since the
+    subproblems share no vars, the optimal models of the subproblems together
+    form an optimal model of the WCNF, with the sum of their costs.
+
+    Args:
+        wcnf (WCNF):
+            The WCNF to split.
+
+    Returns:
+        List[Tuple[WCNF, List[int]]]:
+            The subproblems (with their vars renumbered from 1), each along with
+            the var of the WCNF that each of its vars stands for (`vars[v - 1]`).
+    """
+    clauses = wcnf.hard + wcnf.soft
+    parent = list(range(max([wcnf.nv] + [abs(l) for c in clauses for l in c]) + 1))
+
+    def find(v):
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    for clause in clauses:
+        root = find(abs(clause[0])) if clause else 0
+        for lit in clause[1:]:
+            other = find(abs(lit))
+            if other != root:
+                parent[other] = root
+
+    components: Dict[int, Tuple[WCNF, Dict[int, int]]] = {}
+
+    def component(clause):
+        # empty clauses have no vars, and are kept with the first subproblem
+        root = find(abs(clause[0])) if clause else next(iter(components), 0)
+        if root not in components:
+            components[root] = (WCNF(), {})
+        sub, local = components[root]
+        for lit in clause:
+            if abs(lit) not in local:
+                local[abs(lit)] = len(local) + 1
+        return sub, [local[lit] if lit > 0 else -local[-lit] for lit in clause]
+
+    for clause in wcnf.hard:
+        sub, encoded = component(clause)
+        sub.hard.append(encoded)
+    for clause, weight in zip(wcnf.soft, wcnf.wght):
+        sub, encoded = component(clause)
+        sub.soft.append(encoded)
+        sub.wght.append(weight)
 
-    return wcnf, decode
+    subproblems = []
+    for sub, local in components.values():
+        sub.nv = len(local)
+        sub.topw = sum(sub.wght) + 1
+        subproblems.append((sub, list(local)))
+    return subproblems
+
+
+def _solve_subproblem(
+    engine: MaxSATEngine, wcnf: WCNF, deadline: Optional[float]
+) -> SolverResult:
+    """Solves a subproblem with the time remaining before the deadline."""
+    time_limit = None if deadline is None else max(deadline - time(), 0)
+    return engine.solve(wcnf, time_limit)
+
+
+def solve_split(
+    max_sat: WCNF,
+    engine: MaxSATEngine,
+    time_limit: Optional[float] = None,
+    workers: Optional[int] = None,
+) -> SolverResult:
+    """Solves a WCNF by solving its independent subproblems (see `split_wcnf`),
+    possibly in a process pool, and joining their models.
+
+    Args:
+        max_sat (WCNF):
+            The WCNF to solve for.
+        engine (MaxSATEngine):
+            The MaxSAT engine to solve each subproblem with.
+        time_limit (Optional[float]):
+            Optional; The maximum number of seconds to solve all the subproblems
+            for.
+        workers (Optional[int]):
+            Optional; The number of processes to solve the subproblems in. By
+            default, they are solved serially in this process.
+
+    Returns:
+        SolverResult:
+            The joined model (None if any subproblem has no model), the sum of the
+            costs, and whether every model is optimal.
+    """
+    deadline = None if time_limit is None else time() + time_limit
+    subproblems = split_wcnf(max_sat)
+    if len(subproblems) <= 1:
+        # nothing to split; the WCNF is solved as is
+        return _solve_subproblem(engine, max_sat, deadline)
+    wcnfs = [sub for sub, _ in subproblems]
+    if workers is None or workers <= 1:
+        results = list(map(_solve_subproblem, repeat(engine), wcnfs, repeat(deadline)))
+    else:
+        context = get_context("fork") if "fork" in get_all_start_methods() else None
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(subproblems)), mp_context=context
+        ) as executor:
+            # the largest subproblems are started first
+            order = sorted(
+                range(len(wcnfs)),
+                key=lambda i: len(wcnfs[i].hard) + len(wcnfs[i].soft),
+                reverse=True,
+            )
+            solved = executor.map(
+                _solve_subproblem,
+                repeat(engine),
+                [wcnfs[i] for i in order],
+                repeat(deadline),
+            )
+            results = [None] * len(wcnfs)
+            for i, result in zip(order, solved):
+                results[i] = result
+
+    model = []
+    for (_, variables), result in zip(subproblems, results):
+        if result.model is None:
+            return SolverResult(None, optimal=all(r.optimal for r in results))
+        model.extend(
+            variables[lit - 1] if lit > 0 else -variables[-lit - 1]
+            for lit in result.model
+            if abs(lit) <= len(variables)
+        )
+    model.sort(key=abs)
+    return SolverResult(
+        model,
+        sum(r.cost for r in results if r.cost is not None),
+        all(r.optimal for r in results),
+    )
 
 
 def extract_raw_model(
-    max_sat: WCNF, decode: Dict[int, Hashable]
+    max_sat: WCNF,
+    decode: Dict[int, Hashable],
+    solver: Union[str, MaxSATEngine, None] = None,
+    time_limit: Optional[float] = None,
+    workers: Optional[int] = None,
 ) -> Dict[Hashable, bool]:
     """Extracts a raw model given a WCNF and the corresponding decoding dictionary.
 
@@ -86,6 +347,15 @@ def extract_raw_model(
             The WCNF to solve for.
         decode (Dict[int, Hashable]):
             The decode dictionary mapping to convert the pysat vars back to NNF.
+        solver (Union[str, MaxSATEngine, None]):
+            Optional; The MaxSAT engine to use (see `macq.utils.solvers`).
+            Defaults to RC2.
+        time_limit (Optional[float]):
+            Optional; The maximum number of seconds to solve for, after which the
+            best model found so far is used.
+        workers (Optional[int]):
+            Optional; If given, the WCNF is split into independent subproblems,
+            solved in this many processes (see `solve_split`).
 
     Raises:
         InvalidMaxSATModel:
@@ -95,10 +365,75 @@ def extract_raw_model(
         Dict[Hashable, bool]:
             The raw model.
     """
-    solver = RC2(max_sat)
-    encoded_model = solver.compute()
+    return solve_wcnf(max_sat, decode, solver, time_limit, workers)[0]
+
+
+def solve_wcnf(
+    max_sat: WCNF,
+    decode: Dict[int, Hashable],
+    solver: Union[str, MaxSATEngine, None] = None,
+    time_limit: Optional[float] = None,
+    workers: Optional[int] = None,
+) -> Tuple[Dict[Hashable, bool], SolverResult]:
+    """Solves a WCNF, returning the raw model along with the solver's result.
+
+    Args:
+        max_sat (WCNF):
+            The WCNF to solve for.
+        decode (Dict[int, Hashable]):
+            The decode dictionary mapping to convert the pysat vars back to NNF.
+        solver (Union[str, MaxSATEngine, None]):
+            Optional; The MaxSAT engine to use (see `macq.utils.solvers`).
+            Defaults to RC2, stratified if there is a time limit so that
+            intermediate models are found.
+        time_limit (Optional[float]):
+            Optional; The maximum number of seconds to solve for, after which the
+            best model found so far is used.
+        workers (Optional[int]):
+            Optional; If given, the WCNF is split into independent subproblems,
+            solved in this many processes (see `solve_split`). By default, the
+            WCNF is solved as a whole.
+
+    Raises:
+        InvalidMaxSATModel:
+            If no model was found.
+
+    Returns:
+        Tuple[Dict[Hashable, bool], SolverResult]:
+            The raw model, and the result holding its cost and whether it is
+            optimal.
+    """
+    engine = get_maxsat_solver(solver, anytime=time_limit is not None)
+    if workers is None:
+        result = engine.solve(max_sat, time_limit)
+    else:
+        result = solve_split(max_sat, engine, time_limit, workers)
+    return decode_model(result.model, decode), result
+
 
+def decode_model(
+    encoded_model: List[int], decode: Dict[int, Hashable]
+) -> Dict[Hashable, bool]:
+    """Decodes a pysat model back to NNF vars.
+
+    Args:
+        encoded_model (List[int]):
+            The pysat model.
+        decode (Dict[int, Hashable]):
+            The decode dictionary mapping to convert the pysat vars back to NNF.
+
+    Raises:
+        InvalidMaxSATModel:
+            If the model is invalid.
+
+    Returns:
+        Dict[Hashable, bool]:
+            The raw model.
+    """
     if not isinstance(encoded_model, list):
+        # imported here, as macq.extract depends on this module
+        from ..extract.exceptions import InvalidMaxSATModel
+
         # should never be reached
         raise InvalidMaxSATModel(encoded_model)
 
@@ -0,0 +1,380 @@
+"""Pluggable SAT and MaxSAT solver engines used by the extraction techniques.
+
+MaxSAT engines solve a pysat `WCNF` and return a `SolverResult`; the engine used
+can be chosen per workload by name (see `get_maxsat_solver`) or by passing an
+engine object. Engines that support time limits return the best model found so
+far when the limit is reached.
+"""
+
+import os
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from math import copysign
+from threading import Timer
+from typing import Iterable, List, Optional, Sequence, Union
+from pysat.examples.lsu import LSU
+from pysat.examples.rc2 import RC2, RC2Stratified
+from pysat.formula import WCNF
+from pysat.solvers import Solver
+
+
+class UnknownSolver(Exception):
+    """Raised when the user supplies a solver that is not recognized."""
+
+    def __init__(self, solver, message=None):
+        if message is None:
+            message = f"Unknown solver: {solver}. Must be one of {', '.join(MAXSAT_SOLVERS)} or a solver engine."
+        super().__init__(message)
+
+
+@dataclass
+class SolverResult:
+    """The result of a MaxSAT engine.
+
+    Attributes:
+        model (Optional[List[int]]):
+            The (pysat encoded) model found, or None if no model was found.
+        cost (Optional[int]):
+            The cost (sum of the weights of the falsified soft clauses) of the model.
+        optimal (bool):
+            Whether the model is known to be optimal. False if the time limit was
+            reached before the solver could prove optimality.
+    """
+
+    model: Optional[List[int]]
+    cost: Optional[int] = None
+    optimal: bool = True
+
+
+def model_cost(wcnf: WCNF, model: Iterable[int]) -> int:
+    """Returns the cost of a model, i.e. the sum of the weights of the soft clauses
+    it falsifies."""
+    true_lits = set(model)
+    return sum(
+        weight
+        for clause, weight in zip(wcnf.soft, wcnf.wght)
+        if not any(lit in true_lits for lit in clause)
+    )
+
+
+class MaxSATEngine:
+    """Base class of the MaxSAT engines."""
+
+    def solve(self, wcnf: WCNF, time_limit: Optional[float] = None) -> SolverResult:
+        """Solves a MaxSAT problem.
+
+        Args:
+            wcnf (WCNF):
+                The weighted CNF to solve.
+            time_limit (Optional[float]):
+                Optional; The maximum number of seconds to solve for. When reached,
+                the best model found so far is returned.
+
+        Returns:
+            The `SolverResult`.
+        """
+        raise NotImplementedError
+
+
+def _feasible_result(wcnf: WCNF, solver: str) -> SolverResult:
+    """Returns a (non-optimal) model of the hard clauses of a WCNF, used when an
+    engine is interrupted before finding a model."""
+    with Solver(name=solver, bootstrap_with=wcnf.hard) as oracle:
+        if not oracle.solve():
+            return SolverResult(None)
+        model = [lit for lit in oracle.get_model() if abs(lit) <= wcnf.nv]
+        return SolverResult(model, model_cost(wcnf, model), optimal=False)
+
+
+class _AnytimeRC2Stratified(RC2Stratified):
+    """Stratified RC2 that keeps the model found after solving each weight level."""
+
+    best = None
+
+    def compute_(self):
+        res = super().compute_()
+        if res:
+            # map the oracle's model back to the formula's variables
+            model = [
+                int(copysign(self.vmap.i2e[abs(lit)], lit))
+                for lit in self.oracle.get_model()
+                if abs(lit) in self.vmap.i2e
+            ]
+            model.sort(key=abs)
+            if self.processor:
+                model = self.processor.restore(model)
+            self.best = model
+        return res
+
+
+class RC2Engine(MaxSATEngine):
+    """The RC2 core-guided MaxSAT solver.
+
+    RC2 only finds a model once it is optimal, while stratified RC2 also finds a
+    model after solving each weight level (heaviest first). If the time limit is
+    reached first, the last of these models is returned, or a model of the hard
+    clauses if there is none (which may be far from optimal).
+    """
+
+    def __init__(
+        self,
+        solver: str = "g3",
+        stratified: bool = False,
+        exhaust: bool = False,
+        adapt: bool = False,
+        minz: bool = False,
+    ):
+        """Initializes the engine.
+
+        Args:
+            solver (str):
+                Optional; The pysat SAT oracle to use. Defaults to Glucose 3.
+            stratified (bool):
+                Optional; Whether to use the stratified (Boolean lexicographic)
+                version of RC2, which is faster on problems with many distinct
+                weights and finds intermediate models.
+            exhaust (bool):
+                Optional; Whether to exhaust the cores found.
+            adapt (bool):
+                Optional; Whether to detect and adapt intrinsic AtMost1 constraints.
+            minz (bool):
+                Optional; Whether to minimize the cores found.
+        """
+        self.solver = solver
+        self.stratified = stratified
+        self.exhaust = exhaust
+        self.adapt = adapt
+        self.minz = minz
+
+    def solve(self, wcnf: WCNF, time_limit: Optional[float] = None) -> SolverResult:
+        if time_limit is not None and time_limit <= 0:
+            return _feasible_result(wcnf, self.solver)
+        RC2Type = _AnytimeRC2Stratified if self.stratified else RC2
+        with RC2Type(
+            wcnf,
+            solver=self.solver,
+            exhaust=self.exhaust,
+            adapt=self.adapt,
+            minz=self.minz,
+        ) as rc2:
+            if time_limit is None:
+                model = rc2.compute()
+            else:
+                timer = Timer(time_limit, rc2.interrupt)
+                timer.start()
+                model = rc2.compute(expect_interrupt=True)
+                timer.cancel()
+                if model is None and rc2.interrupted:
+                    best = getattr(rc2, "best", None)
+                    if best is None:
+                        return _feasible_result(wcnf, self.solver)
+                    return SolverResult(best, model_cost(wcnf, best), optimal=False)
+            return SolverResult(model, rc2.cost if model is not None else None)
+
+
+class LSUEngine(MaxSATEngine):
+    """The linear SAT-UNSAT MaxSAT solver, for unweighted problems (all soft
+    clauses have the same weight).
+
+    Each model found is better than the last, so the best model found so far is
+    returned when the time limit is reached.
+    """
+
+    def __init__(self, solver: str = "g4"):
+        """Initializes the engine.
+
+        Args:
+            solver (str):
+                Optional; The pysat SAT oracle to use. Defaults to Glucose 4.
+        """
+        self.solver = solver
+
+    def solve(self, wcnf: WCNF, time_limit: Optional[float] = None) -> SolverResult:
+        if len(set(wcnf.wght)) > 1:
+            raise ValueError("The LSU engine only supports unweighted problems.")
+        # LSU counts falsified soft clauses, and adds selectors to the clauses given
+        unweighted = wcnf.copy()
+        unweighted.wght = [1] * len(unweighted.soft)
+        lsu = LSU(
+            unweighted, solver=self.solver, expect_interrupt=time_limit is not None
+        )
+        timer = None
+        if time_limit is not None:
+            timer = Timer(time_limit, lsu.interrupt)
+            timer.start()
+        try:
+            if not lsu.solve():
+                return SolverResult(None)
+            optimal = lsu.found_optimum() or timer is None or timer.is_alive()
+            weight = wcnf.wght[0] if wcnf.wght else 0
+            return SolverResult(lsu.model, lsu.cost * weight, optimal)
+        finally:
+            if timer is not None:
+                timer.cancel()
+            lsu.delete()
+
+
+class ExternalMaxSATEngine(MaxSATEngine):
+    """An external MaxSAT solver binary, called on a WCNF file.
+
+    The solver must follow the MaxSAT Evaluation output format ("o" cost lines,
+    an "s" status line and a "v" model line). When the time limit is reached the
+    solver is terminated, and the last model it printed (if any) is returned.
+    """
+
+    def __init__(self, command: Sequence[str]):
+        """Initializes the engine.
+
+        Args:
+            command (Sequence[str]):
+                The command to run the solver. The path of the WCNF file is
+                appended to it.
+        """
+        self.command = list(command)
+
+    def solve(self, wcnf: WCNF, time_limit: Optional[float] = None) -> SolverResult:
+        fd, path = tempfile.mkstemp(suffix=".wcnf")
+        os.close(fd)
+        try:
+            wcnf.to_file(path)
+            process = subprocess.Popen(
+                self.command + [path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+            try:
+                output, _ = process.communicate(timeout=time_limit)
+                timed_out = False
+            except subprocess.TimeoutExpired:
+                process.terminate()
+                output, _ = process.communicate()
+                timed_out = True
+        finally:
+            os.remove(path)
+        return self._parse(output, wcnf, timed_out)
+
+    @staticmethod
+    def _parse(output: str, wcnf: WCNF, timed_out: bool) -> SolverResult:
+        """Parses the output of the solver."""
+        model = None
+        optimal = False
+        for line in output.splitlines():
+            if line.startswith("s "):
+                optimal = line.strip() == "s OPTIMUM FOUND"
+            elif line.startswith("v "):
+                values = line[2:].split()
+                if len(values) == 1 and set(values[0]) <= {"0", "1"}:
+                    # new format: a string of variable values
+                    model = [i if v == "1" else -i for i, v in enumerate(values[0], 1)]
+                else:
+                    model = [int(v) for v in values if v != "0"]
+        if model is None:
+            return SolverResult(None, optimal=not timed_out)
+        model = [lit for lit in model if abs(lit) <= wcnf.nv]
+        return SolverResult(model, model_cost(wcnf, model), optimal)
+
+
+class SATEngine:
+    """A pysat SAT solver."""
+
+    def __init__(self, solver: str = "cadical195"):
+        """Initializes the engine.
+
+        Args:
+            solver (str):
+                Optional; The name of the pysat SAT solver to use. Defaults to
+                CaDiCaL.
+        """
+        self.solver = solver
+
+    def new_solver(self, clauses: Iterable[List[int]] = ()) -> Solver:
+        """Returns a new (incremental) pysat solver with the given clauses."""
+        return Solver(name=self.solver, bootstrap_with=clauses)
+
+    def solve(
+        self,
+        clauses: Iterable[List[int]],
+        assumptions: Iterable[int] = (),
+        time_limit: Optional[float] = None,
+    ) -> Optional[List[int]]:
+        """Solves a SAT problem.
+
+        Args:
+            clauses (Iterable[List[int]]):
+                The (pysat encoded) clauses to satisfy.
+            assumptions (Iterable[int]):
+                Optional; Literals assumed to be true.
+            time_limit (Optional[float]):
+                Optional; The maximum number of seconds to solve for.
+
+        Returns:
+            A model of the clauses, or None if they are unsatisfiable or the time
+            limit was reached.
+        """
+        with self.new_solver(clauses) as solver:
+            if time_limit is None:
+                sat = solver.solve(assumptions=list(assumptions))
+            else:
+                timer = Timer(time_limit, solver.interrupt)
+                timer.start()
+                sat = solver.solve_limited(
+                    assumptions=list(assumptions), expect_interrupt=True
+                )
+                timer.cancel()
+            return solver.get_model() if sat else None
+
+
+MAXSAT_SOLVERS = {
+    "rc2": RC2Engine,
+    "rc2-stratified": lambda: RC2Engine(stratified=True),
+    "lsu": LSUEngine,
+}
+
+
+def get_maxsat_solver(
+    solver: Union[str, MaxSATEngine, None] = None, anytime: bool = False
+) -> MaxSATEngine:
+    """Returns a MaxSAT engine.
+
+    Args:
+        solver (Union[str, MaxSATEngine, None]):
+            Optional; The engine, or the name of one ("rc2", "rc2-stratified" or
+            "lsu"). Defaults to RC2.
+        anytime (bool):
+            Optional; Whether the default engine should find intermediate models
+            (i.e. be stratified RC2), for solving under a time limit.
+
+    Raises:
+        UnknownSolver:
+            Raised if the solver is not recognized.
+
+    Returns:
+        The MaxSAT engine.
+    """
+    if solver is None:
+        return RC2Engine(stratified=anytime)
+    if isinstance(solver, MaxSATEngine):
+        return solver
+    if solver in MAXSAT_SOLVERS:
+        return MAXSAT_SOLVERS[solver]()
+    raise UnknownSolver(solver)
+
+
+def get_sat_solver(solver: Union[str, SATEngine, None] = None) -> SATEngine:
+    """Returns a SAT engine.
+
+    Args:
+        solver (Union[str, SATEngine, None]):
+            Optional; The engine, or the name of a pysat SAT solver. Defaults to
+            CaDiCaL.
+
+    Returns:
+        The SAT engine.
+    """
+    if solver is None:
+        return SATEngine()
+    if isinstance(solver, SATEngine):
+        return solver
+    return SATEngine(solver)
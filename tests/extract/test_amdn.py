@@ -211,6 +211,7 @@ def gen_tracelist():
     # return TraceList([Trace([step_0, step_1, step_2])])#, step_3, step_4])])
     return TraceList([Trace([step_0, step_1, step_2, step_3, step_4])])
 
+
 def test_amdn():
     # exit out to the base macq folder so we can get to /tests
     base = Path(__file__).parent.parent
@@ -262,3 +263,28 @@ def test_amdn():
     model.to_pddl(
         "model_blocks_dom", "model_blocks_prob", model_blocks_dom, model_blocks_prob
     )
+
+
+def test_time_limited_amdn():
+    observations = gen_tracelist().tokenize(
+        Token=NoisyPartialDisorderedParallelObservation,
+        ObsLists=DisorderedParallelActionsObservationLists,
+        features=[objects_shared_feature, num_parameters_feature],
+        learned_theta=default_theta_vec(2),
+        percent_missing=0,
+        percent_noisy=0,
+    )
+    model = Extract(observations, modes.AMDN, occ_threshold=2, time_limit=60)
+    assert model.optimal
+    # solving the independent subproblems separately is just as good
+    split = Extract(observations, modes.AMDN, occ_threshold=2, time_limit=60, workers=2)
+    assert split.optimal
+    assert split.cost == pytest.approx(model.cost)
+    # with no time left, a model of the hard constraints is returned
+    rushed = Extract(observations, modes.AMDN, occ_threshold=2, time_limit=0)
+    assert rushed.actions
+    assert not rushed.optimal
+    assert rushed.cost >= model.cost
+
+    with pytest.raises(ValueError):
+        Extract(observations, modes.OBSERVER, time_limit=1)
@@ -0,0 +1,37 @@
+from macq.extract import Extract, LearnedAction, Model, ModelEvaluator, modes
+from macq.observation import IdentityObservation
+from tests.utils.test_traces import blocks_world
+
+
+def test_model_evaluator():
+    traces = blocks_world(10)
+    model = Extract(traces.tokenize(IdentityObservation), modes.OBSERVER)
+    evaluator = ModelEvaluator(traces, reference=model)
+
+    # the observer's model explains every transition it was learned from
+    evaluation = evaluator.evaluate(model)
+    assert evaluation.coverage == 1
+    assert evaluation.applicability == 1
+    assert evaluation.accuracy == 1
+    assert evaluation.exact == 1
+    assert evaluation.precond_precision == evaluation.precond_recall == 1
+    assert evaluation.delete_precision == evaluation.delete_recall == 1
+
+    # a model whose actions have no effects, and one missing an action
+    no_effects = Model(
+        model.fluents,
+        {LearnedAction(a.name, a.obj_params, precond=a.precond) for a in model.actions},
+    )
+    partial = Model(model.fluents, set(list(model.actions)[1:]))
+    evaluation = evaluator.evaluate(no_effects)
+    assert evaluation.applicability == 1
+    assert evaluation.exact == 0
+    assert evaluation.accuracy < 1
+    assert evaluation.add_precision is None
+    assert evaluation.add_recall == 0
+    assert evaluation.precond_recall == 1
+    assert evaluator.evaluate(partial).coverage < 1
+
+    ranked = evaluator.rank([no_effects, model, partial])
+    assert ranked[0][0] is model
+    assert ranked[-1][0] is no_effects
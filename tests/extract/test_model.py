@@ -1,4 +1,8 @@
+import pytest
+from tarski.io import PDDLReader
+from tarski.syntax import CompoundFormula, Tautology
 from macq.extract import *
+from macq.extract.model_archive import InvalidModelArchive
 from tests.utils.test_model import test_model as TestModel
 
 
@@ -13,3 +17,97 @@ def test_model():
     with open("test_model.json", "r") as f:
         d = f.read()
         assert d == s
+
+
+def _atoms(formula):
+    if isinstance(formula, Tautology):
+        return set()
+    if isinstance(formula, CompoundFormula):
+        return set().union(*map(_atoms, formula.subformulas))
+    return {str(formula)}
+
+
+def _load(domain, problem):
+    reader = PDDLReader(raise_on_error=True)
+    reader.parse_domain(domain)
+    reader.parse_instance(problem)
+    return {
+        a.name: (_atoms(a.precondition), sorted(map(str, a.effects)))
+        for a in reader.problem.actions.values()
+    }
+
+
+def test_model_to_pddl_text(tmp_path):
+    model = TestModel()
+    tarski_files = (str(tmp_path / "d.pddl"), str(tmp_path / "p.pddl"))
+    text_files = (str(tmp_path / "d_text.pddl"), str(tmp_path / "p_text.pddl"))
+    model.to_pddl("bw", "bw_problem", *tarski_files)
+    model.to_pddl("bw", "bw_problem", *text_files, use_tarski=False)
+
+    tarski_actions = _load(*tarski_files)
+    text_actions = _load(*text_files)
+    assert tarski_actions.keys() == text_actions.keys()
+    for name, (precond, effects) in tarski_actions.items():
+        assert precond
+        assert text_actions[name][0] == precond
+        assert text_actions[name][1] == effects
+
+    # lifted models
+    on = LearnedLiftedFluent("on", ["block", "block"], [0, 1])
+    clear = LearnedLiftedFluent("clear", ["block"], [1])
+    unstack = LearnedLiftedAction(
+        "unstack", ["block", "block"], precond={on}, add={clear}, delete={on}
+    )
+    lifted = Model({on, clear}, {unstack})
+    assert lifted.is_lifted()
+    paths = write_models({"lifted": lifted, "grounded": model}, str(tmp_path / "out"))
+    assert set(paths) == {"lifted", "grounded"}
+    assert _load(*paths["grounded"]) == text_actions
+    assert _load(*paths["lifted"])["unstack"][1] == [
+        "(T -> ADD(clear(?x1)))",
+        "(T -> DEL(on(?x0,?x1)))",
+    ]
+
+
+def test_model_archive(tmp_path):
+    model = TestModel()
+    model.cost, model.optimal = 3, False
+    variant = Model(set(map(str, model.fluents)), set(list(model.actions)[:2]))
+    path = str(tmp_path / "models.mqm")
+    save_models([model, variant], path)
+
+    archive = load_models(path)
+    assert len(archive) == 2
+    # the fluent strings are shared by the models
+    assert len(archive.table) == len(model.fluents)
+    loaded, loaded_variant = archive
+    assert loaded == Model.deserialize(model.serialize())
+    assert loaded_variant == Model.deserialize(variant.serialize())
+    assert (loaded.cost, loaded.optimal) == (3, False)
+    originals = {a.details(): a for a in model.actions}
+    for action in loaded.actions:
+        original = originals[action.details()]
+        assert action.precond == original.precond
+        assert action.add == original.add
+        assert action.delete == original.delete
+    archive.close()
+    with pytest.raises(ValueError):
+        archive[0]
+    with load_models(path) as archive:
+        assert archive[1] == loaded_variant
+    with open(path, "rb") as fp:
+        data = fp.read()
+
+    # malformed files are rejected
+    for contents in (
+        b"",
+        b"not a model archive",
+        data[:-1],
+        data[:-16] + b"\xff" * 16,
+        data[:-8] + b"\0" * 8,
+        data[:8] + b"\xff" * (len(data) - 8),
+    ):
+        with open(path, "wb") as fp:
+            fp.write(contents)
+        with pytest.raises(InvalidModelArchive):
+            load_models(path)
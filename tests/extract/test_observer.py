@@ -1,6 +1,12 @@
 import pytest
 from pathlib import Path
-from macq.extract import Extract, modes
+from macq.extract import (
+    Extract,
+    IncompatibleObservationToken,
+    Observer,
+    OnlineObserver,
+    modes,
+)
 from macq.observation import *
 from macq.trace import *
 from tests.utils.test_traces import blocks_world
@@ -27,6 +33,66 @@ def test_observer():
         observations.fetch_observations({"test": "test"})
 
 
+def _actions(model):
+    return {a.details(): (a.precond, a.add, a.delete) for a in model.actions}
+
+
+def test_online_observer():
+    traces = blocks_world(5)
+    observations = traces.tokenize(IdentityObservation)
+    model = Extract(observations, modes.OBSERVER)
+
+    # preconditions and effects follow from the transitions of each action
+    for action, transitions in observations.get_all_transitions().items():
+        (learned,) = [
+            a
+            for a in model.actions
+            if a.name == action.name and a.obj_params == action.obj_params
+        ]
+        pre_states = [pre.state for pre, _ in transitions]
+        assert learned.precond == {
+            str(f) for f in pre_states[0] if all(s[f] for s in pre_states)
+        }
+        assert learned.add == {
+            str(f)
+            for pre, post in transitions
+            for f in pre.state
+            if not pre.state[f] and post.state[f]
+        }
+
+    # observers built over shards merge into the same model
+    merged = OnlineObserver()
+    for obs_trace in observations:
+        merged.merge(OnlineObserver().observe_trace(iter(obs_trace)))
+    merged = merged.to_model()
+    assert merged.fluents == model.fluents
+    assert _actions(merged) == _actions(model)
+
+    with pytest.raises(IncompatibleObservationToken):
+        OnlineObserver().observe_tracelist(traces.tokenize(PartialObservation))
+
+
+def test_observer_matrices():
+    traces = blocks_world(5)
+    model = Extract(traces.tokenize(IdentityObservation), modes.OBSERVER)
+
+    # chunks of the traces are summarised independently
+    chunked = OnlineObserver(chunk_size=2)
+    chunked.observe_tracelist(traces.tokenize(IdentityObservation))
+    assert _actions(chunked.to_model()) == _actions(model)
+
+    from_matrices = OnlineObserver()
+    for trace in traces:
+        matrix, fluents = trace.to_matrix()
+        from_matrices.observe_matrix(matrix, fluents, [step.action for step in trace])
+    assert _actions(from_matrices.to_model()) == _actions(model)
+
+    pre, post = traces[0][0].state, traces[0][1].state
+    delta = Observer.get_delta(pre, post)
+    assert delta.added == {f for f in pre if not pre[f] and post[f]}
+    assert delta.deleted == {f for f in pre if pre[f] and not post[f]}
+
+
 if __name__ == "__main__":
     # exit out to the base macq folder so we can get to /tests
     base = Path(__file__).parent.parent
@@ -0,0 +1,51 @@
+from pathlib import Path
+from macq.generate.pddl import BatchWalker, FDRandomWalkSampling, VanillaSampling
+
+
+def test_batch_walk():
+    # exit out to the base macq folder so we can get to /tests
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+
+    vanilla = VanillaSampling(
+        dom=dom,
+        prob=prob,
+        plan_len=8,
+        num_traces=50,
+        seed=42,
+        observe_pres_effs=True,
+        batch_size=16,
+    )
+    traces = vanilla.traces
+    assert len(traces) == 50
+    init = vanilla.tarski_state_to_macq(vanilla.problem.init)
+    for trace in traces:
+        assert len(trace) == 8
+        assert trace[0].state == init
+        assert trace[-1].action is None
+        for step, next_step in zip(trace[:-1], trace[1:]):
+            state, action = step.state, step.action
+            assert all(state[f] for f in action.precond)
+            expected = {
+                f: (v and f not in action.delete) or f in action.add
+                for f, v in state.items()
+            }
+            assert next_step.state.fluents == expected
+
+    # the walks are reproducible, and more traces can be generated one at a time
+    again = VanillaSampling(
+        dom=dom, prob=prob, plan_len=8, num_traces=50, seed=42, batch_size=16
+    )
+    assert [str(t[-1].state) for t in again.traces] == [
+        str(t[-1].state) for t in traces
+    ]
+    traces.generate_more(2)
+    assert len(traces) == 52
+
+    walker = BatchWalker(vanilla, batch_size=4)
+    assert [len(t) for t in walker.walk(10, lambda: 3)] == [3] * 10
+    assert all(len(t) == 1 for t in walker.walk(3, 0))
+
+    sampler = FDRandomWalkSampling(dom=dom, prob=prob, num_traces=20, batch_size=8)
+    assert len(sampler.traces) == 20
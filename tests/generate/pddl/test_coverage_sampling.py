@@ -0,0 +1,39 @@
+import pytest
+from pathlib import Path
+from macq.generate.pddl import CoverageSampling, VanillaSampling
+from macq.utils import PercentError
+
+
+def test_coverage_sampling():
+    # exit out to the base macq folder so we can get to /tests
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+
+    with pytest.raises(PercentError):
+        CoverageSampling(dom=dom, prob=prob, target_coverage=2)
+
+    sampler = CoverageSampling(dom=dom, prob=prob, plan_len=10, num_traces=20, seed=1)
+    traces = sampler.traces
+    assert len(traces) == 20
+    assert all(len(trace) == 10 for trace in traces)
+    coverage = sampler.coverage
+    assert coverage.steps == 20 * 9
+    assert coverage.states == len({str(s.state) for t in traces for s in t})
+    assert coverage.actions == len(
+        {str(s.action) for t in traces for s in t if s.action}
+    )
+
+    # biased walks reach more of the state space than uniform ones
+    vanilla = VanillaSampling(dom=dom, prob=prob, plan_len=10, num_traces=20, seed=1)
+    assert coverage.states > len({str(s.state) for t in vanilla.traces for s in t})
+
+    # generation stops once the target coverage is reached
+    target = coverage.action_coverage / 2
+    sampler = CoverageSampling(
+        dom=dom, prob=prob, plan_len=10, num_traces=20, target_coverage=target
+    )
+    assert len(sampler.traces) < 20
+    assert sampler.covered()
+    traces.generate_more(1)
+    assert len(traces) == 21
@@ -0,0 +1,44 @@
+import gc
+import os
+from pathlib import Path
+from tarski.io import PDDLReader
+from macq.generate.pddl import Generator
+from macq.trace import Fluent, PlanningObject
+
+
+def test_in_memory_changes(tmp_path, monkeypatch):
+    # exit out to the base macq folder so we can get to /tests
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+    monkeypatch.chdir(tmp_path)
+
+    generators = [Generator(dom=dom, prob=prob) for _ in range(2)]
+    for generator in generators:
+        assert generator.pddl_files() == (dom, prob)
+    goal = {
+        Fluent("on", [PlanningObject("object", "a"), PlanningObject("object", "b")])
+    }
+    for generator in generators:
+        generator.change_goal(goal)
+        assert generator.modified
+        assert generator.pddl_dom is None
+    # nothing is written until the files are needed
+    assert not os.listdir(tmp_path)
+
+    paths = [generator.pddl_files() for generator in generators]
+    assert paths[0] != paths[1]
+    reader = PDDLReader(raise_on_error=True)
+    reader.parse_domain(paths[0][0])
+    problem = reader.parse_instance(paths[0][1])
+    assert str(problem.goal) == str(generators[0].problem.goal)
+
+    # the files are written when names are given
+    generators[0].change_init(set(), "dom.pddl", "prob.pddl")
+    assert generators[0].pddl_files() == ("dom.pddl", "prob.pddl")
+    assert sorted(os.listdir(tmp_path)) == ["dom.pddl", "prob.pddl"]
+
+    tmp_dir = os.path.dirname(paths[1][0])
+    del generators[1], generator
+    gc.collect()
+    assert not os.path.exists(tmp_dir)
@@ -0,0 +1,66 @@
+from pathlib import Path
+from tarski.grounding.lp_grounding import (
+    ground_problem_schemas_into_plain_operators,
+    LPGroundingStrategy,
+)
+from macq.generate.pddl import Generator, VanillaSampling
+from macq.generate.pddl.grounding import grounding_key
+
+
+def test_grounding_cache(tmp_path, monkeypatch):
+    # exit out to the base macq folder so we can get to /tests
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+    cache = str(tmp_path)
+
+    # the cache is opt-in
+    monkeypatch.setenv("MACQ_CACHE_DIR", str(tmp_path / "default"))
+    uncached = Generator(dom=dom, prob=prob)
+    assert not list(tmp_path.iterdir())
+
+    # the single grounding pass matches the previous two-pass grounding
+    problem = uncached.problem
+    operators = {
+        o.name: o for o in ground_problem_schemas_into_plain_operators(problem)
+    }
+    assert {o.name for o in uncached.instance.operators} == set(operators)
+    for op in uncached.instance.operators:
+        assert str(op.precondition) == str(operators[op.name].precondition)
+        assert set(map(str, op.effects)) == set(map(str, operators[op.name].effects))
+    state_variables = LPGroundingStrategy(
+        problem, include_variable_inequalities=True
+    ).ground_state_variables()
+    assert {
+        (f.name, tuple(o.name for o in f.objects)) for f in uncached.grounded_fluents
+    } == {
+        (v.symbol.name, tuple(c.name for c in v.binding))
+        for v in state_variables.objects
+    }
+
+    first = Generator(dom=dom, prob=prob, grounding_cache=cache)
+    entry = tmp_path / (
+        grounding_key(Path(dom).read_text(), Path(prob).read_text()) + ".json"
+    )
+    assert entry.exists()
+    cached = Generator(dom=dom, prob=prob, grounding_cache=cache)
+
+    for generator in (first, cached):
+        assert set(generator.grounded_fluents) == set(uncached.grounded_fluents)
+        assert set(generator.op_dict) == set(uncached.op_dict)
+        for name, op in generator.op_dict.items():
+            assert str(op.precondition) == str(uncached.op_dict[name].precondition)
+            assert set(map(str, op.effects)) == set(
+                map(str, uncached.op_dict[name].effects)
+            )
+
+    # corrupt cache entries are regenerated
+    entry.write_text("{")
+    regrounded = Generator(dom=dom, prob=prob, grounding_cache=cache)
+    assert set(regrounded.op_dict) == set(uncached.op_dict)
+    assert entry.read_text() != "{"
+
+    # the samplers pass the option on
+    entry.unlink()
+    VanillaSampling(dom=dom, prob=prob, plan_len=2, num_traces=1, grounding_cache=cache)
+    assert entry.exists()
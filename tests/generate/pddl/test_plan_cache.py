@@ -0,0 +1,53 @@
+from pathlib import Path
+from macq.generate.pddl import Generator, LocalPlanner, PlanCache
+from macq.trace import Fluent, PlanningObject
+
+
+def test_plan_cache(tmp_path):
+    # exit out to the base macq folder so we can get to /tests
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+
+    cache = PlanCache(maxsize=1, path=str(tmp_path))
+    generator = Generator(dom=dom, prob=prob, plan_cache=cache)
+    plan = generator.generate_plan()
+    assert generator.generate_plan() == plan
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    # goals are canonical, regardless of the order of the fluents
+    key = generator.plan_key()
+    on = [
+        Fluent("on", [PlanningObject("object", a), PlanningObject("object", b)])
+        for a, b in (("a", "b"), ("b", "c"))
+    ]
+    generator.change_goal(on)
+    other_key = generator.plan_key()
+    assert other_key != key
+    generator.change_goal(on[::-1])
+    assert generator.plan_key() == other_key
+    short_plan = generator.generate_plan()
+    # the first plan was evicted from memory, but is still on disk
+    assert len(cache) == 1
+    assert key in cache
+
+    # plans are shared by generators of the same domain and objects
+    other_cache = PlanCache(path=str(tmp_path))
+    other = Generator(dom=dom, prob=prob, plan_cache=other_cache)
+    assert str(other.generate_plan()) == str(plan)
+    other.change_goal(on)
+    assert str(other.generate_plan()) == str(short_plan)
+    assert other_cache.stats.disk_hits == 2
+    assert other_cache.stats.hit_rate == 1.0
+
+    # plans are not shared by generators with different planners
+    planner_cache = PlanCache()
+    ff = Generator(dom=dom, prob=prob, plan_cache=planner_cache)
+    add = Generator(
+        dom=dom, prob=prob, planner=LocalPlanner("add"), plan_cache=planner_cache
+    )
+    assert ff.plan_key() != add.plan_key()
+    ff.generate_plan()
+    add.generate_plan()
+    assert planner_cache.stats.misses == 2
+    assert Generator(dom=dom, prob=prob).plan_key() == ff.plan_key()
@@ -0,0 +1,208 @@
+import json
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from tarski.search.operations import is_applicable, progress
+from macq.generate.pddl import (
+    Generator,
+    LocalPlanner,
+    RandomGoalSampling,
+    RemotePlanner,
+)
+from macq.generate.pddl.planners import (
+    NoPlanFound,
+    Planner,
+    UnsupportedTask,
+    get_planner,
+)
+from macq.generate.plan import Plan
+from tarski.syntax import neg
+
+
+def get_generator(planner=None):
+    # exit out to the base macq folder so we can get to /tests
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+    return Generator(dom=dom, prob=prob, planner=planner, plan_cache=False)
+
+
+def reaches_goal(generator, plan):
+    state = generator.problem.init
+    for op in plan.actions:
+        if not is_applicable(state, op):
+            return False
+        state = progress(state, op)
+    return state[generator.problem.goal]
+
+
+def test_local_planner():
+    generator = get_generator()
+    assert isinstance(generator.planner, LocalPlanner)
+    assert reaches_goal(generator, generator.generate_plan())
+
+    generator.planner = LocalPlanner(heuristic="add")
+    assert reaches_goal(generator, generator.generate_plan())
+
+    generator.planner = LocalPlanner(max_expansions=1)
+    with pytest.raises(NoPlanFound):
+        generator.generate_plan()
+
+    with pytest.raises(ValueError):
+        get_planner("unknown")
+
+
+def test_local_planner_fallback():
+    class Recorder(Planner):
+        calls = 0
+
+        def plan(self, generator):
+            self.calls += 1
+            return Plan([])
+
+    # by default, unsupported problems are passed to the remote solver
+    assert isinstance(get_planner().fallback, RemotePlanner)
+
+    generator = get_generator()
+    goal = generator.problem.goal
+    generator.problem.goal = neg(goal.subformulas[0])
+    generator.planner = LocalPlanner()
+    with pytest.raises(UnsupportedTask):
+        generator.generate_plan()
+
+    recorder = Recorder()
+    generator.planner = LocalPlanner(fallback=recorder)
+    assert generator.generate_plan().actions == []
+    with generator.planner.pool(generator, workers=2) as pool:
+        assert pool.submit().result().actions == []
+    assert recorder.calls == 2
+    # supported problems are still planned for locally
+    generator.problem.goal = goal
+    assert reaches_goal(generator, generator.generate_plan())
+    assert recorder.calls == 2
+
+
+def test_planner_pool():
+    generator = get_generator()
+    with generator.planner.pool(generator, workers=2) as pool:
+        future = pool.submit()
+        # the problem is captured on submission
+        goal = generator.problem.goal
+        generator.change_goal(set())
+        plan = future.result()
+    generator.problem.goal = goal
+    assert reaches_goal(generator, plan)
+
+
+def test_remote_planner_pool():
+    lock = threading.Lock()
+    running = [0]
+    most = [0]
+
+    # a local stand-in for the planning.domains solver, which takes a while to
+    # solve each problem
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            with lock:
+                running[0] += 1
+                most[0] = max(most[0], running[0])
+            time.sleep(0.1)
+            with lock:
+                running[0] -= 1
+            self.reply({"result": "check/1"})
+
+        def do_GET(self):
+            sas_plan = "(pick-up e)\n(stack e d)\n; cost = 2"
+            self.reply({"status": "ok", "result": {"output": {"sas_plan": sas_plan}}})
+
+        def reply(self, data):
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(json.dumps(data).encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}"
+        generator = get_generator(RemotePlanner(url=url, delays=(0,)))
+        # more problems than workers, so some wait for a worker
+        with generator.planner.pool(generator, workers=2) as pool:
+            futures = [pool.submit() for _ in range(6)]
+            plans = [f.result(timeout=30) for f in futures]
+    finally:
+        server.shutdown()
+        server.server_close()
+    for plan in plans:
+        assert [o.name for o in plan.actions] == ["pick-up(e)", "stack(e, d)"]
+    assert most[0] == 2
+
+
+def test_random_goal_sampling_workers():
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+    sampler = RandomGoalSampling(
+        dom=dom,
+        prob=prob,
+        steps_deep=10,
+        subset_size_perc=0.1,
+        num_traces=3,
+        max_time=5,
+        workers=2,
+    )
+    assert len(sampler.traces) == 3
+    for goal, info in sampler.goals_inits_plans.items():
+        state = info["initial state"]
+        for op in info["plan"].actions:
+            assert is_applicable(state, op)
+            state = progress(state, op)
+        true_fluents = {
+            str(f) for f, v in sampler.tarski_state_to_macq(state).items() if v
+        }
+        assert {str(f) for f in goal} <= true_fluents
+
+
+def test_random_goal_sampling_single_worker():
+    # a planner failing for every other goal
+    class FlakyPlanner(LocalPlanner):
+        calls = 0
+        plans = 0
+
+        def plan(self, generator):
+            self.calls += 1
+            if self.calls % 2:
+                raise NoPlanFound()
+            self.plans += 1
+            return super().plan(generator)
+
+    class Goals(dict):
+        added = 0
+
+        def __setitem__(self, key, value):
+            self.added += 1
+            super().__setitem__(key, value)
+
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+    planner = FlakyPlanner()
+    sampler = RandomGoalSampling(
+        dom=dom,
+        prob=prob,
+        steps_deep=10,
+        subset_size_perc=0.1,
+        max_time=2,
+        planner=planner,
+        plan_cache=False,
+    )
+    goals = Goals()
+    sampler.generate_goals_setup(num_seconds=2, goal_states=goals)()
+    # with one worker, no plan is found for a goal that is then discarded
+    assert planner.plans > 0
+    assert goals.added == planner.plans
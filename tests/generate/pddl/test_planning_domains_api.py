@@ -0,0 +1,97 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import pytest
+from macq.generate.pddl import Generator
+from macq.generate.pddl import planning_domains_api as api
+from macq.generate.pddl.planners import PlanningDomainsAPIError
+
+
+def test_planning_domains_api_cache(tmp_path, monkeypatch):
+    # exit out to the base macq folder so we can get to /tests
+    base = Path(__file__).parent.parent.parent
+    files = {
+        "/files/domain.pddl": (
+            base / "pddl_testing_files/blocks_domain.pddl"
+        ).read_text(),
+        "/files/problem.pddl": (
+            base / "pddl_testing_files/blocks_problem.pddl"
+        ).read_text(),
+    }
+    requested = []
+
+    # a local stand-in for the planning.domains API
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested.append(self.path)
+            url = f"http://127.0.0.1:{self.server.server_port}"
+            if self.path.startswith("/json/classical/problem/"):
+                body = json.dumps(
+                    {
+                        "error": False,
+                        "result": {
+                            "problem_id": int(self.path.split("/")[-1]),
+                            "domain_url": url + "/files/domain.pddl",
+                            "problem_url": url + "/files/problem.pddl",
+                        },
+                    }
+                )
+            elif self.path.startswith("/json/classical/plan/"):
+                body = json.dumps(
+                    {"error": False, "result": {"plan": f"({len(requested)})"}}
+                )
+            elif self.path in files:
+                body = files[self.path]
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(body.encode())
+
+        def do_POST(self):
+            requested.append(self.path)
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(json.dumps({"error": False, "result": "ok"}).encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(api, "API_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(api, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(api, "OFFLINE", False)
+
+    try:
+        fetched = api.fetch_problems([1, 2, 3], "classical", workers=3)
+        assert fetched[2] == (files["/files/domain.pddl"], files["/files/problem.pddl"])
+        # the files were only downloaded once
+        assert requested.count("/files/domain.pddl") == 1
+        # stored plans are cached until a plan is submitted for the problem
+        plan = api.get_plan(1, "classical")
+        assert api.get_plan(1, "classical") == plan
+        api.submit_plan(1, "(pick-up e)", "classical")
+        assert "/classical/submitplan/1" in requested
+        plan = api.get_plan(1, "classical")
+        assert api.get_plan(1, "classical") == plan
+        assert requested.count("/json/classical/plan/1") == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # once cached, problems are available offline
+    monkeypatch.setattr(api, "OFFLINE", True)
+    assert api.fetch_problem(3, "classical") == fetched[3]
+    assert api.get_plan(1, "classical") == plan
+    generator = Generator(problem_id=1, plan_cache=False)
+    assert generator.pddl_text() == fetched[1]
+    with pytest.raises(PlanningDomainsAPIError):
+        api.fetch_problem(4, "classical")
+
+    api.clear_cache()
+    with pytest.raises(PlanningDomainsAPIError):
+        api.fetch_problem(1, "classical")
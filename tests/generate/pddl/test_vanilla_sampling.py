@@ -39,6 +39,22 @@ def test_invalid_vanilla_sampling():
         VanillaSampling(dom=dom, prob=prob, plan_len=10, num_traces=1, max_time=0)
 
 
+def test_backtracking_vanilla_sampling():
+    # exit out to the base macq folder so we can get to /tests
+    base = Path(__file__).parent.parent.parent
+    dom = str((base / "pddl_testing_files/playlist_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/playlist_problem.pddl").resolve())
+
+    vanilla = VanillaSampling(dom=dom, prob=prob, plan_len=6, num_traces=5, backtrack=2)
+    assert all(len(trace) == 6 for trace in vanilla.traces)
+
+    # with backtracking, a length with no trace is detected rather than timing out
+    vanilla.backtrack = 10
+    with pytest.raises(InvalidPlanLength):
+        vanilla.generate_single_trace_setup(num_seconds=30, plan_len=7)()
+    assert vanilla.dead_ends
+
+
 if __name__ == "__main__":
     # exit out to the base macq folder so we can get to /tests
     base = Path(__file__).parent.parent.parent
@@ -0,0 +1,49 @@
+import pytest
+from macq.observation import *
+from macq.trace import TraceList
+from macq.utils import PercentError, TokenizationError
+from tests.utils.generators import generate_blocks_traces
+
+
+def test_batch_tokenization():
+    traces = generate_blocks_traces(plan_len=5, num_traces=2)
+
+    observations = BatchTokenizer(IdentityObservation).tokenize(traces)
+    assert observations.type == IdentityObservation
+    for trace, obs_trace in zip(traces, observations):
+        assert len(obs_trace) == len(trace)
+        for step, obs in zip(trace, obs_trace):
+            assert obs.state == step.state
+            assert obs.action == step.action
+            assert obs.index == step.index
+    assert obs_trace[0] is obs_trace[0]
+    assert len(obs_trace[1:3]) == 2
+
+    tokenizer = BatchTokenizer(
+        NoisyPartialObservation, seed=42, percent_missing=0.5, percent_noisy=0.25
+    )
+    obs_trace = tokenizer.tokenize(traces[0])
+    num_fluents = len(traces[0][0].state)
+    for step, obs in zip(traces[0], obs_trace):
+        hidden = [f for f, v in obs.state.items() if v is None]
+        assert len(hidden) == int(num_fluents * 0.5)
+        noisy = [
+            f for f, v in obs.state.items() if v is not None and v != step.state[f]
+        ]
+        assert len(noisy) == int((num_fluents - len(hidden)) * 0.25)
+
+    # the same seed gives the same masks
+    again = tokenizer.tokenize(traces[0])
+    assert [obs.state for obs in again] == [obs.state for obs in obs_trace]
+
+    hidden = set(traces[0].fluents)
+    obs_trace = BatchTokenizer(PartialObservation, hide=hidden).tokenize(traces[0])
+    assert all(v is None for obs in obs_trace for v in obs.state.values())
+
+    with pytest.raises(TokenizationError):
+        BatchTokenizer(NoisyPartialDisorderedParallelObservation)
+    with pytest.raises(PercentError):
+        BatchTokenizer(PartialObservation, percent_missing=2)
+    with pytest.raises(TypeError):
+        BatchTokenizer(IdentityObservation, percent_noisy=0.5)
+    assert len(BatchTokenizer(IdentityObservation).tokenize(TraceList())) == 0
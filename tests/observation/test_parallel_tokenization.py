@@ -0,0 +1,57 @@
+import random
+from pathlib import Path
+from macq.generate.pddl import VanillaSampling
+from macq.observation import *
+from macq.trace import *
+from macq.trace.disordered_parallel_actions_observation_lists import (
+    default_theta_vec,
+    num_parameters_feature,
+    objects_shared_feature,
+)
+from tests.utils.generators import generate_blocks_traces
+
+
+def _summary(observations):
+    return [
+        [(obs.index, obs.action, obs.state.copy()) for obs in obs_trace]
+        for obs_trace in observations
+    ]
+
+
+def test_parallel_tokenization():
+    traces = generate_blocks_traces(plan_len=5, num_traces=4)
+    kwargs = dict(percent_missing=0.3, percent_noisy=0.2, seed=7)
+
+    serial = traces.tokenize(NoisyPartialObservation, **kwargs)
+    parallel = traces.tokenize(NoisyPartialObservation, workers=2, **kwargs)
+    assert len(parallel) == len(traces)
+    assert _summary(parallel) == _summary(serial)
+
+    # seeding does not reset the caller's random number generator
+    random.seed(1)
+    expected = random.random()
+    random.seed(1)
+    traces.tokenize(NoisyPartialObservation, **kwargs)
+    assert random.random() == expected
+
+
+def test_parallel_disordered_tokenization():
+    base = Path(__file__).parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+    traces = VanillaSampling(
+        dom=dom, prob=prob, plan_len=6, num_traces=3, observe_pres_effs=True
+    ).traces
+
+    kwargs = dict(
+        Token=NoisyPartialDisorderedParallelObservation,
+        ObsLists=DisorderedParallelActionsObservationLists,
+        features=[objects_shared_feature, num_parameters_feature],
+        learned_theta=default_theta_vec(2),
+        percent_missing=0.2,
+        seed=3,
+    )
+    serial = traces.tokenize(**kwargs)
+    parallel = traces.tokenize(workers=3, **kwargs)
+    assert _summary(parallel) == _summary(serial)
+    assert parallel.all_par_act_sets == serial.all_par_act_sets
@@ -0,0 +1,141 @@
+from math import exp
+from pathlib import Path
+import numpy as np
+import pytest
+from macq.trace import (
+    Action,
+    ActionPair,
+    DisorderedParallelActionsObservationLists,
+    Fluent,
+    PlanningObject,
+    State,
+    Step,
+    Trace,
+    TraceList,
+)
+from macq.observation import NoisyPartialDisorderedParallelObservation
+from macq.trace.disordered_parallel_actions_observation_lists import (
+    default_theta_vec,
+    num_parameters_feature,
+    objects_shared_feature,
+    vectorised_feature,
+)
+from macq.generate.pddl import VanillaSampling
+
+
+def _traces(plan_len, num_traces):
+    base = Path(__file__).parent.parent
+    dom = str((base / "pddl_testing_files/blocks_domain.pddl").resolve())
+    prob = str((base / "pddl_testing_files/blocks_problem.pddl").resolve())
+    return VanillaSampling(
+        dom=dom,
+        prob=prob,
+        plan_len=plan_len,
+        num_traces=num_traces,
+        observe_pres_effs=True,
+    ).traces
+
+
+def _tokenize(traces, features, theta):
+    return traces.tokenize(
+        Token=NoisyPartialDisorderedParallelObservation,
+        ObsLists=DisorderedParallelActionsObservationLists,
+        features=features,
+        learned_theta=theta,
+        percent_missing=0,
+    )
+
+
+def test_probability_matrix():
+    traces = _traces(plan_len=5, num_traces=2)
+    features = [objects_shared_feature, num_parameters_feature]
+    theta = [0.5, -1.0]
+    obs_lists = _tokenize(traces, features, theta)
+
+    # compare with the pairwise formula
+    def numerator(x, y):
+        return exp(sum(t * f(x, y) for f, t in zip(features, theta)))
+
+    actions = obs_lists.actions
+    pairs = [
+        (actions[i], actions[j])
+        for i in range(len(actions))
+        for j in range(i + 1, len(actions))
+    ]
+    denominator = sum(numerator(x, y) for x, y in pairs)
+    assert obs_lists.denominator == pytest.approx(denominator, rel=1e-5)
+    for x, y in pairs:
+        expected = numerator(x, y) / denominator
+        assert obs_lists.probability(x, y) == pytest.approx(expected, rel=1e-5)
+        assert obs_lists.probability(y, x) == obs_lists.probability(x, y)
+        assert obs_lists.probabilities[ActionPair({x, y})] == obs_lists.probability(
+            x, y
+        )
+    assert len(obs_lists.probabilities) == len(pairs)
+    assert len(list(obs_lists.probabilities)) == len(pairs)
+    # the action pairs are only built once
+    assert obs_lists.cross_actions is obs_lists.cross_actions
+
+    # pairwise-only features are evaluated per pair
+    scalar = _tokenize(
+        traces,
+        [lambda x, y: objects_shared_feature(x, y), num_parameters_feature],
+        theta,
+    )
+    assert scalar.probability_matrix == pytest.approx(obs_lists.probability_matrix)
+
+
+def test_vectorised_feature():
+    feature = vectorised_feature(num_parameters_feature.matrix)
+    traces = _traces(plan_len=3, num_traces=1)
+    act_x, act_y = traces[0][0].action, traces[0][1].action
+    assert feature(act_x, act_y) == num_parameters_feature(act_x, act_y)
+    obs_lists = _tokenize(traces, [feature], default_theta_vec(1))
+    assert obs_lists.probability_matrix.sum() == pytest.approx(2)
+
+
+def test_sample_disorders():
+    obs_lists = _tokenize(_traces(3, 1), [num_parameters_feature], [0])
+    obs_lists.probability_matrix = np.full((3, 3), 0.6)
+    set_ids = np.array([0, 0, 1, 2, 4])
+    act_ids = np.array([0, 1, 2, 0, 1])
+    rng = np.random.default_rng(0)
+
+    runs = 20000
+    counts = np.zeros((5, 5))
+    for _ in range(runs):
+        pairs = obs_lists._sample_disorders(set_ids, act_ids, rng)
+        # pairs are ordered by the sets compared
+        keys = [(set_ids[k], set_ids[l], k, l) for k, l in pairs]
+        assert keys == sorted(keys)
+        np.add.at(counts, (pairs[:, 0], pairs[:, 1]), 1)
+
+    for k in range(5):
+        for l in range(5):
+            distance = set_ids[l] - set_ids[k]
+            expected = 0.6 / distance if distance > 0 else 0
+            assert counts[k, l] / runs == pytest.approx(expected, abs=0.02)
+
+    obs_lists.max_distance = 1
+    for _ in range(100):
+        pairs = obs_lists._sample_disorders(set_ids, act_ids, rng)
+        assert all(set_ids[l] - set_ids[k] == 1 for k, l in pairs)
+
+
+def test_single_action_disorder():
+    # a single action repeated has no pairs of actions to disorder
+    obj = PlanningObject("object", "a")
+    held = Fluent("held", [obj])
+    action = Action("toggle", [obj], precond=set(), add={held}, delete=set())
+    trace = Trace(
+        [
+            Step(State({held: False}), action, 1),
+            Step(State({held: True}), action, 2),
+            Step(State({held: True}), None, 3),
+        ]
+    )
+    features = [objects_shared_feature, num_parameters_feature]
+    obs_lists = _tokenize(TraceList([trace]), features, default_theta_vec(2))
+    assert obs_lists.denominator == 0
+    assert not obs_lists.probability_matrix.any()
+    assert len(obs_lists[0]) == 3
@@ -0,0 +1,75 @@
+import pytest
+from macq.trace import MaskedState, State
+from macq.observation import (
+    IdentityObservation,
+    NoisyPartialObservation,
+    PartialObservation,
+)
+from tests.utils.generators import generate_test_fluents, generate_test_steps
+
+
+def test_masked_state():
+    fluents = generate_test_fluents(4)
+    source = State({f: i % 2 == 0 for i, f in enumerate(fluents)})
+    view = MaskedState(source, hidden={fluents[0]}, flipped={fluents[1]})
+
+    assert view[fluents[0]] is None
+    assert view[fluents[1]] is True
+    assert view[fluents[2]] is True
+    assert len(view) == 4
+    assert list(view) == fluents
+    assert view == State(
+        {fluents[0]: None, fluents[1]: True, **{f: source[f] for f in fluents[2:]}}
+    )
+
+    # writes go to the view, never to the source
+    view[fluents[2]] = False
+    assert not view[fluents[2]]
+    assert source[fluents[2]]
+    del view[fluents[3]]
+    assert not view.has_key(fluents[3])
+    with pytest.raises(KeyError):
+        view[fluents[3]]
+    assert source.has_key(fluents[3])
+
+    # views of views read straight from the source
+    nested = MaskedState(view, hidden={fluents[1]}, flipped={fluents[2]})
+    assert nested.source is source
+    assert nested[fluents[1]] is None
+    assert nested[fluents[2]] is True
+    assert len(nested) == 3
+
+    clone = nested.clone()
+    clone[fluents[0]] = True
+    assert nested[fluents[0]] is None
+    assert nested.clone(atomic=True)[str(fluents[2])] is True
+
+    # direct changes to the fluents are kept, including by views of the view
+    nested.fluents[fluents[0]] = False
+    assert nested[fluents[0]] is False
+    assert nested == State({fluents[0]: False, fluents[1]: None, fluents[2]: True})
+    assert MaskedState(nested)[fluents[0]] is False
+    assert nested.clone()[fluents[0]] is False
+    assert source[fluents[0]]
+
+
+def test_masked_observation_states():
+    step = generate_test_steps(4)[-1]
+    obs = NoisyPartialObservation(step, percent_missing=0.5, percent_noisy=1)
+    assert isinstance(obs.state, MaskedState)
+    assert obs.state.source is step.state
+    assert len(obs.state.hidden) == 2
+    for f in step.state:
+        if f not in obs.state.hidden:
+            assert obs.state[f] == (not step.state[f])
+
+    obs = PartialObservation(step, hide={f for f in step.state})
+    assert all(v is None for v in obs.state.values())
+
+
+def test_identity_observation_state():
+    step = generate_test_steps(4)[-1]
+    obs = IdentityObservation(step)
+    assert type(obs.state) is State
+    assert obs.state == step.state
+    assert obs.state.fluents is not step.state.fluents
@@ -34,3 +34,40 @@ def test_state():
         assert s1.has_key(f)
     for f in s1:
         assert f in fluents
+
+
+def test_state_hash():
+    fluents = generate_test_fluents(3)
+    s1 = State(dict(zip(fluents, [True, False, True])))
+    s2 = State(dict(zip(fluents, [True, False, True])))
+    assert hash(s1) == hash(s2)
+    assert len({s1, s2}) == 1
+
+    # the cached hash follows changes to the state
+    s2[fluents[1]] = True
+    assert s1 != s2 and len({s1, s2}) == 2
+    s2.update({fluents[1]: False})
+    assert hash(s1) == hash(s2)
+    s2.fluents = {}
+    assert hash(s2) == hash(State())
+
+
+if __name__ == "__main__":
+    # benchmark how operations on sets of states scale with the number of fluents
+    from timeit import timeit
+    from macq.trace import Fluent, PlanningObject
+
+    for num_fluents in (10, 100, 1000):
+        fluents = [
+            Fluent("f", [PlanningObject("object", str(i))]) for i in range(num_fluents)
+        ]
+        states = [
+            State({f: (i >> j) & 1 == 1 for j, f in enumerate(fluents)})
+            for i in range(1000)
+        ]
+        first = timeit(lambda: set(states), number=1)
+        again = timeit(lambda: set(states), number=1)
+        print(
+            f"{num_fluents} fluents: set of 1000 states in {first:.4f}s "
+            f"(first hash), {again:.4f}s (cached)"
+        )
@@ -1,7 +1,7 @@
 from inspect import trace
 from pathlib import Path
 import pytest
-from macq.trace import TraceList, Fluent
+from macq.trace import TraceList, Fluent, Trace, Step, State
 from tests.utils.generators import (
     generate_test_trace_list,
     generate_test_trace,
@@ -59,6 +59,31 @@ def test_trace_list():
     trace_list.print()
 
 
+def test_trace_list_dedupe():
+    trace_list = TraceList([generate_test_trace(n) for n in (2, 3, 4)])
+    original = trace_list[2]
+    # a trace with the same steps, built step by step
+    copy = Trace()
+    copy.fingerprint()
+    for step in original:
+        copy.append(Step(State(dict(step.state.items())), step.action, step.index))
+    assert copy.fingerprint() == original.fingerprint()
+    assert copy.transition_fingerprints() == original.transition_fingerprints()
+    trace_list.append(copy)
+
+    assert len(set(trace_list.fingerprints())) == 3
+    assert list(trace_list.unique()) == trace_list.traces[:3]
+    transitions = trace_list.unique_transitions()
+    assert trace_list.dedupe() == 1
+    assert len(trace_list) == 3
+    assert trace_list.unique_transitions() == transitions
+
+    # changing a step changes the fingerprint
+    fingerprint = copy.fingerprint()
+    copy[0] = copy[1]
+    assert copy.fingerprint() != fingerprint
+
+
 def test_trace_list_csv_load():
     base = Path(__file__).parent.parent
     f = str((base / "csv_testing_files/test_load.csv").resolve())
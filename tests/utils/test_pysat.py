@@ -0,0 +1,75 @@
+from nnf import And, Or, Var
+from pysat.formula import WCNF
+from macq.utils.pysat import (
+    WCNFBuilder,
+    extract_raw_model,
+    solve_wcnf,
+    split_wcnf,
+    to_wcnf,
+)
+
+
+def test_wcnf_builder(tmp_path):
+    builder = WCNFBuilder()
+    builder.add_hard([("a", True), ("b", True)])
+    builder.add_soft([("a", True)], 1)
+    builder.add_soft([("b", True)], 2)
+    builder.add_soft([("a", False), ("c", False)], 3)
+    wcnf, decode = builder.close()
+    assert wcnf.hard == [[1, 2]]
+    assert wcnf.soft == [[1], [2], [-1, -3]]
+    assert wcnf.wght == [1, 2, 3]
+    assert wcnf.nv == 3
+
+    # the same theory written to a file
+    path = str(tmp_path / "theory.wcnf")
+    with WCNFBuilder(path) as file_builder:
+        file_builder.add_hard([("a", True), ("b", True)])
+        for clause, weight in zip(
+            [[("a", True)], [("b", True)], [("a", False), ("c", False)]], [1, 2, 3]
+        ):
+            file_builder.add_soft(clause, weight)
+    read = WCNF(from_file=path)
+    assert read.hard == wcnf.hard
+    assert read.soft == wcnf.soft
+    assert read.wght == wcnf.wght
+    assert file_builder.decode == decode
+
+    assert extract_raw_model(wcnf, decode) == {"a": True, "b": True, "c": False}
+
+
+def test_to_wcnf_shared_vars():
+    # vars shared by soft and hard clauses map to the same pysat var
+    a, b = Var("a"), Var("b")
+    wcnf, decode = to_wcnf(And([Or([a]), Or([b])]), [1, 1], And([Or([~a, ~b])]))
+    assert wcnf.nv == 2
+    assert sorted(decode.values()) == ["a", "b"]
+
+
+def test_split_wcnf():
+    builder = WCNFBuilder()
+    builder.add_hard([("a", True), ("b", True)])
+    builder.add_soft([("a", False)], 3)
+    builder.add_soft([("b", False)], 2)
+    builder.add_hard([("c", False), ("d", False)])
+    builder.add_soft([("c", True)], 1)
+    builder.add_soft([("d", True)], 4)
+    builder.add_soft([("e", True)], 5)
+    wcnf, decode = builder.close()
+
+    subproblems = split_wcnf(wcnf)
+    assert sorted(len(sub.soft) for sub, _ in subproblems) == [1, 2, 2]
+    assert sorted(v for _, variables in subproblems for v in variables) == [
+        1,
+        2,
+        3,
+        4,
+        5,
+    ]
+
+    expected = {"a": False, "b": True, "c": False, "d": True, "e": True}
+    for workers in (1, 2):
+        raw_model, result = solve_wcnf(wcnf, decode, workers=workers)
+        assert raw_model == expected
+        assert result.cost == 3
+        assert result.optimal
@@ -0,0 +1,68 @@
+import pytest
+from pysat.formula import WCNF
+from macq.utils import (
+    ExternalMaxSATEngine,
+    LSUEngine,
+    RC2Engine,
+    SATEngine,
+    UnknownSolver,
+    get_maxsat_solver,
+)
+
+
+def _wcnf(weights):
+    wcnf = WCNF()
+    wcnf.extend([[1, 2], [-1, -2]])
+    wcnf.extend([[1], [2], [-2]], weights)
+    return wcnf
+
+
+def test_maxsat_engines():
+    wcnf = _wcnf([2, 4, 1])
+    for engine in ["rc2", "rc2-stratified", RC2Engine(exhaust=True, minz=True)]:
+        result = get_maxsat_solver(engine).solve(wcnf)
+        assert result.model == [-1, 2]
+        assert result.cost == 3
+        assert result.optimal
+    assert get_maxsat_solver().solve(wcnf, time_limit=10).model == [-1, 2]
+
+    # LSU only handles unweighted problems
+    with pytest.raises(ValueError):
+        LSUEngine().solve(wcnf)
+    result = LSUEngine().solve(_wcnf([3, 3, 3]), time_limit=10)
+    assert result.cost == 3
+    assert result.optimal
+
+    with pytest.raises(UnknownSolver):
+        get_maxsat_solver("unknown")
+
+
+def test_external_output():
+    wcnf = _wcnf([2, 4, 1])
+    result = ExternalMaxSATEngine._parse(
+        "c comment\no 4\no 3\ns OPTIMUM FOUND\nv 01\n", wcnf, False
+    )
+    assert result.model == [-1, 2]
+    assert result.cost == 3
+    assert result.optimal
+    result = ExternalMaxSATEngine._parse("o 4\nv 1 -2 0\n", wcnf, True)
+    assert result.model == [1, -2]
+    assert not result.optimal
+
+
+def test_sat_engine():
+    engine = SATEngine("g4")
+    assert engine.solve([[1, 2], [-1]]) == [-1, 2]
+    assert engine.solve([[1, 2], [-1]], assumptions=[-2]) is None
+    assert engine.solve([[1, 2]], time_limit=10) is not None
+
+
+def test_anytime_rc2():
+    wcnf = _wcnf([2, 4, 1])
+    result = RC2Engine(stratified=True).solve(wcnf, time_limit=10)
+    assert result.model == [-1, 2]
+    assert result.optimal
+    # with no time, a model of the hard clauses is returned
+    result = RC2Engine().solve(wcnf, time_limit=0)
+    assert not result.optimal
+    assert result.cost >= 3